@@ -1,23 +1,37 @@
 from typing import List, Dict, Any, Optional, Tuple
 from .items import Item, Potion, SmallPotion, MediumPotion, LargePotion, RevivePotion
 from .pokeball import Pokeball, RegularPokeball, GreatBall, UltraBall, MasterBall
-from .pokemon import Pokemon
+from .pokemon import Pokemon, saved_type
+from .pokedex import PokemonType
+from .record_validation import check_bag
 
 class ItemCompartment:
     """Base class for organizing and managing item quantities in a compartment."""
     def __init__(self, name: str):
         self.name = name
+        self._dirty = False # changed since last saved
 
     def add(self, item: Item):
         key = self.get_item_key(item)
         self._increment(key)
+        self._dirty = True
 
     def remove(self, key: str) -> Optional[Item]:
         if self._has_item(key):
             self._decrement(key)
+            self._dirty = True
             return self._make_item(key)
         return None
 
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def clear_dirty(self):
+        self._dirty = False
+
     def list_items(self) -> List[str]:
         return [f"{key.replace('_', ' ').title()} x{count}" for key, count in self._get_counts().items() if count > 0]
 
@@ -152,6 +166,7 @@ class PokemonRoster:
 
     def __init__(self):
         self.stored_pokemon: List[Pokeball] = []
+        self._dirty = False # changed since last saved
 
     def add(self, pokeball: Pokeball) -> bool:
         """ Add a captured Pokemon to the compartment."""
@@ -162,8 +177,19 @@ class PokemonRoster:
             return False  # at capacity
         
         self.stored_pokemon.append(pokeball)
+        self._dirty = True
         return True
 
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        """Record a change made directly to a stored Pokemon (e.g. healing)."""
+        self._dirty = True
+
+    def clear_dirty(self):
+        self._dirty = False
+
     def is_full(self) -> bool:
         """Returns True if the compartment is full."""
         return len(self.stored_pokemon) >= self.MAX_CAPACITY
@@ -171,6 +197,7 @@ class PokemonRoster:
     def remove(self, index: int) -> Optional[Pokeball]:
         """Remove a Pokemon from the compartment by index."""
         if 0 <= index < len(self.stored_pokemon):
+            self._dirty = True
             return self.stored_pokemon.pop(index)
         return None # if index is out of range
     
@@ -220,6 +247,7 @@ class PokemonRoster:
             or None if the index is invalid.
         """
         if 0 <= index < len(self.stored_pokemon):
+            self._dirty = True
             return self.stored_pokemon[index].switch_pokemon(pokemon)
         return None
 
@@ -249,11 +277,125 @@ class Bag:
             "pokemon": self.pokemon.to_list()
         }
 
+    def is_dirty(self) -> bool:
+        """True if any compartment changed since the bag was loaded or last saved."""
+        return self.potions.is_dirty() or self.pokeballs.is_dirty() or self.pokemon.is_dirty()
+
+    def mark_dirty(self):
+        """Mark every compartment as changed, so the next save writes the whole bag."""
+        self.potions.mark_dirty()
+        self.pokeballs.mark_dirty()
+        self.pokemon.mark_dirty()
+
+    def clear_dirty(self):
+        self.potions.clear_dirty()
+        self.pokeballs.clear_dirty()
+        self.pokemon.clear_dirty()
+
+    def merge_into(self, stored: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the saved form of this bag, reusing the sections of a previously saved dict
+        that have not changed. Picking up one potion then only re-serializes the potion counts,
+        not every Pokemon in the roster.
+        """
+        if not stored:
+            return self.to_dict()
+        return {
+            "potions": self.potions.to_dict() if self.potions.is_dirty() or "potions" not in stored else stored["potions"],
+            "pokeballs": self.pokeballs.to_dict() if self.pokeballs.is_dirty() or "pokeballs" not in stored else stored["pokeballs"],
+            "pokemon": self.pokemon.to_list() if self.pokemon.is_dirty() or "pokemon" not in stored else stored["pokemon"]
+        }
+
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> "Bag":
+        """Deserialize a saved bag. A malformed one raises record_validation.RecordError."""
+        check_bag(data, roster=False)
         bag = Bag()
         bag.potions.from_dict(data.get("potions", {}))
         bag.pokeballs.from_dict(data.get("pokeballs", {}))
         bag.pokemon.from_list(data.get("pokemon", []))
         return bag
-        
\ No newline at end of file
+        
+
+class CompartmentView:
+    """Read-only item counts of a saved compartment."""
+    def __init__(self, name: str, counts: Dict[str, int]):
+        self.name = name
+        self.__counts = counts
+
+    def list_items(self) -> List[str]:
+        return [f"{key.replace('_', ' ').title()} x{count}" for key, count in self.__counts.items() if count > 0]
+
+    def count(self) -> int:
+        return sum(self.__counts.values())
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__counts)
+
+
+class StoredPokemonView:
+    """Read-only stand-in for a Pokeball holding a saved Pokemon, answering the Pokeball queries."""
+    def __init__(self, data: List[Any]):
+        self.__data = data # Pokemon.to_list format
+
+    def get_name(self) -> str:
+        return self.__data[0]
+
+    def get_health(self) -> str:
+        return f"{self.__data[2]}/{self.__data[1]}"
+
+    def get_level(self) -> str:
+        return f"{self.__data[4]}"
+
+    def get_type(self) -> PokemonType:
+        return saved_type(self.__data[0], self.__data[3]) # same fallback as Pokemon.from_list
+
+    def is_empty(self) -> bool:
+        return False
+
+    def is_pokemon_fainted(self) -> bool:
+        return self.__data[2] <= 0
+
+
+class RosterView:
+    """Read-only listing of a saved roster. Pokemon objects are never built."""
+    def __init__(self, data: List[List[Any]]):
+        self.__entries = [StoredPokemonView(pmon_data) for pmon_data in data]
+
+    def is_full(self) -> bool:
+        return len(self.__entries) >= PokemonRoster.MAX_CAPACITY
+
+    def list_pokemon(self) -> List[Tuple[int, str]]:
+        """Same listing as PokemonRoster.list_pokemon."""
+        return [
+            (i, f"{entry.get_name()} | HP: {entry.get_health()} | Lv: {entry.get_level()} | Type: {entry.get_type()}")
+            for i, entry in enumerate(self.__entries)
+        ]
+
+    def get_available_pokemon(self) -> Optional[List[Tuple[int, StoredPokemonView]]]:
+        """Same as PokemonRoster.get_available_pokemon, with views in place of Pokeballs."""
+        available = [(i, entry) for i, entry in enumerate(self.__entries) if not entry.is_pokemon_fainted()]
+        return available if available else None
+
+
+class BagView:
+    """
+    Read-only view over a bag saved with Bag.to_dict.
+    Answers counts and roster listings straight from the saved dict, so callers that only
+    look at the bag never build Pokeballs or Pokemon. Use to_bag() to get a Bag to change.
+    """
+    def __init__(self, data: Dict[str, Any]):
+        self.__data = data
+        self.potions = CompartmentView("Potions", data.get("potions", {}))
+        self.pokeballs = CompartmentView("Empty Pokeballs", data.get("pokeballs", {}))
+        self.__roster: Optional[RosterView] = None
+
+    @property
+    def pokemon(self) -> RosterView:
+        if self.__roster is None:
+            self.__roster = RosterView(self.__data.get("pokemon", []))
+        return self.__roster
+
+    def to_bag(self) -> Bag:
+        """Build the full Bag, for callers that need to change it."""
+        return Bag.from_dict(self.__data)
@@ -0,0 +1,240 @@
+"""
+Write-ahead journal for battles in progress.
+A battle changes the player's active Pokemon and bag in memory, and the battle plate only
+writes them back to player state once the battle is over. The journal appends every change
+made during a battle to a local JSON-lines file so a restart in the middle of a battle does
+not lose XP, caught Pokemon or spent items. Lines are fsynced in batches; once the battle
+has been saved the journal records a commit for it.
+
+Every entry holds the new value of what changed (item counts, the roster, the active Pokemon)
+rather than the difference, so replaying a battle that was in fact saved changes nothing.
+When the journal is opened again after a restart, the entries of battles without a commit are
+kept aside and written into player state the next time that player's session is created.
+"""
+import json
+import os
+import time
+import uuid
+from typing import Callable, Optional
+from .pokemon import Pokemon
+from .bag import Bag
+
+# Lines written before the journal is fsynced
+DEFAULT_SYNC_EVERY = 32
+# Seconds after which pending lines are fsynced even if fewer than DEFAULT_SYNC_EVERY were written
+DEFAULT_SYNC_INTERVAL = 1.0
+
+# Entry ops
+ITEMS = "items"                    # count of every item kind in one bag compartment
+ROSTER = "roster"                  # every stored Pokemon, after a catch or a switch
+ACTIVE_POKEMON = "active_pokemon"  # the active Pokemon after it took damage, gained XP, evolved or was switched
+COMMIT = "commit"                  # the battle was saved to player state
+
+
+class BattleJournal:
+    """
+    Append-only journal file shared by all battles.
+    Opening it reads the entries left by the previous run and keeps those of uncommitted
+    battles, which recover() writes into player state.
+    """
+    def __init__(self, path: str, sync_every: int = DEFAULT_SYNC_EVERY,
+                 sync_interval: float = DEFAULT_SYNC_INTERVAL, clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.__sync_every = sync_every
+        self.__sync_interval = sync_interval
+        self.__clock = clock
+        self.__pending: dict[str, list[dict]] = {} # player name -> uncommitted entries, oldest first
+        self.__unsynced = 0
+        self.__last_sync = clock()
+
+        for entry in _uncommitted(read_entries(path)):
+            self.__pending.setdefault(entry["player"], []).append(entry)
+
+        # Start a new file holding only the uncommitted entries, so the journal does not grow forever
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for entries in self.__pending.values():
+                file.writelines(_encode(entry) for entry in entries)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        self.__file = open(path, "a", encoding="utf-8")
+
+    def open_battle(self, player, pokemon: Pokemon, bag: Optional[Bag]) -> 'BattleJournalEntry':
+        """Start journaling a battle from the player's current (already saved) Pokemon and bag."""
+        return BattleJournalEntry(self, uuid.uuid4().hex, player.get_name(), pokemon, bag)
+
+    def append(self, entry: dict, sync: bool = False) -> None:
+        """Write one entry, fsyncing when enough lines or time have gone by since the last fsync."""
+        self.__file.write(_encode(entry))
+        self.__unsynced += 1
+        if sync or self.__unsynced >= self.__sync_every or self.__clock() - self.__last_sync >= self.__sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Flush written lines to disk."""
+        if self.__file.closed:
+            return
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__unsynced = 0
+        self.__last_sync = self.__clock()
+
+    def has_pending(self, player) -> bool:
+        return player.get_name() in self.__pending
+
+    def recover(self, player) -> bool:
+        """
+        Write the uncommitted battles of a player into player state, then commit them.
+        Return True if anything was recovered.
+        """
+        entries = self.__pending.pop(player.get_name(), None)
+        if not entries:
+            return False
+
+        bag_data = dict(player.get_state("bag", None) or Bag().to_dict())
+        for entry in entries:
+            match entry["op"]:
+                case "items":
+                    bag_data[entry["compartment"]] = entry["counts"]
+                case "roster":
+                    bag_data["pokemon"] = entry["pokemon"]
+                case "active_pokemon":
+                    player.set_state("active_pokemon", entry["pokemon"])
+        player.set_state("bag", bag_data)
+        self._commit_all(player, entries)
+        return True
+
+    def discard(self, player) -> bool:
+        """
+        Drop the uncommitted battles of a player without writing them, when their state was
+        replaced (e.g. reset). They are committed so the next run doesn't recover them either.
+        """
+        entries = self.__pending.pop(player.get_name(), None)
+        if not entries:
+            return False
+        self._commit_all(player, entries)
+        return True
+
+    def _commit_all(self, player, entries: list[dict]) -> None:
+        for battle_id in dict.fromkeys(entry["battle"] for entry in entries):
+            self.append({"battle": battle_id, "player": player.get_name(), "op": COMMIT})
+        self.sync()
+
+    def close(self) -> None:
+        if not self.__file.closed:
+            self.sync()
+            self.__file.close()
+
+
+class BattleJournalEntry:
+    """
+    Journals one battle. capture() is called after every battle update and appends whatever
+    changed since the last call; commit() is called once the battle was saved.
+    """
+    def __init__(self, journal: BattleJournal, battle_id: str, player_name: str,
+                 pokemon: Pokemon, bag: Optional[Bag]):
+        self.__journal = journal
+        self.battle_id = battle_id
+        self.player_name = player_name
+        # Snapshots of the state last written, starting from the state saved before the battle
+        self.__pokemon = self._pokemon_key(pokemon)
+        self.__potions = bag.potions.to_dict() if bag else None
+        self.__pokeballs = bag.pokeballs.to_dict() if bag else None
+        self.__roster = self._roster_key(bag)
+
+    @staticmethod
+    def _pokemon_key(pokemon: Pokemon) -> tuple:
+        # The object changes on evolution and switches, the numbers on damage, healing and XP
+        return (id(pokemon), pokemon.current_health, pokemon.max_health, pokemon.level, pokemon.xp)
+
+    @staticmethod
+    def _roster_key(bag: Optional[Bag]) -> Optional[tuple]:
+        # Stored Pokemon don't change while stored, only catches and switches replace them
+        return tuple(id(ball.captured_pokemon) for ball in bag.pokemon.stored_pokemon) if bag else None
+
+    def _append(self, op: str, **data) -> None:
+        self.__journal.append({"battle": self.battle_id, "player": self.player_name, "op": op, **data})
+
+    def capture(self, pokemon: Pokemon, bag: Optional[Bag]) -> None:
+        """Append an entry for every part of the battle state that changed since the last capture."""
+        pokemon_key = self._pokemon_key(pokemon)
+        if pokemon_key != self.__pokemon:
+            self.__pokemon = pokemon_key
+            self._append(ACTIVE_POKEMON, pokemon=pokemon.to_list())
+        if bag is None:
+            return
+
+        potions = bag.potions.to_dict()
+        if potions != self.__potions:
+            self.__potions = potions
+            self._append(ITEMS, compartment="potions", counts=potions)
+        pokeballs = bag.pokeballs.to_dict()
+        if pokeballs != self.__pokeballs:
+            self.__pokeballs = pokeballs
+            self._append(ITEMS, compartment="pokeballs", counts=pokeballs)
+        roster_key = self._roster_key(bag)
+        if roster_key != self.__roster:
+            self.__roster = roster_key
+            self._append(ROSTER, pokemon=bag.pokemon.to_list())
+
+    def commit(self) -> None:
+        """Record that the battle's final state is in player state. Synced right away."""
+        self.__journal.append({"battle": self.battle_id, "player": self.player_name, "op": COMMIT}, sync=True)
+
+
+def _encode(entry: dict) -> str:
+    return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+def read_entries(path: str) -> list[dict]:
+    """Read the journal at path. A line cut off by a crash ends the journal."""
+    entries = []
+    try:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def _uncommitted(entries: list[dict]) -> list[dict]:
+    """Entries of battles that have no commit, in journal order."""
+    committed = {entry["battle"] for entry in entries if entry["op"] == COMMIT}
+    return [entry for entry in entries if entry["battle"] not in committed]
+
+
+# ---- Module-level journal ----
+# Off by default; the server enables it at startup with enable_battle_journal(path).
+
+JOURNAL: Optional[BattleJournal] = None
+
+def enable_battle_journal(path: str, sync_every: int = DEFAULT_SYNC_EVERY,
+                          sync_interval: float = DEFAULT_SYNC_INTERVAL) -> BattleJournal:
+    """Open the journal at path, keeping the uncommitted battles of the previous run for recovery."""
+    global JOURNAL
+    disable_battle_journal()
+    JOURNAL = BattleJournal(path, sync_every, sync_interval)
+    return JOURNAL
+
+def disable_battle_journal() -> None:
+    global JOURNAL
+    if JOURNAL is not None:
+        JOURNAL.close()
+        JOURNAL = None
+
+def open_journal(player, pokemon: Pokemon, bag: Optional[Bag]) -> Optional[BattleJournalEntry]:
+    """Return a journal entry for a new battle, or None when the journal is off."""
+    return JOURNAL.open_battle(player, pokemon, bag) if JOURNAL is not None else None
+
+def recover_player(player) -> bool:
+    """Write any battle the player was in when the server stopped into their state."""
+    return JOURNAL.recover(player) if JOURNAL is not None else False
+
+def discard_player(player) -> bool:
+    """Forget any battle the player was in when the server stopped, without writing it."""
+    return JOURNAL.discard(player) if JOURNAL is not None else False
@@ -1,6 +1,6 @@
 from .imports import *
 import random
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 if TYPE_CHECKING:
     from coord import Coord
     from maps.base import Map
@@ -14,12 +14,13 @@ from .pokemon import PokemonFactory
 from .bag import Bag
 from .enemyAI import *
 from .observers import BattleMessageNotifier 
+from .game_config import CONFIG, DEFAULTS, GameConfig
 
-# Global constants
-PLAYER_CHANCE_TO_DODGE = 0.5
-OPPONENT_CHANCE_TO_DODGE = 0.5
-ENEMY_RESPONSE_TIME = 3
-PLAYER_CHANCE_TO_RUN = 0.7
+# Default values, each battle reads them from the game_config snapshot it started with
+PLAYER_CHANCE_TO_DODGE = DEFAULTS["player_chance_to_dodge"]
+OPPONENT_CHANCE_TO_DODGE = DEFAULTS["opponent_chance_to_dodge"]
+ENEMY_RESPONSE_TIME = DEFAULTS["enemy_response_time"]
+PLAYER_CHANCE_TO_RUN = DEFAULTS["player_chance_to_run"]
 
 class TurnStage(Enum):
     """Represents the various stages of a Pokemon battle turn lifecycle."""
@@ -40,31 +41,84 @@ class PokemonBattleManager:
     Manages the full turn-based battle logic between the player and a wild Pokemon.
     Handles state transitions, player actions, enemy AI decisions, and battle messages.
     """
-    def __init__(self, player, wild_pokemon_name: str):
+    def __init__(self, player, wild_pokemon_name: str, player_pokemon: Pokemon = None, bag: Bag = None, clock=time.time,
+                 seed: Optional[int] = None, recorder=None, journal=None, config: Optional[GameConfig] = None):
         self.__player = player
-    
-        # Deserialize player active Pokemon and bag from the player's state
-        active_data = player.get_state("active_pokemon", None)
-        self.__player_pokemon = Pokemon.from_list(active_data)  
-        bag_data = player.get_state("bag", None)
-        self.__bag = Bag.from_dict(bag_data)
+        self.__clock = clock # injectable so headless simulations can run on a virtual clock
+        # Game values are pinned for the whole battle, a config reload only affects battles started after it
+        self.__config = config or CONFIG.snapshot
+
+        # Every random decision of this battle comes from its own stream, so a seed and the same inputs replay it exactly
+        self.__seed = seed if seed is not None else random.getrandbits(32)
+        self.__rng = random.Random(self.__seed)
+
+        # Deserialize player active Pokemon and bag from the player's state unless they are given directly
+        if player_pokemon is None:
+            active_data = player.get_state("active_pokemon", None)
+            player_pokemon = Pokemon.from_list(active_data)
+        if bag is None:
+            bag_data = player.get_state("bag", None)
+            bag = Bag.from_dict(bag_data)
+        self.__player_pokemon = player_pokemon
+        self.__bag = bag
 
         self.__enemy_pokemon = PokemonFactory.create_pokemon(wild_pokemon_name)
+        # The enemy's strategy is resolved once for the battle, medium if the player hasn't chosen one
+        self.__ai_level, self.__ai = AI_REGISTRY.resolve(player.get_state("enemy_ai", None), self.__config)
+
+        # Optional battle_replay.BattleRecorder, records the battle from its starting snapshot
+        self.__recorder = recorder
+        if recorder:
+            recorder.start(self.__seed, wild_pokemon_name, self.__ai_level,
+                           self.__player_pokemon, self.__bag, self.__config)
+        # Optional battle_journal.BattleJournalEntry, appends the player's changed state after each update
+        self.__journal = journal
         self.__used_dodge = False # player and enemy share this flag (this can be done since this game is turn-based)
         self.__turn_stage = TurnStage.INTRO
         self.__current_option = None
-        self.__last_action_time = time.time()
+        self.__last_action_time = self.__clock()
         self.__switch_options_map = {}
+        self.__options: list[str] = [] # options most recently presented to the player
+        self.__wakeup_callback = None # lets a scheduler know when a sleeping battle has new input
+        self.__latest_window = None # (message, snapshot) of the last battle window update created
+        self.__shown_window = None # snapshot of the battle window the player currently sees
         
         # Observer setup
         self.__battle_messages: list[Message] = []
-        self.__player_pokemon.add_observer(BattleMessageNotifier(player, self.__battle_messages)) # add observer to player pokemon
-        self.__enemy_pokemon.add_observer(BattleMessageNotifier(player, self.__battle_messages)) # add observer to enemy pokemon
+        self.__observed: list[tuple[Pokemon, BattleMessageNotifier]] = [] # detached when the battle ends
+        self._observe(self.__player_pokemon) # add observer to player pokemon
+        self._observe(self.__enemy_pokemon) # add observer to enemy pokemon
         
 
+    def _observe(self, pokemon: Pokemon) -> None:
+        """Attach a battle message observer to a Pokemon taking part in this battle."""
+        observer = BattleMessageNotifier(self.__player, self.__battle_messages)
+        pokemon.add_observer(observer)
+        self.__observed.append((pokemon, observer))
+        if self.__recorder:
+            side = 1 if pokemon is self.__enemy_pokemon else 0
+            health_recorder = self.__recorder.observer(side)
+            pokemon.add_observer(health_recorder)
+            self.__observed.append((pokemon, health_recorder))
+
+    def _detach_observers(self) -> None:
+        """
+        Remove this battle's observers, since the player's Pokemon live on after the battle
+        and would otherwise keep sending messages into a finished battle.
+        """
+        for pokemon, observer in self.__observed:
+            pokemon.remove_observer(observer)
+        self.__observed.clear()
+
     def set_selected_option(self, selected_option: str) -> None:
         """Called from outside (pressure plate) to set the selected option."""
         self.__current_option = selected_option
+        if self.__wakeup_callback:
+            self.__wakeup_callback(self)
+
+    def set_wakeup_callback(self, callback) -> None:
+        """Register a function called with this battle whenever a new option arrives."""
+        self.__wakeup_callback = callback
 
     def clear_option(self) -> None:
         """Clear the currently selected option."""
@@ -74,6 +128,10 @@ class PokemonBattleManager:
         """Battle is over when we are in the cleanup stage."""
         return self.__turn_stage == TurnStage.CLEANUP
 
+    def get_player(self):
+        """Return the player this battle belongs to."""
+        return self.__player
+
     def get_player_pokemon(self) -> Pokemon:
         """Return the current active Pokemon of the player."""
         return self.__player_pokemon
@@ -82,14 +140,80 @@ class PokemonBattleManager:
         """Return the player's bag."""
         return self.__bag
 
+    def get_enemy_pokemon(self) -> Pokemon:
+        """Return the wild Pokemon the player is fighting."""
+        return self.__enemy_pokemon
+
+    def get_seed(self) -> int:
+        """Return the seed this battle's random stream was started with."""
+        return self.__seed
+
+    def get_rng(self) -> random.Random:
+        """Return this battle's random stream."""
+        return self.__rng
+
+    def get_ai_level(self) -> str:
+        return self.__ai_level
+
+    def get_config(self) -> GameConfig:
+        """Return the game config snapshot this battle runs with."""
+        return self.__config
+
+    def get_turn_stage(self) -> TurnStage:
+        """Return the stage the battle is currently in."""
+        return self.__turn_stage
+
+    def get_options(self) -> list[str]:
+        """Return the options most recently presented to the player."""
+        return self.__options
+
+    def next_wakeup(self) -> Optional[float]:
+        """
+        Return the time at which update() next has work to do, or None if the battle
+        is idle until the player selects an option (or the battle is over).
+        """
+        match self.__turn_stage:
+            case TurnStage.CLEANUP:
+                return None
+            case TurnStage.AWAIT_INPUT | TurnStage.AWAIT_SWITCH | TurnStage.AWAIT_BAG:
+                return self.__clock() if self.__current_option is not None else None
+            case TurnStage.ENEMY_WAIT:
+                return self.__last_action_time + self.__config.enemy_response_time
+            case _:
+                return self.__clock()
+
     # Update is called every second
     def update(self) -> list[Message]:
         """
         Update the battle state based on current turn stage.
         Called repeatedly to progress the battle flow.
         """
-        now = time.time()
+        return self._update()
+
+    @staticmethod
+    def update_battles(battles: list['PokemonBattleManager']) -> list[list[Message]]:
+        """
+        update() every battle, deciding the enemy turns of those at ENEMY_TURN in one batch per
+        AI first. Each battle's AI still draws from its own rng, so battles play out as if updated alone.
+        """
+        groups: dict[tuple[EnemyAI, str], list[PokemonBattleManager]] = {}
+        for battle in battles:
+            if battle.__turn_stage == TurnStage.ENEMY_TURN:
+                groups.setdefault((battle.__ai, battle.__ai_level), []).append(battle)
+        enemy_actions = {}
+        for (ai, ai_level), group in groups.items():
+            actions = choose_enemy_actions(ai, ai_level, [battle.__enemy_pokemon for battle in group],
+                                           [battle.__player_pokemon for battle in group],
+                                           [battle.__rng for battle in group],
+                                           [battle.__used_dodge for battle in group])
+            enemy_actions.update(zip(group, actions))
+        return [battle._update(enemy_actions.get(battle)) for battle in battles]
+
+    def _update(self, enemy_action: Optional[str] = None) -> list[Message]:
+        """update(), with the enemy's action already decided if the battle is at ENEMY_TURN."""
+        now = self.__clock()
         messages = []
+        stage = self.__turn_stage
 
         match self.__turn_stage:
             case TurnStage.INTRO:
@@ -103,11 +227,11 @@ class PokemonBattleManager:
 
             case TurnStage.ENEMY_WAIT:
                 # When ENEMY_RESPONSE_TIME amount of time has passed, switch to enemy turn
-                if now - self.__last_action_time >= ENEMY_RESPONSE_TIME:
+                if now - self.__last_action_time >= self.__config.enemy_response_time:
                     self.__turn_stage = TurnStage.ENEMY_TURN
 
             case TurnStage.ENEMY_TURN:
-                messages.extend(self._handle_enemy_turn())
+                messages.extend(self._handle_enemy_turn(enemy_action))
 
             case TurnStage.END:
                 messages.extend(self._handle_end())
@@ -117,8 +241,50 @@ class PokemonBattleManager:
 
         messages.extend(self.__battle_messages)  # include health change messages from observers
         self.__battle_messages.clear()  # clear buffer after flushing messages
+
+        if self.__recorder and self.__turn_stage != stage:
+            self.__recorder.stage(self.__turn_stage)
+            if self.__turn_stage == TurnStage.CLEANUP:
+                self.__recorder.finish(self)
+        if self.__journal:
+            self.__journal.capture(self.__player_pokemon, self.__bag)
         
-        return messages
+        return self._coalesce(messages)
+
+    def _coalesce(self, messages: list[Message]) -> list[Message]:
+        """
+        Merge one tick's output before it is sent. All text becomes a single ServerMessage,
+        only the latest battle window update is kept, and it is dropped if the HP and level it
+        shows are what the player already sees. Every message of a battle goes to its player,
+        so this is also per recipient.
+        """
+        texts, others, window = [], [], None
+        for message in messages:
+            if isinstance(message, ServerMessage):
+                texts.append(message)
+            elif isinstance(message, PokemonBattleMessage):
+                window = message
+            else:
+                others.append(message)
+
+        output = []
+        if len(texts) == 1:
+            output.append(texts[0])
+        elif texts:
+            output.append(ServerMessage(self.__player, "\n".join(m._get_data()["text"] for m in texts)))
+        output.extend(others)
+
+        if window is not None:
+            if self.__latest_window is not None and window is self.__latest_window[0]:
+                snapshot = self.__latest_window[1]
+                if snapshot != self.__shown_window:
+                    self.__shown_window = snapshot
+                    output.append(window)
+            else:
+                # Destroy messages always go through, and the next window has to be sent in full
+                self.__shown_window = None
+                output.append(window)
+        return output
 
     def _pokemon_data(self, pokemon) -> dict[str, int]:
         """Pokemon data for battle message. These are the only fields needed for battle window."""
@@ -131,12 +297,16 @@ class PokemonBattleManager:
 
     def _make_battle_message(self) -> PokemonBattleMessage:
         """Create a battle message with player and enemy Pokemon data."""
-        return PokemonBattleMessage(
+        player_data = self._pokemon_data(self.__player_pokemon)
+        enemy_data = self._pokemon_data(self.__enemy_pokemon)
+        message = PokemonBattleMessage(
             self.__player,
             self.__player,
-            player_data=self._pokemon_data(self.__player_pokemon),
-            enemy_data=self._pokemon_data(self.__enemy_pokemon)
+            player_data=player_data,
+            enemy_data=enemy_data
         )
+        self.__latest_window = (message, (tuple(player_data.values()), tuple(enemy_data.values())))
+        return message
 
     def _handle_intro(self) -> list[Message]:
         """Initialize the battle with encounter text setting up battle."""
@@ -145,7 +315,7 @@ class PokemonBattleManager:
             self._make_battle_message()
         ]
         self.__turn_stage = TurnStage.PLAYER_TURN # player goes first
-        self.__last_action_time = time.time() 
+        self.__last_action_time = self.__clock() 
         return messages
 
     def _handle_player_turn(self) -> list[Message]:
@@ -166,8 +336,9 @@ class PokemonBattleManager:
 
         full_options = attack_options + utility_options + switch_option  # combine all options
 
-        self.__last_action_time = time.time()
+        self.__last_action_time = self.__clock()
         self.__turn_stage = TurnStage.AWAIT_INPUT
+        self.__options = full_options
 
         return [OptionsMessage(self.__player, self.__player, full_options)]  # present options to player
 
@@ -177,12 +348,14 @@ class PokemonBattleManager:
         (attacks, potions, Pokeballs, switching Pokemon, running).
         """
         messages = []
-        now = time.time()
+        now = self.__clock()
         selected = self.__current_option
         if selected is None:
             return messages
 
         self.clear_option()
+        if self.__recorder:
+            self.__recorder.option(selected)
         name = self.__player.get_name()
         if self.__turn_stage == TurnStage.AWAIT_BAG:
             if selected == "Return":
@@ -197,7 +370,7 @@ class PokemonBattleManager:
                 if potion:
                     # Use the potion
                     old_health = self.__player_pokemon.current_health
-                    success = potion.use(self.__player_pokemon)
+                    success = potion.use(self.__player_pokemon, self.__config)
                     
                     if success:
                         messages.append(ServerMessage(
@@ -235,7 +408,7 @@ class PokemonBattleManager:
                     ))
                     
                     # Try to catch the Pokemon using the modified use method
-                    catch_success = pokeball.use(self.__enemy_pokemon)
+                    catch_success = pokeball.use(self.__enemy_pokemon, self.__rng, self.__config)
                     
                     if catch_success:
                         messages.append(ServerMessage(
@@ -274,7 +447,7 @@ class PokemonBattleManager:
                     self.__player_pokemon = new_active
                     # Add observer to new switched pokemon if not already present
                     if len(self.__player_pokemon._observers) == 0:
-                        self.__player_pokemon.add_observer(BattleMessageNotifier(self.__player, self.__battle_messages))
+                        self._observe(self.__player_pokemon)
                         
                     self.__turn_stage = TurnStage.ENEMY_WAIT
                     return [
@@ -313,6 +486,7 @@ class PokemonBattleManager:
             
             # Set state and return options message
             self.__turn_stage = TurnStage.AWAIT_BAG
+            self.__options = bag_options
             return [
                 ServerMessage(self.__player, "Choose an item to use:"),
                 OptionsMessage(self.__player, self.__player, bag_options)
@@ -325,7 +499,7 @@ class PokemonBattleManager:
             self.__turn_stage = TurnStage.ENEMY_WAIT
 
         elif selected == "Run":
-            if random.random() < PLAYER_CHANCE_TO_RUN:
+            if self.__rng.random() < self.__config.player_chance_to_run:
                 messages.append(ServerMessage(self.__player, f"({name}) You ran away safely!"))
                 self.__turn_stage = TurnStage.END
             else:
@@ -349,6 +523,7 @@ class PokemonBattleManager:
 
             switch_options.append("Return")
             self.__turn_stage = TurnStage.AWAIT_SWITCH
+            self.__options = switch_options
             return [
                 ServerMessage(self.__player, "Choose a Pokémon to switch to:"),
                 OptionsMessage(self.__player, self.__player, switch_options)
@@ -371,7 +546,7 @@ class PokemonBattleManager:
         player_name = self.__player.get_name()
 
         if 0 <= index < len(self.__player_pokemon.known_attacks):
-            if self.__used_dodge and random.random() < OPPONENT_CHANCE_TO_DODGE: # successful enemy dodge
+            if self.__used_dodge and self.__rng.random() < self.__config.opponent_chance_to_dodge: # successful enemy dodge
                 messages.append(ServerMessage(
                     self.__player,
                     f"(Opp) {self.__enemy_pokemon.name} dodged {self.__player_pokemon.known_attacks[index]['name']}!"
@@ -380,7 +555,7 @@ class PokemonBattleManager:
                 if self.__used_dodge: # unsuccessful enemy dodge
                     messages.append(ServerMessage(self.__player, f"(Opp) Dodge failed!"))
 
-                result = self.__player_pokemon.attack(index, self.__enemy_pokemon)
+                result = self.__player_pokemon.attack(index, self.__enemy_pokemon, self.__config)
                 messages.append(ServerMessage(
                     self.__player,
                     f"({player_name}) {result['message']}"
@@ -414,18 +589,14 @@ class PokemonBattleManager:
 
         return messages
 
-    def _handle_enemy_turn(self):
-        """Let the enemy Pokemon take its turn using AI to choose actions."""
+    def _handle_enemy_turn(self, action: Optional[str] = None):
+        """Let the enemy Pokemon take its turn using AI to choose actions, unless already chosen."""
         messages = []
-        ai_level = self.__player.get_state("enemy_ai", "medium")  # midium is defaulted if not set
-        if ai_level == "easy":
-            ai = EasyAI()
-        elif ai_level == "hard":
-            ai = HardAI()
-        else:
-            ai = MediumAI()
-
-        action = ai.choose_action(self.__enemy_pokemon, self.__player_pokemon)
+        if action is None:
+            action = choose_enemy_action(self.__ai, self.__ai_level, self.__enemy_pokemon, self.__player_pokemon, self.__rng,
+                                         self.__used_dodge)
+        if self.__recorder:
+            self.__recorder.ai_action(action)
 
         if action == "Dodge":
             messages.append(ServerMessage(self.__player, f"(Opp) {self.__enemy_pokemon.name} is preparing to dodge!"))
@@ -434,7 +605,7 @@ class PokemonBattleManager:
             attack_index = int(action)
             attack = self.__enemy_pokemon.known_attacks[attack_index]
 
-            if self.__used_dodge and random.random() < PLAYER_CHANCE_TO_DODGE: # successful player dodge
+            if self.__used_dodge and self.__rng.random() < self.__config.player_chance_to_dodge: # successful player dodge
                 messages.append(ServerMessage(
                     self.__player,
                     f"({self.__player.get_name()}) {self.__player_pokemon.name} dodged {attack['name']} attack!"
@@ -443,7 +614,7 @@ class PokemonBattleManager:
                 if self.__used_dodge:
                     messages.append(ServerMessage(self.__player, "(Opp) Dodge failed!"))
                 
-                result = self.__enemy_pokemon.attack(attack_index, self.__player_pokemon)
+                result = self.__enemy_pokemon.attack(attack_index, self.__player_pokemon, self.__config)
                 messages.append(ServerMessage(self.__player, f"(Opp) {result['message']}"))
                 messages.append(self._make_battle_message())
 
@@ -462,7 +633,7 @@ class PokemonBattleManager:
         else:
             self.__turn_stage = TurnStage.PLAYER_TURN
 
-        self.__last_action_time = time.time()
+        self.__last_action_time = self.__clock()
         return messages
 
     def _handle_end(self) -> list[Message]:
@@ -478,7 +649,7 @@ class PokemonBattleManager:
             for key in revive_keys:
                 if self.__bag.potions._has_item(key):
                     revive_potion = self.__bag.potions.remove(key)
-                    success = revive_potion.use(self.__player_pokemon)
+                    success = revive_potion.use(self.__player_pokemon, self.__config)
                     if success:
                         self.__turn_stage = TurnStage.ENEMY_WAIT
                         return [
@@ -488,14 +659,14 @@ class PokemonBattleManager:
                       
 
         if self.__player_pokemon.is_fainted() and available: # automatically switch if player pokemon has fainted
-            index, new_ball = random.choice(available)
+            index, new_ball = self.__rng.choice(available)
             new_active = self.__bag.pokemon.switch_pokemon(self.__player_pokemon, index)
 
             if new_active:
                 self.__player_pokemon = new_active
                 # Add observer to new switched pokemon if not already present
                 if len(self.__player_pokemon._observers) == 0:
-                    self.__player_pokemon.add_observer(BattleMessageNotifier(self.__player, self.__battle_messages))
+                    self._observe(self.__player_pokemon)
                 self.__turn_stage = TurnStage.PLAYER_TURN
 
                 return [
@@ -508,6 +679,7 @@ class PokemonBattleManager:
             OptionsMessage(self.__player, self.__player, [], destroy=True),
             PokemonBattleMessage(self.__player, self.__player, {}, {}, destroy=True)
         ]
+        self._detach_observers()
         self.__turn_stage = TurnStage.CLEANUP
         return messages
 
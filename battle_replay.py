@@ -0,0 +1,543 @@
+"""
+Compact binary battle replay log.
+Every recorded battle writes a START snapshot (seed, species, AI level, player Pokemon, bag and
+the game config it was fought with),
+then one record per TurnStage change, player option, enemy AI action and health change, and a
+RESULT record. Records are varint encoded and written by a background thread to a rotating file,
+so the game tick only pays for encoding. The reader streams records back and can re-drive
+PokemonBattleManager through the headless simulator to check that a battle replays exactly.
+Run with: python -m pengumon.battle_replay LOG [--verify]
+"""
+import argparse
+import atexit
+import itertools
+import json
+import os
+import queue
+import threading
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from .pokedex import pokedex
+from .pokemon import Pokemon
+from .bag import Bag, PotionCompartment, PokeballCompartment
+from .battle_manager import PokemonBattleManager, TurnStage
+from .battle_simulator import run_battle, determine_winner
+from .observers import HealthObserver
+from .game_config import DEFAULT_CONFIG, GameConfig
+from .enemyAI import AI_RULES_VERSION
+
+MAGIC = b"PGRP\x03"  # start of every log file, the last byte is the format version
+
+# Record kinds
+START = 1
+STAGE = 2
+OPTION = 3
+AI_ACTION = 4
+HEALTH = 5
+RESULT = 6
+
+# Sides for HEALTH records
+PLAYER_SIDE = 0
+ENEMY_SIDE = 1
+
+# Outcomes for RESULT records, matching determine_winner
+OUTCOMES = (None, "player", "enemy")
+
+EVOLUTION_CLASSES = ("BaseEvolutionState", "SecondEvolutionState", "FinalEvolutionState")
+POTION_KEYS = tuple(PotionCompartment().to_dict())
+POKEBALL_KEYS = tuple(PokeballCompartment().to_dict())
+STAGES = tuple(TurnStage)
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 4
+
+
+# ---- Encoding ----
+
+def _put_varint(out: bytearray, value: int) -> None:
+    """Append a non-negative integer, 7 bits per byte, lowest bits first."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _put_string(out: bytearray, text: str) -> None:
+    data = text.encode("utf-8")
+    _put_varint(out, len(data))
+    out += data
+
+def _zigzag(value: int) -> int:
+    """Map signed integers to non-negative ones (0, -1, 1, -2 ... -> 0, 1, 2, 3 ...)."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+def config_overrides(config: GameConfig) -> dict:
+    """The values of a config snapshot that differ from the defaults, which is all START stores."""
+    defaults = DEFAULT_CONFIG.to_dict()
+    return {key: value for key, value in config.to_dict().items() if value != defaults[key]}
+
+def _put_pokemon(out: bytearray, pokemon: Pokemon) -> None:
+    _put_string(out, pokemon.name)
+    for value in (pokemon.max_health, pokemon.current_health, pokemon.level, pokemon.xp,
+                  EVOLUTION_CLASSES.index(pokemon.evolution_state.__class__.__name__)):
+        _put_varint(out, value)
+    _put_varint(out, len(pokemon.known_attacks))
+    for attack in pokemon.known_attacks:
+        _put_varint(out, attack["damage"])  # move names come from the pokedex
+
+
+def _frame(kind: int, battle_id: int, payload: bytes = b"") -> bytes:
+    """Build one length-prefixed record."""
+    body = bytearray()
+    _put_varint(body, kind)
+    _put_varint(body, battle_id)
+    body += payload
+    out = bytearray()
+    _put_varint(out, len(body))
+    out += body
+    return bytes(out)
+
+
+# ---- Decoding ----
+
+class _Cursor:
+    """Reads varints and strings from one record body."""
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def varint(self) -> int:
+        result, shift = 0, 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def string(self) -> str:
+        length = self.varint()
+        text = self.data[self.pos:self.pos + length].decode("utf-8")
+        self.pos += length
+        return text
+
+    def pokemon(self) -> list:
+        """Return the Pokemon in Pokemon.to_list format."""
+        name = self.string()
+        max_health, current_health, level, xp, evolution = (self.varint() for _ in range(5))
+        damage = [self.varint() for _ in range(self.varint())]
+        data = pokedex[name]
+        attacks = [{"name": attack["name"], "damage": d} for attack, d in zip(data["attacks"], damage)]
+        return [name, max_health, current_health, data["type"].name, level, xp, attacks, EVOLUTION_CLASSES[evolution]]
+
+
+def decode_record(body: bytes) -> tuple:
+    """
+    Decode one record body into (kind, battle_id, *fields):
+        START:     seed, enemy_ai, wild_pokemon_name, player_pokemon (to_list format), bag (to_dict format),
+                   config version, config overrides (see config_overrides), AI rules version
+        STAGE:     TurnStage
+        OPTION:    option text
+        AI_ACTION: "Dodge" or attack index as string
+        HEALTH:    side, old hp, new hp
+        RESULT:    winner, player hp, enemy hp
+    """
+    cursor = _Cursor(body)
+    kind, battle_id = cursor.varint(), cursor.varint()
+    if kind == START:
+        seed = _unzigzag(cursor.varint())
+        enemy_ai, wild_name = cursor.string(), cursor.string()
+        player_pokemon = cursor.pokemon()
+        bag = {
+            "potions": {key: cursor.varint() for key in POTION_KEYS},
+            "pokeballs": {key: cursor.varint() for key in POKEBALL_KEYS},
+            "pokemon": [cursor.pokemon() for _ in range(cursor.varint())]
+        }
+        config_version, config_values = cursor.varint(), json.loads(cursor.string())
+        ai_rules_version = cursor.varint()
+        return (kind, battle_id, seed, enemy_ai, wild_name, player_pokemon, bag,
+                config_version, config_values, ai_rules_version)
+    if kind == STAGE:
+        return kind, battle_id, STAGES[cursor.varint()]
+    if kind == OPTION:
+        return kind, battle_id, cursor.string()
+    if kind == AI_ACTION:
+        action = cursor.varint()
+        return kind, battle_id, "Dodge" if action == 0 else str(action - 1)
+    if kind == HEALTH:
+        return kind, battle_id, cursor.varint(), cursor.varint(), cursor.varint()
+    if kind == RESULT:
+        return kind, battle_id, OUTCOMES[cursor.varint()], cursor.varint(), cursor.varint()
+    raise ValueError(f"Unknown replay record kind: {kind}")
+
+
+def _check_magic(path: str, header: bytes) -> None:
+    if header == MAGIC:
+        return
+    if len(header) == len(MAGIC) and header[:-1] == MAGIC[:-1]:
+        raise ValueError(f"{path} is a version {header[-1]} replay log, this build only reads version {MAGIC[-1]}")
+    raise ValueError(f"{path} is not a replay log")
+
+
+def _read_varint(stream: BinaryIO) -> Optional[int]:
+    """Read a varint from a file, or None at the end of the file."""
+    result, shift = 0, 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            return None
+        result |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return result
+        shift += 7
+
+
+def read_records(path: str) -> Iterator[tuple]:
+    """Stream decoded records from one log file. A record cut short by a crash ends the stream."""
+    with open(path, "rb") as stream:
+        _check_magic(path, stream.read(len(MAGIC)))
+        while True:
+            length = _read_varint(stream)
+            if length is None:
+                return
+            body = stream.read(length)
+            if len(body) < length:
+                return
+            yield decode_record(body)
+
+
+def log_files(path: str, backup_count: int = DEFAULT_BACKUP_COUNT) -> list[str]:
+    """Return the existing files of a rotating log, oldest first."""
+    files = [f"{path}.{i}" for i in range(backup_count, 0, -1)] + [path]
+    return [file for file in files if os.path.exists(file)]
+
+
+def last_battle_id(path: str, backup_count: int = DEFAULT_BACKUP_COUNT) -> int:
+    """
+    Highest battle id in a rotating log, 0 if it has no records. Ids only grow, so the
+    newest file that has any records holds it; records are skipped over without decoding.
+    """
+    for file in reversed(log_files(path, backup_count)):
+        with open(file, "rb") as stream:
+            data = stream.read()
+        if not data.startswith(MAGIC):
+            continue
+        cursor = _Cursor(data)
+        cursor.pos = len(MAGIC)
+        highest = 0
+        try:
+            while cursor.pos < len(data):
+                length = cursor.varint()
+                end = cursor.pos + length
+                if end > len(data):
+                    break # cut short by a crash
+                cursor.varint() # kind
+                highest = max(highest, cursor.varint())
+                cursor.pos = end
+        except IndexError:
+            pass # length prefix cut short by a crash
+        if highest:
+            return highest
+    return 0
+
+
+# ---- Recording ----
+
+class BattleLog:
+    """Records of one battle: the START snapshot, the events that followed and the result."""
+    def __init__(self, battle_id: int, seed: int, enemy_ai: str, wild_pokemon_name: str,
+                 player_pokemon: list, bag: dict, config_version: int = 0, config_values: Optional[dict] = None,
+                 ai_rules_version: int = AI_RULES_VERSION):
+        self.battle_id = battle_id
+        self.seed = seed
+        self.enemy_ai = enemy_ai
+        self.wild_pokemon_name = wild_pokemon_name
+        self.player_pokemon = player_pokemon  # Pokemon.to_list format
+        self.bag = bag                        # Bag.to_dict format
+        self.config_version = config_version  # version of the config snapshot the battle started with
+        self.config_values = config_values or {}  # its values that differ from the defaults
+        self.ai_rules_version = ai_rules_version  # enemyAI.AI_RULES_VERSION of the build that recorded it
+        self.events: list[tuple] = []         # (kind, *fields) in the order they happened
+        self.result: Optional[tuple] = None   # (winner, player hp, enemy hp), None if the battle did not finish
+
+    def options(self) -> list[str]:
+        """Options the player selected, in order."""
+        return [event[1] for event in self.events if event[0] == OPTION]
+
+    def __repr__(self) -> str:
+        return f"BattleLog(id={self.battle_id}, seed={self.seed}, wild={self.wild_pokemon_name}, result={self.result})"
+
+
+def iter_battles(records: Iterator[tuple], include_unfinished: bool = False) -> Iterator[BattleLog]:
+    """
+    Group a record stream into battles, yielding each one as soon as its RESULT arrives.
+    Only battles in progress are kept in memory. Records of battles whose START is not in
+    the stream (for example in a rotated-out file) are skipped.
+    """
+    open_battles: dict[int, BattleLog] = {}
+    for record in records:
+        kind, battle_id = record[0], record[1]
+        if kind == START:
+            open_battles[battle_id] = BattleLog(battle_id, *record[2:])
+            continue
+        log = open_battles.get(battle_id)
+        if log is None:
+            continue
+        if kind == RESULT:
+            log.result = record[2:]
+            yield open_battles.pop(battle_id)
+        else:
+            log.events.append((kind,) + record[2:])
+    if include_unfinished:
+        yield from open_battles.values()
+
+
+class _ReplayHealthObserver(HealthObserver):
+    """Records the health changes of one side of a battle."""
+    def __init__(self, recorder: 'BattleRecorder', side: int):
+        self.__recorder = recorder
+        self.__side = side
+
+    def on_health_changed(self, subject, old_hp: int, new_hp: int) -> None:
+        self.__recorder.health(self.__side, old_hp, new_hp)
+
+
+class BattleRecorder:
+    """Encodes the records of one battle and hands them to a sink (a ReplayWriter or a list's append)."""
+    def __init__(self, sink: Callable[[bytes], None], battle_id: int):
+        self.__sink = sink
+        self.__battle_id = battle_id
+
+    def start(self, seed: int, wild_pokemon_name: str, enemy_ai: str, player_pokemon: Pokemon, bag: Bag,
+              config: GameConfig = DEFAULT_CONFIG) -> None:
+        payload = bytearray()
+        _put_varint(payload, _zigzag(seed))
+        _put_string(payload, enemy_ai)
+        _put_string(payload, wild_pokemon_name)
+        _put_pokemon(payload, player_pokemon)
+        for counts, keys in ((bag.potions.to_dict(), POTION_KEYS), (bag.pokeballs.to_dict(), POKEBALL_KEYS)):
+            for key in keys:
+                _put_varint(payload, counts.get(key, 0))
+        stored = [ball.captured_pokemon for ball in bag.pokemon.stored_pokemon if not ball.is_empty()]
+        _put_varint(payload, len(stored))
+        for pokemon in stored:
+            _put_pokemon(payload, pokemon)
+        _put_varint(payload, config.version)
+        _put_string(payload, json.dumps(config_overrides(config), separators=(",", ":")))
+        _put_varint(payload, AI_RULES_VERSION)
+        self.__sink(_frame(START, self.__battle_id, payload))
+
+    def stage(self, stage: TurnStage) -> None:
+        payload = bytearray()
+        _put_varint(payload, STAGES.index(stage))
+        self.__sink(_frame(STAGE, self.__battle_id, payload))
+
+    def option(self, option: str) -> None:
+        payload = bytearray()
+        _put_string(payload, option)
+        self.__sink(_frame(OPTION, self.__battle_id, payload))
+
+    def ai_action(self, action: str) -> None:
+        payload = bytearray()
+        _put_varint(payload, 0 if action == "Dodge" else int(action) + 1)
+        self.__sink(_frame(AI_ACTION, self.__battle_id, payload))
+
+    def health(self, side: int, old_hp: int, new_hp: int) -> None:
+        payload = bytearray()
+        for value in (side, old_hp, new_hp):
+            _put_varint(payload, value)
+        self.__sink(_frame(HEALTH, self.__battle_id, payload))
+
+    def observer(self, side: int) -> HealthObserver:
+        """Return a health observer that records changes for the given side."""
+        return _ReplayHealthObserver(self, side)
+
+    def finish(self, battle: PokemonBattleManager) -> None:
+        payload = bytearray()
+        for value in (OUTCOMES.index(determine_winner(battle)),
+                      battle.get_player_pokemon().current_health,
+                      battle.get_enemy_pokemon().current_health):
+            _put_varint(payload, value)
+        self.__sink(_frame(RESULT, self.__battle_id, payload))
+
+
+class ReplayWriter:
+    """
+    Appends records to a rotating log file from a background thread.
+    write() only queues bytes; the thread writes everything queued in one go and rotates
+    the file (path -> path.1 -> path.2 ...) once it grows past max_bytes.
+    Battle ids carry on from the highest one already in the log, so a restarted server
+    appending to it doesn't reuse them.
+    """
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.__queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.__battle_ids = itertools.count(last_battle_id(path, backup_count) + 1)
+        self.__closed = False
+        self.__thread = threading.Thread(target=self._run, name="battle-replay-writer", daemon=True)
+        self.__thread.start()
+
+    def recorder(self) -> BattleRecorder:
+        """Return a recorder for a new battle."""
+        return BattleRecorder(self.write, next(self.__battle_ids))
+
+    def write(self, record: bytes) -> None:
+        self.__queue.put(record)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until everything queued so far is on disk."""
+        done = threading.Event()
+        self.__queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        """Write what is left and stop the writer thread."""
+        if not self.__closed:
+            self.__closed = True
+            self.__queue.put(None)
+            self.__thread.join()
+
+    def _open(self) -> BinaryIO:
+        stream = open(self.path, "ab")
+        if stream.tell() == 0:
+            stream.write(MAGIC)
+            return stream
+        with open(self.path, "rb") as existing:
+            header = existing.read(len(MAGIC))
+        if header != MAGIC: # written in another format: move it aside rather than appending to it
+            return self._rotate(stream)
+        return stream
+
+    def _rotate(self, stream: BinaryIO) -> BinaryIO:
+        stream.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        return self._open()
+
+    def _run(self) -> None:
+        stream = self._open()
+        running = True
+        while running:
+            items = [self.__queue.get()]
+            while True:
+                try:
+                    items.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records, waiters = [], []
+            for item in items:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    records.append(item)
+
+            data = b"".join(records)
+            if data:
+                if stream.tell() + len(data) > self.max_bytes and stream.tell() > len(MAGIC):
+                    stream = self._rotate(stream)
+                stream.write(data)
+                stream.flush()
+            for waiter in waiters:
+                waiter.set()
+        stream.close()
+
+
+# The log shared by every battle, None unless enable_replay_log was called
+REPLAY_LOG: Optional[ReplayWriter] = None
+
+def enable_replay_log(path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                      backup_count: int = DEFAULT_BACKUP_COUNT) -> ReplayWriter:
+    """Start recording every new battle to a rotating log at path."""
+    global REPLAY_LOG
+    disable_replay_log()
+    REPLAY_LOG = ReplayWriter(path, max_bytes, backup_count)
+    return REPLAY_LOG
+
+def disable_replay_log() -> None:
+    global REPLAY_LOG
+    if REPLAY_LOG is not None:
+        REPLAY_LOG.close()
+        REPLAY_LOG = None
+
+# Records still queued when the server exits are written before the writer thread is dropped
+atexit.register(disable_replay_log)
+
+def open_recorder() -> Optional[BattleRecorder]:
+    """Return a recorder for a new battle, or None when recording is off."""
+    return REPLAY_LOG.recorder() if REPLAY_LOG is not None else None
+
+
+# ---- Replay ----
+
+def replay_battle(log: BattleLog) -> BattleLog:
+    """
+    Re-drive PokemonBattleManager with the recorded seed, snapshot, config and player options,
+    and return the log of the replayed battle. It matches the original if nothing that
+    affects battles has changed (see replay_matches). A battle recorded under other AI rules
+    raises ValueError, since its enemy would not play the same way.
+    """
+    if log.ai_rules_version != AI_RULES_VERSION:
+        raise ValueError(f"battle {log.battle_id} was recorded with AI rules version {log.ai_rules_version}, "
+                         f"this build plays version {AI_RULES_VERSION}")
+    records: list[bytes] = []
+    options = iter(log.options())
+    run_battle(Pokemon.from_list(log.player_pokemon), log.wild_pokemon_name,
+               policy=lambda battle, presented: next(options),
+               bag=Bag.from_dict(log.bag), enemy_ai=log.enemy_ai,
+               max_decisions=len(log.options()), seed=log.seed,
+               config=GameConfig.from_dict(log.config_values, log.config_version),
+               recorder=BattleRecorder(records.append, log.battle_id))
+    return next(iter_battles((decode_record(_body(record)) for record in records), include_unfinished=True))
+
+def _body(record: bytes) -> bytes:
+    """Strip the length prefix from a framed record."""
+    cursor = _Cursor(record)
+    cursor.varint()
+    return record[cursor.pos:]
+
+def replay_matches(log: BattleLog) -> bool:
+    """Check that replaying a battle produces the same events and result."""
+    replayed = replay_battle(log)
+    return replayed.events == log.events and replayed.result == log.result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print and replay battles from a replay log.")
+    parser.add_argument("path", help="log file (rotated files next to it are read too)")
+    parser.add_argument("--verify", action="store_true", help="replay every battle and compare")
+    args = parser.parse_args()
+
+    records = (record for file in log_files(args.path) for record in read_records(file))
+    total = mismatches = skipped = 0
+    for log in iter_battles(records):
+        total += 1
+        line = f"{log.battle_id}: {log.player_pokemon[0]} vs {log.wild_pokemon_name} ({log.enemy_ai}) " \
+               f"seed={log.seed} winner={log.result[0]} events={len(log.events)}"
+        if args.verify:
+            try:
+                matches = replay_matches(log)
+            except ValueError as error:
+                skipped += 1
+                line += f" skipped ({error})"
+            else:
+                mismatches += not matches
+                line += " ok" if matches else " MISMATCH"
+        print(line)
+    print(f"{total} battles" + (f", {mismatches} mismatches, {skipped} skipped" if args.verify else ""))
+
+
+if __name__ == "__main__":
+    main()
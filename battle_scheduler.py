@@ -0,0 +1,105 @@
+from .imports import *
+import heapq
+import itertools
+import time
+from typing import TYPE_CHECKING, Optional
+if TYPE_CHECKING:
+    from message import *
+
+from .battle_manager import PokemonBattleManager
+
+# Minimum time between two scheduler ticks. Pressure plates are updated about once a second,
+# so the first plate updated in a game tick advances every battle and the rest only collect output.
+TICK_INTERVAL = 0.5
+
+
+class BattleScheduler:
+    """
+    Shared timer heap for all open battles.
+    A battle is only updated when it has work to do: its enemy delay expired, the player
+    selected an option, or it is in a stage that advances on its own. Battles waiting for
+    input sit outside the heap, so tick cost scales with the number of ready battles.
+    The enemy turns of all battles updated in a tick are decided together in one batch.
+    """
+    def __init__(self, clock=time.time):
+        self.__clock = clock
+        self.__heap: list[tuple[float, int, PokemonBattleManager]] = []
+        self.__entries: dict[PokemonBattleManager, int] = {}  # battle -> sequence number of its live heap entry
+        self.__outbox: dict[PokemonBattleManager, list[Message]] = {}  # messages produced but not collected yet
+        self.__battles: set[PokemonBattleManager] = set()
+        self.__sequence = itertools.count()
+        self.__last_tick: Optional[float] = None
+
+    def add(self, battle: PokemonBattleManager) -> None:
+        """Start scheduling a battle."""
+        self.__battles.add(battle)
+        battle.set_wakeup_callback(self.wake)
+        self._schedule(battle, battle.next_wakeup())
+
+    def remove(self, battle: PokemonBattleManager) -> None:
+        """Stop scheduling a battle and drop any output it still has pending."""
+        self.__battles.discard(battle)
+        self.__entries.pop(battle, None)  # its heap entry becomes stale and is skipped when popped
+        self.__outbox.pop(battle, None)
+        battle.set_wakeup_callback(None)
+
+    def wake(self, battle: PokemonBattleManager) -> None:
+        """Make a battle ready for the next tick (called when a player selects an option)."""
+        if battle in self.__battles:
+            self._schedule(battle, self.__clock())
+
+    def open_battles(self) -> int:
+        return len(self.__battles)
+
+    def ready_battles(self) -> int:
+        return len(self.__entries)
+
+    def _schedule(self, battle: PokemonBattleManager, due: Optional[float]) -> None:
+        """Replace the battle's heap entry with one due at the given time (None means wait for input)."""
+        if due is None:
+            self.__entries.pop(battle, None)
+            return
+        sequence = next(self.__sequence)
+        self.__entries[battle] = sequence
+        heapq.heappush(self.__heap, (due, sequence, battle))
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """
+        Update every battle whose wakeup time has passed, once each.
+        Output is kept until the owning pressure plate collects it.
+        Returns the number of battles updated.
+        """
+        now = self.__clock() if now is None else now
+        self.__last_tick = now
+
+        # Pop everything due first, so a battle that becomes ready again during this tick
+        # waits for the next one, just like it did when every battle was polled once per tick
+        ready = []
+        while self.__heap and self.__heap[0][0] <= now:
+            _, sequence, battle = heapq.heappop(self.__heap)
+            if self.__entries.get(battle) != sequence:
+                continue  # stale entry (rescheduled or removed)
+            del self.__entries[battle]
+            ready.append(battle)
+
+        # Enemy turns that fall in the same tick are decided in one batch per AI
+        for battle, messages in zip(ready, PokemonBattleManager.update_battles(ready)):
+            if messages:
+                self.__outbox.setdefault(battle, []).extend(messages)
+            self._schedule(battle, battle.next_wakeup())
+
+        return len(ready)
+
+    def collect(self, battle: PokemonBattleManager) -> list[Message]:
+        """
+        Called from a pressure plate's update(). Runs a tick if one is due and
+        returns the messages the battle produced since the last collection.
+        """
+        now = self.__clock()
+        if self.__last_tick is None or now - self.__last_tick >= TICK_INTERVAL:
+            self.tick(now)
+        return self.__outbox.pop(battle, [])
+
+
+# Scheduler shared by every battle pressure plate
+BATTLE_SCHEDULER = BattleScheduler()
@@ -0,0 +1,166 @@
+import random
+import time
+from typing import Callable, Optional
+
+from .battle_manager import PokemonBattleManager, TurnStage
+from .bag import Bag
+from .pokemon import Pokemon, PokemonFactory
+from .game_config import GameConfig
+
+# Stages in which the battle waits for the player to pick an option
+AWAIT_STAGES = (TurnStage.AWAIT_INPUT, TurnStage.AWAIT_SWITCH, TurnStage.AWAIT_BAG)
+
+# Upper bound on player decisions so a policy that never finishes a battle cannot hang the simulator
+DEFAULT_MAX_DECISIONS = 1000
+
+
+class VirtualClock:
+    """Clock that only moves when told to, so simulated battles never wait on real time."""
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class SimulatedPlayer:
+    """
+    Minimal in-memory stand-in for a 303MUD player.
+    Provides just enough of the player interface for PokemonBattleManager to run headless.
+    rng is the stream policies draw the player's choices from.
+    """
+    def __init__(self, name: str = "Simulator", enemy_ai: str = "medium", rng=random):
+        self.name = name
+        self.state = {"enemy_ai": enemy_ai}
+        self.rng = rng
+
+    def get_name(self) -> str:
+        return self.name
+
+    def get_state(self, key, default=None):
+        return self.state.get(key, default)
+
+    def set_state(self, key, value) -> None:
+        self.state[key] = value
+
+    def set_current_menu(self, menu) -> None:
+        pass
+
+
+class BattleResult:
+    """Outcome of a single simulated battle."""
+    def __init__(self, winner: Optional[str], turns: int, wall_time: float, player_pokemon: Pokemon, enemy_pokemon: Pokemon,
+                 seed: Optional[int] = None):
+        self.winner = winner                  # "player", "enemy", or None if the player ran away or the decision cap was hit
+        self.turns = turns                    # number of player decisions that used up a turn
+        self.wall_time = wall_time            # real seconds spent running the battle
+        self.player_pokemon = player_pokemon  # player's active Pokemon at the end of the battle
+        self.enemy_pokemon = enemy_pokemon
+        self.seed = seed                      # seed of the battle's random stream, enough to replay it with the same policy
+
+    def __repr__(self) -> str:
+        return f"BattleResult(winner={self.winner!r}, turns={self.turns}, seed={self.seed}, wall_time={self.wall_time:.6f})"
+
+
+# ---- Player policies ----
+# A policy receives the battle and the options currently presented, and returns the option to select.
+
+def _attack_options(options: list[str]) -> list[str]:
+    return [option for option in options if option.split(":")[0].isdigit()]
+
+def player_rng(seed: int) -> random.Random:
+    """
+    Stream of the simulated player's choices in the battle with this seed. It is separate from
+    the battle's own stream, since a replay feeds the choices back without drawing them.
+    """
+    return random.Random(f"player:{seed}")
+
+def random_attack_policy(battle: PokemonBattleManager, options: list[str]) -> str:
+    """Pick one of the available attacks uniformly at random, from the player's own stream."""
+    attacks = _attack_options(options)
+    return battle.get_player().rng.choice(attacks) if attacks else "Return"
+
+def strongest_attack_policy(battle: PokemonBattleManager, options: list[str]) -> str:
+    """Always pick the attack with the highest base damage."""
+    attacks = _attack_options(options)
+    if not attacks:
+        return "Return"
+    known_attacks = battle.get_player_pokemon().known_attacks
+    return max(attacks, key=lambda option: known_attacks[int(option.split(":")[0])]["damage"])
+
+
+def determine_winner(battle: PokemonBattleManager) -> Optional[str]:
+    """Work out who won a finished battle."""
+    enemy = battle.get_enemy_pokemon()
+    if enemy.is_fainted():
+        return "player"
+    for ball in battle.get_bag().pokemon.stored_pokemon:
+        if ball.captured_pokemon is enemy:
+            return "player" # caught
+    if battle.get_player_pokemon().is_fainted():
+        return "enemy"
+    return None # ran away
+
+
+def run_battle(player_pokemon: Pokemon, wild_pokemon_name: str,
+               policy: Callable[[PokemonBattleManager, list[str]], str] = strongest_attack_policy,
+               bag: Bag = None, enemy_ai: str = "medium", max_decisions: int = DEFAULT_MAX_DECISIONS,
+               seed: Optional[int] = None, recorder=None, journal=None,
+               config: Optional[GameConfig] = None) -> BattleResult:
+    """
+    Run a whole battle headlessly in one call.
+    Drives the regular TurnStage machine of PokemonBattleManager, answering every prompt with
+    the given policy and skipping enemy response delays by advancing a virtual clock.
+    The same seed, Pokemon, bag and policy always produce the same battle.
+    """
+    clock = VirtualClock()
+    seed = seed if seed is not None else random.getrandbits(32)
+    player = SimulatedPlayer(enemy_ai=enemy_ai, rng=player_rng(seed))
+    battle = PokemonBattleManager(player, wild_pokemon_name,
+                                  player_pokemon=player_pokemon,
+                                  bag=bag if bag is not None else Bag(),
+                                  clock=clock,
+                                  seed=seed,
+                                  recorder=recorder,
+                                  journal=journal,
+                                  config=config)
+    turns = 0
+    decisions = 0
+    start = time.perf_counter()
+
+    while not battle.is_over():
+        stage = battle.get_turn_stage()
+        if stage in AWAIT_STAGES:
+            if decisions >= max_decisions:
+                break
+            battle.set_selected_option(policy(battle, battle.get_options()))
+            decisions += 1
+        elif stage == TurnStage.ENEMY_WAIT:
+            clock.advance(battle.get_config().enemy_response_time)
+
+        battle.update()
+
+        # A turn is used up once the player's choice hands control to the enemy or ends the battle
+        if stage in AWAIT_STAGES and battle.get_turn_stage() in (TurnStage.ENEMY_WAIT, TurnStage.END):
+            turns += 1
+
+    wall_time = time.perf_counter() - start
+    winner = determine_winner(battle) if battle.is_over() else None
+    return BattleResult(winner, turns, wall_time, battle.get_player_pokemon(), battle.get_enemy_pokemon(),
+                        battle.get_seed())
+
+
+def run_battles(player_pokemon_name: str, wild_pokemon_name: str, count: int, seed: Optional[int] = None,
+                **kwargs) -> list[BattleResult]:
+    """
+    Run `count` independent battles between fresh Pokemon of the given species.
+    With a seed, battle i uses seed + i, so the whole batch is reproducible.
+    """
+    return [
+        run_battle(PokemonFactory.create_pokemon(player_pokemon_name), wild_pokemon_name,
+                   seed=None if seed is None else seed + i, **kwargs)
+        for i in range(count)
+    ]
@@ -0,0 +1,370 @@
+"""
+Benchmarks for the hot paths of battles and player sessions.
+Each benchmark times one operation (an attack, a save, a full battle ...) and the suite writes
+the results as JSON so runs can be compared over time.
+Run with: python -m pengumon.benchmarks --output results.json [--compare previous.json]
+"""
+import argparse
+import contextlib
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Optional
+
+from . import battle_manager, observers
+from .pokedex import pokedex, PokemonType
+from .pokedex_file import write_pokedex_file, load_pokedex_file, unload_pokedex_file, LazyPokedex
+from .pokemon import Pokemon, PokemonFactory
+from .compact_pokemon import CompactPokemon
+from .bag import Bag, PokemonRoster
+from .items import SmallPotion, RevivePotion, PotionFlyweightFactory
+from .pokeball import RegularPokeball
+from .enemyAI import EasyAI, MediumAI, HardAI, ExpertAI, PolicyCache, choose_enemy_action, choose_enemy_actions
+from .battle_simulator import run_battle, SimulatedPlayer
+from .player_session import PlayerSession
+from .record_validation import validate_player_state
+
+DEFAULT_REPEAT = 5
+
+
+# ---- Stand-ins for 303MUD classes ----
+
+class StandInMessage:
+    """Stand-in for the 303MUD messages, so battle timings do not depend on the engine."""
+    def __init__(self, sender=None, recipient=None, *args, **data):
+        self._recipient = recipient
+        self._data = data
+        if args:
+            self._data["args"] = args
+
+    def _get_data(self) -> dict:
+        return self._data
+
+class StandInServerMessage(StandInMessage):
+    def __init__(self, recipient, text):
+        super().__init__(None, recipient, text=text)
+
+class StandInOptionsMessage(StandInMessage):
+    pass
+
+class StandInBattleMessage(StandInMessage):
+    pass
+
+@contextlib.contextmanager
+def stand_in_messages():
+    """Swap the message classes used by battles for the stand-ins."""
+    replaced = [
+        (battle_manager, "ServerMessage", StandInServerMessage),
+        (battle_manager, "OptionsMessage", StandInOptionsMessage),
+        (battle_manager, "PokemonBattleMessage", StandInBattleMessage),
+        (observers, "ServerMessage", StandInServerMessage),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in replaced]
+    try:
+        for module, name, stand_in in replaced:
+            setattr(module, name, stand_in)
+        yield
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
+
+
+# ---- Setups ----
+# Every benchmark is a setup function returning the operation to time.
+
+BENCHMARKS: dict[str, Callable[[], Callable[[], object]]] = {}
+
+def benchmark(name: str):
+    """Register a benchmark setup under a name."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def full_bag() -> Bag:
+    """Bag with every potion and ball kind and a full roster."""
+    bag = Bag()
+    bag.potions.from_dict({key: 3 for key in bag.potions.to_dict()})
+    bag.pokeballs.from_dict({key: 2 for key in bag.pokeballs.to_dict()})
+    species = list(pokedex)
+    for i in range(PokemonRoster.MAX_CAPACITY):
+        ball = RegularPokeball()
+        ball.add(PokemonFactory.create_pokemon(species[i % len(species)]))
+        bag.pokemon.add(ball)
+    return bag
+
+@benchmark("pokemon_attack")
+def _pokemon_attack():
+    attacker = PokemonFactory.create_pokemon("Ivysaur")
+    defender = PokemonFactory.create_pokemon("Squirtle")
+    defender.current_health = sys.maxsize  # never faints, so no XP or evolution is involved
+    return lambda: attacker.attack(1, defender)
+
+@benchmark("pokemon_to_list")
+def _pokemon_to_list():
+    pokemon = PokemonFactory.create_pokemon("Charizard")
+    return pokemon.to_list
+
+@benchmark("pokemon_from_list")
+def _pokemon_from_list():
+    data = PokemonFactory.create_pokemon("Charizard").to_list()
+    return lambda: Pokemon.from_list(data)
+
+@benchmark("bag_to_dict_full_roster")
+def _bag_to_dict():
+    bag = full_bag()
+    return bag.to_dict
+
+@benchmark("bag_from_dict_full_roster")
+def _bag_from_dict():
+    data = full_bag().to_dict()
+    return lambda: Bag.from_dict(data)
+
+@benchmark("validate_player_state_full_bag")
+def _validate_state():
+    state = {"active_pokemon": PokemonFactory.create_pokemon("Charizard").to_list(), "bag": full_bag().to_dict()}
+    return lambda: validate_player_state(state)
+
+def _ai_benchmark(ai_class):
+    def setup():
+        ai, rng = ai_class(), random.Random(0)
+        enemy, player = PokemonFactory.create_pokemon("Venusaur"), PokemonFactory.create_pokemon("Blastoise")
+        return lambda: ai.choose_action(enemy, player, rng)
+    return setup
+
+benchmark("easy_ai_choose_action")(_ai_benchmark(EasyAI))
+benchmark("medium_ai_choose_action")(_ai_benchmark(MediumAI))
+benchmark("hard_ai_choose_action")(_ai_benchmark(HardAI))
+benchmark("expert_ai_choose_action")(_ai_benchmark(ExpertAI))
+
+def _cached_ai_benchmark(ai_class, difficulty):
+    def setup():
+        ai, rng, cache = ai_class(), random.Random(0), PolicyCache()
+        enemy, player = PokemonFactory.create_pokemon("Venusaur"), PokemonFactory.create_pokemon("Blastoise")
+        return lambda: cache.choose_action(ai, difficulty, enemy, player, rng)
+    return setup
+
+benchmark("expert_ai_cached_choose_action")(_cached_ai_benchmark(ExpertAI, "expert"))
+
+# Battles whose enemy turns fall in the same scheduler tick
+ENEMY_TURNS_PER_TICK = 1000
+
+def _enemy_turns_benchmark(batched: bool):
+    def setup():
+        levels = [("easy", EasyAI()), ("medium", MediumAI()), ("hard", HardAI())]
+        species = ["Charmander", "Venusaur", "Blastoise", "Charizard"]
+        battles = [(*levels[i % 3], PokemonFactory.create_pokemon(species[i % 4]),
+                    PokemonFactory.create_pokemon("Squirtle"), random.Random(i)) for i in range(ENEMY_TURNS_PER_TICK)]
+        if batched: # one batch per AI, as PokemonBattleManager.update_battles groups them
+            groups = []
+            for difficulty, ai in levels:
+                enemies, players, rngs = (list(column) for column in zip(*[b[2:] for b in battles if b[1] is ai]))
+                groups.append((ai, difficulty, enemies, players, rngs, [False] * len(rngs)))
+            return lambda: [choose_enemy_actions(*group) for group in groups]
+        return lambda: [choose_enemy_action(ai, difficulty, enemy, player, rng)
+                        for difficulty, ai, enemy, player, rng in battles]
+    return setup
+
+benchmark("enemy_turns_one_by_one_1000")(_enemy_turns_benchmark(False))
+benchmark("enemy_turns_batched_1000")(_enemy_turns_benchmark(True))
+
+@benchmark("potion_flyweight_get_potion")
+def _get_potion():
+    kinds = ["small potion", "medium potion", "large potion",
+             "revive small potion", "revive medium potion", "revive large potion"]
+    def get_all():
+        for kind in kinds:
+            PotionFlyweightFactory.get_potion(kind)
+    return get_all
+
+@benchmark("session_loot_pickup")
+def _loot_pickup():
+    """A loot plate adding one potion to a full saved bag that isn't loaded."""
+    player = SimulatedPlayer()
+    player.set_state("bag", full_bag().to_dict())
+    session = PlayerSession(player)
+    return lambda: session.add_item("potions", SmallPotion())
+
+@benchmark("battle_update_cycle")
+def _battle_cycle():
+    """One whole battle, from INTRO to CLEANUP, driven through update() on a virtual clock."""
+    seeds = iter(range(sys.maxsize))
+    def battle():
+        bag = Bag()
+        bag.potions.add(SmallPotion())
+        bag.potions.add(RevivePotion(SmallPotion()))
+        run_battle(PokemonFactory.create_pokemon("Wartortle"), "Charmeleon", bag=bag,
+                   enemy_ai="hard", seed=next(seeds))
+    return battle
+
+
+# ---- Runner ----
+
+def time_operation(operation: Callable[[], object], repeat: int = DEFAULT_REPEAT) -> dict:
+    """Time an operation with timeit, returning nanoseconds per call."""
+    timer = timeit.Timer(operation)
+    number, _ = timer.autorange()
+    samples = [elapsed / number * 1e9 for elapsed in timer.repeat(repeat, number)]
+    return {
+        "calls_per_sample": number,
+        "ns_per_call_min": min(samples),
+        "ns_per_call_median": statistics.median(samples),
+    }
+
+
+def measure_allocation(build, count: int) -> int:
+    """Return the bytes still allocated after building `count` objects with build(i)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return after - before
+
+
+def benchmark_pokemon_memory(count: int = 10_000) -> dict:
+    """Compare the memory used by `count` Pokemon against the same number of CompactPokemon."""
+    species = list(pokedex)
+    regular = measure_allocation(lambda i: Pokemon(species[i % len(species)]), count)
+    compact = measure_allocation(lambda i: CompactPokemon(species[i % len(species)]), count)
+    return {
+        "count": count,
+        "pokemon_bytes": regular,
+        "compact_bytes": compact,
+        "pokemon_bytes_each": regular / count,
+        "compact_bytes_each": compact / count,
+        "ratio": regular / compact,
+    }
+
+
+def generate_species(count: int) -> tuple[list[dict], dict[str, str]]:
+    """Make `count` pokedex entries in three-stage evolution lines, with their evolution links."""
+    moves = ["Tackle", "Bite", "Ember", "Water Gun", "Vine Whip", "Slash", "Hydro Pump", "Solar Beam"]
+    types = list(PokemonType)
+    entries, evolutions = [], {}
+    for i in range(count):
+        name = f"Species{i:06d}"
+        stage = i % 3
+        entries.append({
+            "name": name, "type": types[(i // 3) % len(types)], "max_health": 50 + 50 * stage, "level": 1, "xp": 0,
+            "attacks": [{"name": moves[(i + m) % len(moves)], "damage": 10 + 5 * m + 10 * stage} for m in range(2 + stage)],
+        })
+        if stage < 2 and i + 1 < count:
+            evolutions[name] = f"Species{i + 1:06d}"
+    return entries, evolutions
+
+
+def benchmark_pokedex_file(count: int = 10_000, lookups: int = 2000) -> dict:
+    """
+    Time a generated pokedex data file of `count` species: parsing it all up front against
+    opening it through its index, and creating a Pokemon of a species not used before
+    (parsed from the file) against one already cached.
+    """
+    entries, evolutions = generate_species(count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/species.jsonl"
+        write_pokedex_file(path, entries, evolutions)
+
+        start = time.perf_counter()
+        with open(path, encoding="utf-8") as file:
+            {data["name"]: data for data in map(json.loads, file)}
+        eager_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        LazyPokedex(path).close()
+        lazy_open = time.perf_counter() - start
+
+        load_pokedex_file(path)
+        try:
+            names = [entry["name"] for entry in entries]
+            random.Random(0).shuffle(names)
+            names = names[:lookups]
+            start = time.perf_counter()
+            for name in names:
+                Pokemon(name)
+            cold = (time.perf_counter() - start) / len(names)
+            cached = timeit.Timer(lambda: Pokemon(names[0])).autorange()
+            warm = cached[1] / cached[0]
+        finally:
+            unload_pokedex_file()
+    return {
+        "species": count,
+        "eager_load_ms": eager_load * 1e3,
+        "lazy_open_ms": lazy_open * 1e3,
+        "create_uncached_us": cold * 1e6,
+        "create_cached_us": warm * 1e6,
+    }
+
+
+def run_benchmarks(names: Optional[list[str]] = None, repeat: int = DEFAULT_REPEAT, memory_count: int = 10_000,
+                   species_count: int = 10_000) -> dict:
+    """Run the selected benchmarks (all by default) and return the results as a JSON-ready dict."""
+    results = {}
+    with stand_in_messages():
+        for name in names or BENCHMARKS:
+            results[name] = time_operation(BENCHMARKS[name](), repeat)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "benchmarks": results,
+        "memory": benchmark_pokemon_memory(memory_count),
+        "pokedex_file": benchmark_pokedex_file(species_count),
+    }
+
+
+def compare(current: dict, previous: dict) -> dict[str, float]:
+    """Return the median time ratio current/previous for benchmarks present in both runs."""
+    return {
+        name: result["ns_per_call_median"] / previous["benchmarks"][name]["ns_per_call_median"]
+        for name, result in current["benchmarks"].items() if name in previous["benchmarks"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pengumon benchmarks.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="samples per benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.names or None, args.repeat)
+    ratios = {}
+    if args.compare:
+        with open(args.compare) as file:
+            ratios = compare(results, json.load(file))
+
+    for name, result in results["benchmarks"].items():
+        line = f"{name:<30} {result['ns_per_call_median']:>14,.0f} ns"
+        if name in ratios:
+            line += f"  x{ratios[name]:.2f}"
+        print(line)
+    memory = results["memory"]
+    print(f"{'pokemon_memory':<30} {memory['pokemon_bytes_each']:>9.1f} B vs compact {memory['compact_bytes_each']:.1f} B")
+    species = results["pokedex_file"]
+    print(f"{'pokedex_file_open':<30} {species['lazy_open_ms']:>11.1f} ms vs parsing all {species['eager_load_ms']:.1f} ms"
+          f" ({species['species']} species)")
+    print(f"{'pokedex_file_create_pokemon':<30} {species['create_uncached_us']:>11.1f} us uncached,"
+          f" {species['create_cached_us']:.1f} us cached")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
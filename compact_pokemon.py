@@ -0,0 +1,231 @@
+"""
+Memory-light Pokemon representation.
+Everything that is the same for every Pokemon of a species (name, type, moves, evolution
+links and evolution state) lives in one immutable SpeciesTemplate, a view of the species'
+record in species_registry. A CompactPokemon only stores the fields that change during play
+and points at its template.
+"""
+from typing import Optional
+from .pokedex import pokedex
+from .species_registry import SPECIES_REGISTRY, SpeciesRecord, BASE_STAGE, SECOND_STAGE, FINAL_STAGE
+from .game_config import CONFIG, GameConfig
+from .pokemon import (Pokemon, BaseEvolutionState, SecondEvolutionState,
+                      FinalEvolutionState, EvolutionState)
+from .observers import HealthObserver
+
+# Evolution states hold no per-Pokemon data, so one instance of each is shared by every template
+BASE_EVOLUTION = BaseEvolutionState()
+SECOND_EVOLUTION = SecondEvolutionState()
+FINAL_EVOLUTION = FinalEvolutionState()
+EVOLUTION_STATES = {state.__class__.__name__: state for state in (BASE_EVOLUTION, SECOND_EVOLUTION, FINAL_EVOLUTION)}
+STAGE_EVOLUTIONS = {BASE_STAGE: BASE_EVOLUTION, SECOND_STAGE: SECOND_EVOLUTION, FINAL_STAGE: FINAL_EVOLUTION}
+
+
+class SpeciesTemplate:
+    """Immutable data shared by every Pokemon of one species, taken from its SpeciesRecord."""
+    __slots__ = ("name", "p_type", "max_health", "level", "xp", "attack_names", "attack_damage",
+                 "evolution_state", "next_evolution", "no_bonus")
+
+    def __init__(self, record: SpeciesRecord):
+        values = {
+            "name": record.name,
+            "p_type": record.p_type,
+            "max_health": record.max_health,
+            "level": record.level,
+            "xp": record.xp,
+            "attack_names": SPECIES_REGISTRY.move_names(record),
+            "attack_damage": record.move_damage,
+            "evolution_state": STAGE_EVOLUTIONS[record.stage],
+            "next_evolution": SPECIES_REGISTRY.next_evolution(record.name),
+            "no_bonus": (0,) * len(record.move_damage),  # shared by every Pokemon that has not levelled up
+        }
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"SpeciesTemplate {self.name} is read-only")
+
+    def __repr__(self):
+        return f"SpeciesTemplate({self.name})"
+
+
+class SpeciesTemplates(dict):
+    """Templates by species name, built from SPECIES_REGISTRY the first time a species is used."""
+    def __missing__(self, name: str) -> SpeciesTemplate:
+        record = SPECIES_REGISTRY.get(name)
+        if record is None:
+            raise KeyError(name)
+        template = self[name] = SpeciesTemplate(record)
+        return template
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+SPECIES = SpeciesTemplates()
+pokedex.add_listener(SPECIES.clear) # dropped together with the registry's records when the pokedex switches
+
+
+class CompactPokemon:
+    """
+    Slot-based Pokemon with the same battle behaviour and saved format as Pokemon.
+    Per-instance data is limited to health, level, xp, a per-move damage bonus and the evolution
+    state, which is the species' shared one unless a saved Pokemon says otherwise.
+    """
+    __slots__ = ("species", "max_health", "current_health", "level", "xp", "damage_bonus", "evolution_state",
+                 "_observers")
+
+    def __init__(self, name: str):
+        species = SPECIES.get(name)
+        if species is None:
+            raise ValueError(f"{name} not found in the Pokedex.")
+        self.species = species
+        self.max_health = species.max_health
+        self.current_health = species.max_health
+        self.level = species.level
+        self.xp = species.xp
+        self.damage_bonus = species.no_bonus
+        self.evolution_state = species.evolution_state
+        self._observers: Optional[list[HealthObserver]] = None  # created on first add_observer
+
+    @property
+    def name(self) -> str:
+        return self.species.name
+
+    @property
+    def p_type(self):
+        return self.species.p_type
+
+    @property
+    def known_attacks(self) -> list[dict]:
+        """Moves in the same format as Pokemon.known_attacks. Built on each call, so edits are not kept."""
+        return [{"name": name, "damage": damage + bonus} for name, damage, bonus
+                in zip(self.species.attack_names, self.species.attack_damage, self.damage_bonus)]
+
+    def get_move_damages(self) -> tuple[int, ...]:
+        return tuple(damage + bonus for damage, bonus in zip(self.species.attack_damage, self.damage_bonus))
+
+    def get_attack_damage(self, attack_index: int) -> int:
+        return self.species.attack_damage[attack_index] + self.damage_bonus[attack_index]
+
+    def __reduce__(self):
+        """Pickle through the saved list format, which also drops observers."""
+        return CompactPokemon.from_list, (self.to_list(),)
+
+    def add_observer(self, observer: HealthObserver):
+        """Register a new observer that will be notified on health changes."""
+        if self._observers is None:
+            self._observers = []
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: HealthObserver):
+        """Unregister an observer so it no longer receives health changes."""
+        if self._observers and observer in self._observers:
+            self._observers.remove(observer)
+
+    def notify_observers(self, old_hp: int, new_hp: int):
+        """Notify all registered observers of a health change."""
+        for observer in self._observers or ():
+            observer.on_health_changed(self, old_hp, new_hp)
+
+    def is_fainted(self):
+        """Check if the Pokémon has fainted (0 or less HP)."""
+        return self.current_health <= 0
+
+    def take_damage(self, damage):
+        """Apply damage to the Pokémon and notify observers."""
+        old_hp = self.current_health
+        self.current_health = max(0, self.current_health - damage)
+        self.notify_observers(old_hp, self.current_health)
+
+    def attack(self, attack_index, target, config: Optional[GameConfig] = None):
+        """Attack another Pokémon using a selected move and calculate results."""
+        if self.is_fainted():
+            return {"success": False, "message": f"{self.name} is fainted and cannot attack!"}
+
+        base_damage = self.get_attack_damage(attack_index)
+        multiplier = self.evolution_state.get_type_multiplier(self.p_type, target.p_type, config)
+        final_damage = int(base_damage * multiplier)
+
+        target.take_damage(final_damage)
+
+        result = {
+            "success": True,
+            "message": f"{self.name} used {self.species.attack_names[attack_index]} on {target.name}!",
+            "damage": final_damage,
+            "target_fainted": target.is_fainted(),
+            "evolved": None
+        }
+
+        if target.is_fainted():
+            self.xp += 10 * target.evolution_state.get_evo_level()
+            evolved_pokemon = self.level_up_check(config)
+            if evolved_pokemon:
+                result["evolved"] = evolved_pokemon
+
+        return result
+
+    def level_up_check(self, config: Optional[GameConfig] = None):
+        """Check if the Pokémon should level up and evolve."""
+        state = self.evolution_state
+        if state is FINAL_EVOLUTION:
+            return None
+
+        config = config or CONFIG.snapshot
+        if self.xp >= state.get_xp_threshold(config):
+            self.xp = 0
+            self.level += 1
+            self.max_health += state.hp_increase(config)
+            self.current_health = self.max_health
+            attack_increase = state.attack_increase(config)
+            self.damage_bonus = tuple(bonus + attack_increase for bonus in self.damage_bonus)
+
+            if self.level == config.evolution_level_threshold and self.species.next_evolution:
+                return self.evolve(self.species.next_evolution)
+
+        return None
+
+    def evolve(self, evolution_name: str) -> 'CompactPokemon':
+        """Evolve into a fresh Pokémon of the next species."""
+        return CompactPokemon(evolution_name)
+
+    def to_list(self) -> list:
+        """Serialize in the same format as Pokemon.to_list."""
+        return [
+            self.name,
+            self.max_health,
+            self.current_health,
+            self.p_type.name,
+            self.level,
+            self.xp,
+            self.known_attacks,
+            self.evolution_state.__class__.__name__
+        ]
+
+    @staticmethod
+    def from_list(data: list) -> 'CompactPokemon':
+        """Deserialize a Pokémon saved by Pokemon.to_list or CompactPokemon.to_list."""
+        name, max_health, current_health, p_type, level, xp, known_attacks, evo_class = data
+        poke = CompactPokemon(name)
+        if len(known_attacks) != len(poke.species.attack_damage):
+            raise ValueError(f"{name} has {len(poke.species.attack_damage)} moves, got {len(known_attacks)}")
+        poke.max_health = max_health
+        poke.current_health = current_health
+        poke.level = level
+        poke.xp = xp
+        # Like Pokemon.from_list: the saved state, or the species' own if the name is unknown
+        poke.evolution_state = EVOLUTION_STATES.get(evo_class, poke.species.evolution_state)
+        bonus = tuple(attack["damage"] - base for attack, base in zip(known_attacks, poke.species.attack_damage))
+        if any(bonus):
+            poke.damage_bonus = bonus
+        return poke
+
+    @staticmethod
+    def from_pokemon(pokemon: Pokemon) -> 'CompactPokemon':
+        """Convert a regular Pokemon."""
+        return CompactPokemon.from_list([
+            pokemon.name, pokemon.max_health, pokemon.current_health, pokemon.p_type.name,
+            pokemon.level, pokemon.xp, pokemon.known_attacks, pokemon.evolution_state.__class__.__name__
+        ])
@@ -12,6 +12,7 @@ from .bag import Bag
 from .items import *
 from .pokeball import *
 from .pokemon import PokemonFactory
+from .player_session import SESSIONS
 
 class ProfessorOak(NPC, SelectionInterface):
     """Custom Professor Oak NPC to provide the starter Pokemons"""
@@ -42,7 +43,9 @@ class ProfessorOak(NPC, SelectionInterface):
             bag.pokeballs.add(RegularPokeball())
         
             # Attach the new bag to player
-            player.set_state("bag", bag.to_dict())
+            session = SESSIONS.get(player)
+            session.set_bag(bag)
+            session.flush()
             player.set_state("starter_items_given", True)
 
     def player_interacted(self, player: HumanPlayer) -> list[Message]:
@@ -74,7 +77,9 @@ class ProfessorOak(NPC, SelectionInterface):
     def select_option(self, player: HumanPlayer, choice: str) -> list[Message]:
         pokemon = PokemonFactory.create_pokemon(choice)
         player.set_state("starter_pokemon", pokemon.name)
-        player.set_state("active_pokemon", pokemon.to_list())
+        session = SESSIONS.get(player)
+        session.set_active_pokemon(pokemon)
+        session.flush()
 
         # Give starter items after selection
         self.give_starter_items(player)
@@ -108,23 +113,22 @@ class Nurse(NPC):
         messages.append(ServerMessage(player, self._NPC__encounter_text))
 
         # --- Load and heal active Pokémon ---
-        active_data = player.get_state("active_pokemon", None)
-        if active_data is None:
+        session = SESSIONS.get(player)
+        active_pokemon = session.get_active_pokemon()
+        if active_pokemon is None:
             messages.append(ServerMessage(player, "You don’t have a Pokémon to heal."))
             return messages
 
-        active_pokemon = Pokemon.from_list(active_data)
-
         if active_pokemon.current_health < active_pokemon.max_health:
             active_pokemon.current_health = active_pokemon.max_health
+            session.mark_dirty(session.ACTIVE_POKEMON)
             messages.append(ServerMessage(player, f"{active_pokemon.name} was fully healed!"))
         else:
             messages.append(ServerMessage(player, f"{active_pokemon.name} is already at full health."))
 
         # --- Load and heal Pokémon in the bag ---
-        bag_data = player.get_state("bag", None)
-        if bag_data:
-            bag = Bag.from_dict(bag_data)
+        bag = session.get_bag()
+        if bag:
             healed_any = False
 
             for pokeball in bag.pokemon.stored_pokemon:
@@ -137,10 +141,10 @@ class Nurse(NPC):
 
             if not healed_any:
                 messages.append(ServerMessage(player, "All Pokémon in your bag are already at full health."))
+            else:
+                bag.pokemon.mark_dirty() # only the roster is written back
 
-            player.set_state("bag", bag.to_dict())
-
-        # Save updated active Pokémon
-        player.set_state("active_pokemon", active_pokemon.to_list())
+        # Save healed Pokémon (only written if something changed)
+        session.flush()
 
         return messages
\ No newline at end of file
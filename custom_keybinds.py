@@ -11,6 +11,7 @@ from .custom_NPCs import Nurse
 from .pokemon import Pokemon
 import random
 from .bag import Bag
+from .player_session import SESSIONS
 from .items import *
 from .pokeball import *
 from .pokedex import *
@@ -26,12 +27,10 @@ def get_keybinds(map_instance) -> dict[str, Callable[["HumanPlayer"], list[Messa
 
     def view_active_pokemon(player: HumanPlayer) -> list[Message]:
         """Display detailed stats and attacks of the active Pokémon."""
-        data = player.get_state("active_pokemon", None)
-        if not data:
+        active_pokemon = SESSIONS.get(player).get_active_pokemon()
+        if not active_pokemon:
             return [ServerMessage(player, "No active Pokémon found.")]
 
-        active_pokemon = Pokemon.from_list(data)
-
         name = active_pokemon.name
         level = active_pokemon.level
         current_hp = active_pokemon.current_health
@@ -99,12 +98,12 @@ def get_keybinds(map_instance) -> dict[str, Callable[["HumanPlayer"], list[Messa
 
     def switch_active_pokemon(player: HumanPlayer) -> list[Message]:
         """Let the player select a healthy Pokémon to set as the active one."""
-        bag_data = player.get_state("bag", None)
-        if not bag_data:
+        session = SESSIONS.get(player)
+        bag_view = session.get_bag_view() # listing only needs names and HP
+        if not bag_view:
             return [ServerMessage(player, "You don't have a bag yet! Please visit Professor Oak.")]
 
-        bag = Bag.from_dict(bag_data)
-        available = bag.pokemon.get_available_pokemon()
+        available = bag_view.pokemon.get_available_pokemon()
         if not available:
             return [ServerMessage(player, "You don't have any healthy Pokémon to switch to!")]
 
@@ -130,12 +129,11 @@ def get_keybinds(map_instance) -> dict[str, Callable[["HumanPlayer"], list[Messa
                     ]
                 index = options_map.get(selected_option)
                 if index is not None:
-                    active_data = player.get_state("active_pokemon", None)
-                    old_active = Pokemon.from_list(active_data)
-                    new_active = bag.pokemon.switch_pokemon(old_active, index)
+                    old_active = session.get_active_pokemon()
+                    new_active = session.get_bag().pokemon.switch_pokemon(old_active, index)
                     if new_active:
-                        player.set_state("active_pokemon", new_active.to_list())
-                        player.set_state("bag", bag.to_dict())
+                        session.set_active_pokemon(new_active) # the roster marked itself as changed
+                        session.flush()
                         player.set_current_menu(None)
                         return [
                             ServerMessage(player, f"{new_active.name} is now your active Pokémon!"),
@@ -152,12 +150,11 @@ def get_keybinds(map_instance) -> dict[str, Callable[["HumanPlayer"], list[Messa
         ]
         
     def show_bag_contents(player: HumanPlayer) -> list[Message]:
-        bag_data = player.get_state("bag", {})
-        bag = Bag.from_dict(bag_data)
+        bag = SESSIONS.get(player).get_bag_view() or Bag()
 
         # Get potion and pokeball counts
-        potion_counts = bag.potions._get_counts()
-        pokeball_counts = bag.pokeballs._get_counts()
+        potion_counts = bag.potions.to_dict()
+        pokeball_counts = bag.pokeballs.to_dict()
 
         lines = ["Potion Compartment:"]
         for key, count in potion_counts.items():
@@ -10,8 +10,11 @@ if TYPE_CHECKING:
 import time    
 from .pokemon import *
 from .battle_manager import PokemonBattleManager, TurnStage
+from .battle_scheduler import BATTLE_SCHEDULER
+from .player_session import SESSIONS
+from .battle_replay import open_recorder
+from .battle_journal import open_journal
 from .enemyAI import *
-from .bag import Bag
 from .items import *
 from .pokeball import *
 from .pokemon import PokemonFactory
@@ -24,6 +27,7 @@ class PokemonBattlePressurePlate(PressurePlate, SelectionInterface):
         self.__wild_pokemon_name = wild_pokemon_name
         self.__player = None
         self.__battle = None
+        self.__journal = None
 
     def select_option(self, player, selected_option: str) -> list[Message]:
         if self.__battle:
@@ -36,21 +40,26 @@ class PokemonBattlePressurePlate(PressurePlate, SelectionInterface):
 
     def player_entered(self, player) -> list[Message]:
         # This is a safeguard - only allow battle if player has chosen starter pokemon
-        poke_data = player.get_state("active_pokemon", None)
+        session = SESSIONS.get(player)
+        active_pokemon = session.get_active_pokemon()
         
         # Check if the player has a active Pokémon
-        if poke_data is None:
+        if active_pokemon is None:
             return [ServerMessage(player, "You don't have a Pokémon! Visit Professor Oak to choose your starter.")]
 
         # This is a safeguard - only allow battle if active pokemon is not fainted
-        active_pokemon = Pokemon.from_list(poke_data)
-
-        # Check if the active pokemon is fainted
         if active_pokemon.is_fainted():
             return [ServerMessage(player, "Your active Pokémon is fainted! Fainted Pokémon cannot battle.")]
 
         self.__player = player
-        self.__battle = PokemonBattleManager(player, self.__wild_pokemon_name)
+        bag = session.get_bag()
+        self.__journal = open_journal(player, active_pokemon, bag) # None unless the battle journal is enabled
+        # The battle works directly on the player's live session objects
+        self.__battle = PokemonBattleManager(player, self.__wild_pokemon_name,
+                                             player_pokemon=active_pokemon, bag=bag,
+                                             recorder=open_recorder(), # None unless the replay log is enabled
+                                             journal=self.__journal)
+        BATTLE_SCHEDULER.add(self.__battle) # battle is only updated when it has work to do
         player.set_current_menu(self)
         
         return []
@@ -59,13 +68,17 @@ class PokemonBattlePressurePlate(PressurePlate, SelectionInterface):
         if not self.__battle:
             return []
 
-        messages = self.__battle.update()
+        messages = BATTLE_SCHEDULER.collect(self.__battle)
 
         if self.__battle.is_over():
-            updated_pokemon = self.__battle.get_player_pokemon() # active pokemon at end of battle
-            updated_bag = self.__battle.get_bag() # bag at end of battle
-            self.__player.set_state("active_pokemon", updated_pokemon.to_list())
-            self.__player.set_state("bag", updated_bag.to_dict())
+            BATTLE_SCHEDULER.remove(self.__battle)
+            session = SESSIONS.get(self.__player)
+            session.set_active_pokemon(self.__battle.get_player_pokemon()) # active pokemon at end of battle
+            session.set_bag(self.__battle.get_bag()) # bag at end of battle
+            session.flush()
+            if self.__journal:
+                self.__journal.commit() # battle is saved, so the journal no longer needs to replay it
+                self.__journal = None
             self.__player.set_current_menu(None) # clear menu
             self.__battle = None
 
@@ -80,23 +93,19 @@ class ChooseDifficultyPlate(PressurePlate, SelectionInterface):
     def player_entered(self, player) -> list[Message]:
         # Get string from state
         current_ai_level = player.get_state("enemy_ai", None)
-        current_difficulty = current_ai_level.capitalize() if current_ai_level else "None"
+        current_difficulty = AI_REGISTRY.label(current_ai_level) if current_ai_level in AI_REGISTRY else "None"
 
         # Set this plate as active menu
         player.set_current_menu(self)
 
         return [
             ServerMessage(player, f"Current difficulty: {current_difficulty}\nChoose a new difficulty."),
-            OptionsMessage(self, player, ["Easy", "Medium", "Hard"])
+            OptionsMessage(self, player, [AI_REGISTRY.label(name) for name in AI_REGISTRY.names()])
         ]
 
     def select_option(self, player, selected_option: str) -> list[Message]:
-        # Map strings to lowercase keys for storage
-        difficulty_map = {
-            "Easy": "easy",
-            "Medium": "medium",
-            "Hard": "hard",
-        }
+        # Map the labels shown back to the registered names for storage
+        difficulty_map = {AI_REGISTRY.label(name): name for name in AI_REGISTRY.names()}
 
         difficulty_key = difficulty_map.get(selected_option)
         if difficulty_key:
@@ -145,11 +154,7 @@ class PotionPressurePlate(PressurePlate):
         super().__init__(image_name=image_name, stepping_text=stepping_text)
 
     def player_entered(self, player) -> list:
-        # Load and update bag
-        bag_data = player.get_state("bag")
-        bag = Bag.from_dict(bag_data)
-        bag.potions.add(self.potion)
-        player.set_state("bag", bag.to_dict())
+        SESSIONS.get(player).add_item("potions", self.potion)
 
         # Remove this pressure plate from the map
         if self.__pos is not None:
@@ -181,11 +186,7 @@ class PokeballPressurePlate(PressurePlate):
     def player_entered(self, player) -> list:
         pokeball = self.pokeball_class()
 
-        # Load and update the player's bag
-        bag_data = player.get_state("bag")
-        bag = Bag.from_dict(bag_data)
-        bag.pokeballs.add(pokeball)
-        player.set_state("bag", bag.to_dict())
+        SESSIONS.get(player).add_item("pokeballs", pokeball)
 
         # Remove this pressure plate from the map
         if self.__pos is not None:
@@ -207,6 +208,7 @@ class ResetPlate(PressurePlate):
         player.set_state("enemy_ai", None)
         player.set_state("bag", None)
         player.set_state("starter_items_given", None)
+        SESSIONS.invalidate(player) # live objects no longer match the cleared state
 
         return [ServerMessage(player, "All your progress has been reset. You may start fresh!")]
     
@@ -1,77 +1,638 @@
 from abc import ABC, abstractmethod
 from .pokemon import *
+import json
 import random
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import lru_cache
+from importlib import import_module
+from itertools import accumulate
+from typing import Iterable, Optional
+from .pokemon import TypeAdvantageCalculator, PokemonFactory
+from .pokedex import pokedex
+from .game_config import CONFIG, GameConfig
+
+# Bumped whenever the AIs pick different actions, or draw from a battle's rng differently, for the
+# same position and seed: battle replays recorded under other rules can't be replayed.
+# 2: Medium draws its attack from its move table, Hard makes one draw for its low-HP dodge
+AI_RULES_VERSION = 2
 
 class EnemyAI:
     """Base enemy AI class"""
-    def choose_action(self, enemy_pokemon, player_pokemon) -> str:
+    def choose_action(self, enemy_pokemon, player_pokemon, rng=random) -> str:
         raise NotImplementedError("This should be implemented by subclasses.")
     
 class EnemyAI(ABC):
     """Abstract class for enemy AI"""
+    # Whether decisions go through the policy cache when it is enabled. Only worth it for AIs
+    # whose decisions cost more than a cache lookup; the table AIs decide faster on their own.
+    POLICY_CACHEABLE = False
+    # The config snapshot the AI plays by, None for the current one
+    config: Optional[GameConfig] = None
 
     @abstractmethod
-    def choose_action(self, enemy_pokemon, player_pokemon) -> str:
-        """Decides action: return an attack index as string or 'dodge'."""
+    def choose_action(self, enemy_pokemon, player_pokemon, rng=random) -> str:
+        """
+        Decides action: return an attack index as string or 'dodge'.
+        Random choices come from rng (a battle's random.Random, or the random module).
+        """
         pass
 
+    def decide(self, enemy_pokemon, player_pokemon, rng=random, player_dodging: bool = False) -> str:
+        """
+        The action for a battle's enemy turn. player_dodging says whether the player dodged this
+        round; only AIs that search ahead use it, the others decide with choose_action.
+        """
+        return self.choose_action(enemy_pokemon, player_pokemon, rng)
 
-class EasyAI(EnemyAI):
-    """AI that favors weaker attacks and dodges occasionally."""
-    def choose_action(self, enemy_pokemon, player_pokemon) -> str:
-        """20% chance to dodge, otherwise use weaker attacks more often."""
-        if random.random() < 0.2:
-            return "Dodge"
+    def action_distribution(self, enemy_pokemon, player_pokemon, player_dodging: bool = False) -> list[tuple[str, float]]:
+        """
+        Return the (action, probability) pairs decide samples from in this position,
+        which is what a PolicyCache stores.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no tabulated policy")
+
+    def choose_actions(self, enemies: list, players: list, rngs: list, players_dodging: list[bool]) -> list[str]:
+        """
+        The actions of many battles this AI plays at once, the i-th battle deciding with rngs[i].
+        Each action and each rng's stream end up the same as from decide one battle at a time.
+        """
+        return [self.decide(enemy, player, rng, dodging)
+                for enemy, player, rng, dodging in zip(enemies, players, rngs, players_dodging)]
+
+
+# ---- Move tables ----
+
+# How an AI weights the enemy's attacks
+FAVOR_WEAKER = "weaker"
+FAVOR_STRONGER = "stronger"
+FAVOR_NONE = "none"
+
+# Move sets whose tables are kept (a move set is a species' damages at one level)
+MOVE_TABLE_CACHE_SIZE = 2048
 
-        attack_indices = []
-        weights = []
 
-        for i, attack in enumerate(enemy_pokemon.known_attacks):
-            attack_indices.append(i)
-            weights.append(1 / attack['damage'])  # favor weaker attacks
+def move_damages(pokemon) -> tuple[int, ...]:
+    """Damage of each known attack, cached by Pokemon until a level-up changes it."""
+    get_move_damages = getattr(pokemon, "get_move_damages", None)
+    if get_move_damages is not None:
+        return get_move_damages()
+    return tuple(attack['damage'] for attack in pokemon.known_attacks)
 
+
+class MoveTable:
+    """
+    Precomputed attack choice for one move set.
+    sample() draws the same single rng.random() and picks the same attack as random.choices
+    over the normalized weights would, so seeded battles and replays play out as before.
+    """
+    __slots__ = ("actions", "probabilities", "cumulative", "total")
+
+    def __init__(self, weights: list[float]):
         total_weight = sum(weights)
-        probabilities = []
-        for w in weights:
-            probabilities.append(w / total_weight)
+        self.actions = tuple(str(i) for i in range(len(weights)))
+        self.probabilities = tuple(w / total_weight for w in weights)
+        self.cumulative = tuple(accumulate(self.probabilities))
+        self.total = self.cumulative[-1] + 0.0
 
-        chosen_index = random.choices(attack_indices, weights=probabilities)[0]
-        return str(chosen_index)
+    def sample(self, rng=random) -> str:
+        return self.actions[bisect_right(self.cumulative, rng.random() * self.total, 0, len(self.actions) - 1)]
 
 
-class MediumAI(EnemyAI):
-    """Balanced AI with moderate dodging and random attack choice."""
-    def choose_action(self, enemy_pokemon, player_pokemon) -> str:
-        """30% chance to dodge, otherwise picks a random attack."""
-        if random.random() < 0.3:
-            return "Dodge"
+@lru_cache(maxsize=MOVE_TABLE_CACHE_SIZE)
+def move_table(damages: tuple[int, ...], favor: str) -> MoveTable:
+    """The shared table of a move set. A level-up changes the damages and so gets a new table."""
+    if favor == FAVOR_WEAKER:
+        return MoveTable([1 / damage for damage in damages])
+    if favor == FAVOR_STRONGER:
+        return MoveTable(list(damages))
+    return MoveTable([1.0] * len(damages))
 
-        attack_indices = [i for i in range(len(enemy_pokemon.known_attacks))]
-        chosen_index = random.choice(attack_indices)
-        return str(chosen_index)
 
+class TableAI(EnemyAI):
+    """
+    AI that dodges with dodge_chance and otherwise draws an attack from its move table: one
+    rng.random() for the dodge and one for the attack.
+    """
+    @abstractmethod
+    def dodge_chance(self, enemy_pokemon) -> float:
+        pass
 
-class HardAI(EnemyAI):
-    """Advanced AI that prefers stronger attacks and smart dodging."""
-    def choose_action(self, enemy_pokemon, player_pokemon) -> str:
-        """Dodges when health is low or randomly, otherwise uses strong attacks."""
-        hp_ratio = enemy_pokemon.current_health / enemy_pokemon.max_health
-        if hp_ratio < 0.3 and random.random() < 0.4:
-            return "Dodge"
-        if random.random() < 0.15:
+    @abstractmethod
+    def move_table(self, enemy_pokemon) -> MoveTable:
+        pass
+
+    def choose_action(self, enemy_pokemon, player_pokemon, rng=random) -> str:
+        if rng.random() < self.dodge_chance(enemy_pokemon):
             return "Dodge"
+        return self.move_table(enemy_pokemon).sample(rng)
 
-        attack_indices = []
-        weights = []
+    def choose_actions(self, enemies: list, players: list, rngs: list, players_dodging: list[bool]) -> list[str]:
+        # The same draws as choose_action, with each move set's table looked up once per batch
+        tables: dict[tuple[int, ...], MoveTable] = {}
+        actions = []
+        for enemy, rng in zip(enemies, rngs):
+            if rng.random() < self.dodge_chance(enemy):
+                actions.append("Dodge")
+                continue
+            damages = move_damages(enemy)
+            table = tables.get(damages)
+            if table is None:
+                table = tables[damages] = self.move_table(enemy)
+            actions.append(table.sample(rng))
+        return actions
 
-        for i, attack in enumerate(enemy_pokemon.known_attacks):
-            attack_indices.append(i)
-            weights.append(attack['damage'])  # favor stronger attacks
+    def action_distribution(self, enemy_pokemon, player_pokemon, player_dodging: bool = False) -> list[tuple[str, float]]:
+        return _with_dodge(self.dodge_chance(enemy_pokemon), self.move_table(enemy_pokemon).probabilities)
 
-        total_weight = sum(weights)
-        probabilities = []
-        for w in weights:
-            probabilities.append(w / total_weight)
 
-        chosen_index = random.choices(attack_indices, weights=probabilities)[0]
-        return str(chosen_index)
\ No newline at end of file
+class EasyAI(TableAI):
+    """AI that favors weaker attacks and dodges occasionally: 20% chance to dodge, otherwise weaker attacks more often."""
+    DODGE_CHANCE = 0.2
+
+    def dodge_chance(self, enemy_pokemon) -> float:
+        return self.DODGE_CHANCE
+
+    def move_table(self, enemy_pokemon) -> 'MoveTable':
+        return move_table(move_damages(enemy_pokemon), FAVOR_WEAKER)
+
+
+class MediumAI(TableAI):
+    """Balanced AI with moderate dodging and random attack choice: 30% chance to dodge, otherwise a random attack."""
+    DODGE_CHANCE = 0.3
+
+    def dodge_chance(self, enemy_pokemon) -> float:
+        return self.DODGE_CHANCE
+
+    def move_table(self, enemy_pokemon) -> 'MoveTable':
+        return move_table(move_damages(enemy_pokemon), FAVOR_NONE)
+
+
+class HardAI(TableAI):
+    """Advanced AI that prefers stronger attacks and smart dodging: it dodges more when health is low."""
+    DODGE_CHANCE = 0.15
+    # Below this share of its max health it also dodges with LOW_HP_DODGE_CHANCE
+    LOW_HP_RATIO = 0.3
+    LOW_HP_DODGE_CHANCE = 0.4
+
+    def dodge_chance(self, enemy_pokemon) -> float:
+        if enemy_pokemon.current_health / enemy_pokemon.max_health < self.LOW_HP_RATIO:
+            return self.LOW_HP_DODGE_CHANCE + (1 - self.LOW_HP_DODGE_CHANCE) * self.DODGE_CHANCE
+        return self.DODGE_CHANCE
+
+    def move_table(self, enemy_pokemon) -> 'MoveTable':
+        return move_table(move_damages(enemy_pokemon), FAVOR_STRONGER)
+
+
+def _with_dodge(dodge_chance: float, attack_weights: list[float]) -> list[tuple[str, float]]:
+    """Distribution that dodges with dodge_chance and otherwise picks an attack by weight."""
+    total = sum(attack_weights)
+    return [("Dodge", dodge_chance)] + [(str(i), (1 - dodge_chance) * w / total) for i, w in enumerate(attack_weights)]
+
+
+# Search nodes an ExpertAI decision may visit before it settles for the deepest search finished.
+# Counting nodes instead of timing the search keeps decisions the same on every machine, which
+# seeded battles and replays rely on; this is roughly 2 ms of search.
+DEFAULT_NODE_BUDGET = 2000
+# Rounds (an enemy turn and a player turn) the search looks ahead at most
+DEFAULT_MAX_DEPTH = 6
+# Value of a result one round later relative to now, so quicker knockouts are preferred
+ROUND_DISCOUNT = 0.95
+# How often ExpertAI expects the player to dodge; otherwise the player is assumed to pick their best attack
+PLAYER_DODGE_RATE = 0.2
+
+
+class _OutOfBudget(Exception):
+    """Raised inside the search when the decision's node budget is used up."""
+
+
+class ExpertAI(EnemyAI):
+    """
+    AI that searches ahead over the battle rules: the type-adjusted damage of every move
+    (as Pokemon.attack deals it), the dodge chances of the battle's config and both sides' HP.
+    Enemy turns take the move with the best expected value, player turns assume the player dodges
+    PLAYER_DODGE_RATE of the time and otherwise answers with their best attack, and whether a dodge
+    works is a chance node.
+    The search deepens one round at a time until the node budget runs out; if not even one round
+    finished, the decision falls back to HardAI so an enemy turn never stalls the tick.
+    """
+    POLICY_CACHEABLE = True
+
+    def __init__(self, config: Optional[GameConfig] = None, node_budget: int = DEFAULT_NODE_BUDGET,
+                 max_depth: int = DEFAULT_MAX_DEPTH):
+        self.config = config # the battle's snapshot, the current one if not given
+        self.node_budget = node_budget
+        self.max_depth = max_depth
+        self.fallback = HardAI()
+
+    def choose_action(self, enemy_pokemon, player_pokemon, rng=random) -> str:
+        """Return the attack index or 'Dodge' with the best expected outcome, ties broken by rng."""
+        return self.decide(enemy_pokemon, player_pokemon, rng)
+
+    def decide(self, enemy_pokemon, player_pokemon, rng=random, player_dodging: bool = False) -> str:
+        best_actions, _ = self.best_actions(enemy_pokemon, player_pokemon, player_dodging)
+        if best_actions is None:
+            return self.fallback.choose_action(enemy_pokemon, player_pokemon, rng)
+        return best_actions[0] if len(best_actions) == 1 else rng.choice(best_actions)
+
+    def action_distribution(self, enemy_pokemon, player_pokemon, player_dodging: bool = False) -> list[tuple[str, float]]:
+        best_actions, _ = self.best_actions(enemy_pokemon, player_pokemon, player_dodging)
+        if best_actions is None:
+            return self.fallback.action_distribution(enemy_pokemon, player_pokemon)
+        return [(action, 1 / len(best_actions)) for action in best_actions]
+
+    def best_actions(self, enemy_pokemon, player_pokemon, player_dodging: bool = False) -> tuple[Optional[list[str]], int]:
+        """
+        Actions tied for the best value at the deepest search finished within the node budget, and
+        that depth in rounds; (None, 0) if not even one round finished.
+        """
+        config = self.config or CONFIG.snapshot
+        enemy_damage = TypeAdvantageCalculator.damage_vector(enemy_pokemon, player_pokemon, config)
+        player_damage = sorted(set(TypeAdvantageCalculator.damage_vector(player_pokemon, enemy_pokemon, config)))
+        # Moves that deal the same damage lead to the same states, so only the first of each is searched
+        enemy_moves = {}
+        for i, damage in enumerate(enemy_damage):
+            enemy_moves.setdefault(damage, i)
+        search = _Search(enemy_moves, player_damage, enemy_pokemon.max_health, player_pokemon.max_health,
+                         config.player_chance_to_dodge, config.opponent_chance_to_dodge, self.node_budget)
+
+        best_actions, searched = None, 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                values = search.root(enemy_pokemon.current_health, player_pokemon.current_health, player_dodging, depth)
+            except _OutOfBudget:
+                break
+            best = max(values.values())
+            best_actions = [action for action, value in values.items() if value >= best - 1e-9]
+            searched = depth
+        return best_actions, searched
+
+
+class _Search:
+    """One ExpertAI decision: expectimax over (enemy HP, player HP, whether the player is dodging)."""
+    def __init__(self, enemy_moves: dict[int, int], player_damage: list[int], enemy_max: int, player_max: int,
+                 player_dodge: float, enemy_dodge: float, node_budget: int):
+        self.enemy_moves = enemy_moves # damage -> first attack index that deals it
+        self.player_damage = player_damage or [0]
+        self.enemy_max = enemy_max
+        self.player_max = player_max
+        self.player_dodge = player_dodge
+        self.enemy_dodge = enemy_dodge
+        self.node_budget = node_budget
+        self.nodes = 0 # across every depth of the decision
+
+    def root(self, enemy_hp: int, player_hp: int, player_dodging: bool, depth: int) -> dict[str, float]:
+        """
+        Value of each enemy action at the start of the enemy's turn, searching depth rounds.
+        player_dodging is whether the player dodged this round, as the battle knows it.
+        """
+        self.__memo: dict[tuple, float] = {}
+        values = {"Dodge": self._player_turn(enemy_hp, player_hp, True, depth)}
+        for damage, index in self.enemy_moves.items():
+            values[str(index)] = self._enemy_attacks(enemy_hp, player_hp, damage, player_dodging, depth)
+        return values
+
+    def _tick(self) -> None:
+        self.nodes += 1
+        if self.nodes > self.node_budget:
+            raise _OutOfBudget()
+
+    def _evaluate(self, enemy_hp: int, player_hp: int) -> float:
+        """Value of a position the search stopped at: the difference in remaining HP ratios."""
+        return enemy_hp / self.enemy_max - player_hp / self.player_max
+
+    def _enemy_hits(self, enemy_hp: int, player_hp: int, damage: int, depth: int) -> float:
+        player_hp -= damage
+        if player_hp <= 0:
+            return 1.0
+        return self._player_turn(enemy_hp, player_hp, False, depth)
+
+    def _enemy_attacks(self, enemy_hp: int, player_hp: int, damage: int, player_dodging: bool, depth: int) -> float:
+        hit = self._enemy_hits(enemy_hp, player_hp, damage, depth)
+        if player_dodging: # the attack misses with the player's dodge chance
+            hit = self.player_dodge * self._player_turn(enemy_hp, player_hp, False, depth) + (1 - self.player_dodge) * hit
+        return hit
+
+    def _enemy_turn(self, enemy_hp: int, player_hp: int, player_dodging: bool, depth: int) -> float:
+        """Best expected value over the enemy's actions (max node)."""
+        if depth == 0:
+            return self._evaluate(enemy_hp, player_hp)
+        key = (0, enemy_hp, player_hp, player_dodging, depth)
+        value = self.__memo.get(key)
+        if value is not None:
+            return value
+        self._tick()
+
+        best = self._player_turn(enemy_hp, player_hp, True, depth)
+        for damage in self.enemy_moves:
+            best = max(best, self._enemy_attacks(enemy_hp, player_hp, damage, player_dodging, depth))
+        self.__memo[key] = best
+        return best
+
+    def _player_turn(self, enemy_hp: int, player_hp: int, enemy_dodging: bool, depth: int) -> float:
+        """Expected value over the player's dodge and their best attack against the enemy, ending the round."""
+        key = (1, enemy_hp, player_hp, enemy_dodging, depth)
+        value = self.__memo.get(key)
+        if value is not None:
+            return value
+        self._tick()
+
+        later = ROUND_DISCOUNT
+        dodge = later * self._enemy_turn(enemy_hp, player_hp, True, depth - 1)
+        worst = 1.0
+        for damage in self.player_damage:
+            left = enemy_hp - damage
+            hit = -1.0 if left <= 0 else later * self._enemy_turn(left, player_hp, False, depth - 1)
+            if enemy_dodging: # the attack misses with the enemy's dodge chance
+                hit = self.enemy_dodge * later * self._enemy_turn(enemy_hp, player_hp, False, depth - 1) + (1 - self.enemy_dodge) * hit
+            worst = min(worst, hit)
+        value = self.__memo[key] = PLAYER_DODGE_RATE * dodge + (1 - PLAYER_DODGE_RATE) * worst
+        return value
+
+
+# ---- Learned policy ----
+
+# Cell codes of a policy table written by selfplay_training
+POLICY_TABLE_VERSION = 1
+DODGE_CODE = "D"
+UNKNOWN_CODE = "."
+
+
+class LearnedPolicyAI(EnemyAI):
+    """
+    Plays a policy table learned offline by selfplay_training: one lookup of the matchup and one
+    index into its string of cells per decision. Positions the table has no action for are played by HardAI.
+    The table is keyed by species and HP buckets only: it was learned with each species' pokedex
+    stats, so a Pokemon that has leveled up (more health and damage) is played as if it hadn't.
+    Evolution stages are told apart, since each stage is its own species.
+    """
+    def __init__(self, table: dict):
+        if table.get("version") != POLICY_TABLE_VERSION:
+            raise ValueError(f"Unsupported policy table version: {table.get('version')}")
+        self.policy: dict[str, str] = table["policy"]
+        self.hp_buckets: int = table["hp_buckets"]
+        self.fallback = HardAI()
+
+    @staticmethod
+    def load(path: str) -> 'LearnedPolicyAI':
+        with open(path, encoding="utf-8") as file:
+            return LearnedPolicyAI(json.load(file))
+
+    def _code(self, enemy_pokemon, player_pokemon) -> str:
+        row = self.policy.get(f"{enemy_pokemon.name}|{player_pokemon.name}")
+        if row is None:
+            return UNKNOWN_CODE
+        buckets = self.hp_buckets
+        enemy_bucket = hp_bucket(enemy_pokemon.current_health, enemy_pokemon.max_health, buckets)
+        player_bucket = hp_bucket(player_pokemon.current_health, player_pokemon.max_health, buckets)
+        return row[enemy_bucket * buckets + player_bucket]
+
+    def choose_action(self, enemy_pokemon, player_pokemon, rng=random) -> str:
+        code = self._code(enemy_pokemon, player_pokemon)
+        if code == UNKNOWN_CODE:
+            return self.fallback.choose_action(enemy_pokemon, player_pokemon, rng)
+        return "Dodge" if code == DODGE_CODE else code
+
+    def action_distribution(self, enemy_pokemon, player_pokemon, player_dodging: bool = False) -> list[tuple[str, float]]:
+        code = self._code(enemy_pokemon, player_pokemon)
+        if code == UNKNOWN_CODE:
+            return self.fallback.action_distribution(enemy_pokemon, player_pokemon, player_dodging)
+        return [("Dodge" if code == DODGE_CODE else code, 1.0)]
+
+
+# ---- Strategy registry ----
+
+# Difficulty used when a player hasn't chosen one (or chose one that is no longer registered)
+DEFAULT_DIFFICULTY = "medium"
+
+
+class AIRegistry:
+    """
+    Enemy AI strategies by difficulty name. Each strategy is created once, on first use, and the
+    instance is shared by every battle. A strategy can be registered as a class (or any factory)
+    or lazily as a "module:attribute" path that is only imported when the difficulty is first used.
+    Strategies registered with uses_config=True are built with a battle's config snapshot, and are
+    rebuilt when a battle brings a different snapshot.
+    """
+    def __init__(self):
+        self.__factories: dict[str, object] = {} # name -> factory or "module:attribute" path
+        self.__labels: dict[str, str] = {}
+        self.__uses_config: dict[str, bool] = {}
+        self.__instances: dict[str, tuple[Optional[GameConfig], EnemyAI]] = {}
+
+    def register(self, name: str, factory, label: Optional[str] = None, uses_config: bool = False) -> None:
+        """Add (or replace) the strategy of a difficulty. label is the name players see."""
+        self.__factories[name] = factory
+        self.__labels[name] = label or name.capitalize()
+        self.__uses_config[name] = uses_config
+        self.__instances.pop(name, None)
+
+    def unregister(self, name: str) -> None:
+        for table in (self.__factories, self.__labels, self.__uses_config, self.__instances):
+            table.pop(name, None)
+
+    def _factory(self, name: str):
+        factory = self.__factories[name]
+        if isinstance(factory, str):
+            module_name, _, attribute = factory.partition(":")
+            factory = getattr(import_module(module_name), attribute)
+            self.__factories[name] = factory
+        return factory
+
+    def get(self, name: str, config: Optional[GameConfig] = None) -> EnemyAI:
+        """The shared strategy of a difficulty. Raises KeyError for an unknown name."""
+        if name not in self.__factories:
+            raise KeyError(f"Unknown enemy AI: {name}")
+        config = config if self.__uses_config[name] else None
+        cached = self.__instances.get(name)
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        factory = self._factory(name)
+        ai = factory(config) if self.__uses_config[name] else factory()
+        self.__instances[name] = (config, ai)
+        return ai
+
+    def resolve(self, name: Optional[str], config: Optional[GameConfig] = None) -> tuple[str, EnemyAI]:
+        """(difficulty, strategy) for a player's setting, using DEFAULT_DIFFICULTY if it isn't registered."""
+        if name not in self.__factories:
+            name = DEFAULT_DIFFICULTY
+        return name, self.get(name, config)
+
+    def names(self) -> list[str]:
+        return list(self.__factories)
+
+    def label(self, name: str) -> str:
+        return self.__labels[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self.__factories
+
+
+AI_REGISTRY = AIRegistry()
+AI_REGISTRY.register("easy", EasyAI)
+AI_REGISTRY.register("medium", MediumAI)
+AI_REGISTRY.register("hard", HardAI)
+AI_REGISTRY.register("expert", ExpertAI, uses_config=True)
+
+def register_ai(name: str, factory, label: Optional[str] = None, uses_config: bool = False) -> None:
+    """Add a difficulty to the game, e.g. register_ai("nightmare", "my_plugin.ai:NightmareAI")."""
+    AI_REGISTRY.register(name, factory, label, uses_config)
+
+
+# ---- Policy cache ----
+
+# HP is keyed in buckets of 1/HP_BUCKETS of max health (HardAI's low-HP threshold falls on a bucket edge)
+HP_BUCKETS = 10
+# Computed distributions kept at once; preloaded tables are kept whole
+DEFAULT_POLICY_CACHE_SIZE = 4096
+
+
+def hp_bucket(hp: int, max_hp: int, buckets: int = HP_BUCKETS) -> int:
+    """Which of buckets equal shares of max_hp the health falls in, full health in the last one."""
+    return min(int(hp / max_hp * buckets), buckets - 1)
+
+def policy_key(difficulty: str, enemy_pokemon, player_pokemon, player_dodging: bool = False,
+               config: Optional[GameConfig] = None) -> tuple:
+    """
+    (species, evolution stage, move damages, own HP bucket, opponent species, opponent move damages,
+    opponent HP bucket, difficulty, player dodging, config version). The damages tell levels apart,
+    since a level-up changes them; the version tells apart the dodge chances and type charts of
+    config snapshots (the current one if config is not given).
+    """
+    return (enemy_pokemon.name, enemy_pokemon.evolution_state.get_evo_level(), move_damages(enemy_pokemon),
+            hp_bucket(enemy_pokemon.current_health, enemy_pokemon.max_health), player_pokemon.name,
+            move_damages(player_pokemon), hp_bucket(player_pokemon.current_health, player_pokemon.max_health),
+            difficulty, player_dodging, (config or CONFIG.snapshot).version)
+
+
+class PolicyCache:
+    """
+    Action distributions of the enemy AIs by discretized battle state, so a repeated position
+    costs a dict lookup and one random draw instead of a search.
+    Computed entries are kept in a bounded LRU cache; tables built offline with preload() are
+    kept whole. Entries are (actions, cumulative probabilities).
+    """
+    def __init__(self, capacity: int = DEFAULT_POLICY_CACHE_SIZE):
+        self.capacity = capacity
+        self.__entries: OrderedDict[tuple, tuple[tuple[str, ...], tuple[float, ...]]] = OrderedDict()
+        self.__preloaded: dict[tuple, tuple[tuple[str, ...], tuple[float, ...]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _entry(distribution: list[tuple[str, float]]) -> tuple[tuple[str, ...], tuple[float, ...]]:
+        actions = tuple(action for action, _ in distribution)
+        cumulative = tuple(accumulate(probability for _, probability in distribution))
+        return actions, cumulative
+
+    def get(self, key: tuple) -> Optional[tuple[tuple[str, ...], tuple[float, ...]]]:
+        entry = self.__preloaded.get(key)
+        if entry is not None:
+            return entry
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, distribution: list[tuple[str, float]]) -> tuple[tuple[str, ...], tuple[float, ...]]:
+        """Cache the distribution, returning its entry (which a capacity of 0 doesn't keep)."""
+        entry = self.__entries[key] = self._entry(distribution)
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.capacity:
+            self.__entries.popitem(last=False)
+        return entry
+
+    def choose_action(self, ai: EnemyAI, difficulty: str, enemy_pokemon, player_pokemon, rng=random,
+                      player_dodging: bool = False) -> str:
+        """Sample the AI's action for this position, computing its distribution on a miss."""
+        key = policy_key(difficulty, enemy_pokemon, player_pokemon, player_dodging, ai.config)
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = self.put(key, ai.action_distribution(enemy_pokemon, player_pokemon, player_dodging))
+        else:
+            self.hits += 1
+        actions, cumulative = entry
+        return actions[min(bisect_right(cumulative, rng.random() * cumulative[-1]), len(actions) - 1)]
+
+    def preload(self, table: Iterable[tuple[tuple, list[tuple[str, float]]]]) -> None:
+        """Add (key, distribution) pairs built offline; they are never evicted."""
+        for key, distribution in table:
+            # Keys read back from JSON are lists, with the move damages as nested lists
+            key = tuple(tuple(part) if isinstance(part, list) else part for part in key)
+            self.__preloaded[key] = self._entry(distribution)
+
+    def export(self) -> list[dict]:
+        """Every entry as JSON-ready {"key", "actions", "probabilities"} dicts."""
+        table = []
+        for key, (actions, cumulative) in [*self.__preloaded.items(), *self.__entries.items()]:
+            probabilities = [b - a for a, b in zip((0.0,) + cumulative, cumulative)]
+            table.append({"key": list(key), "actions": list(actions), "probabilities": probabilities})
+        return table
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.export(), file)
+
+    def load(self, path: str) -> None:
+        """Preload a table written by save()."""
+        with open(path, encoding="utf-8") as file:
+            table = json.load(file)
+        self.preload((entry["key"], list(zip(entry["actions"], entry["probabilities"]))) for entry in table)
+
+    def __len__(self) -> int:
+        return len(self.__preloaded) + len(self.__entries)
+
+
+def build_policy_table(ai: EnemyAI, difficulty: str, species: Optional[list[str]] = None) -> list[tuple[tuple, list[tuple[str, float]]]]:
+    """
+    Compute the distribution of every key for species met as wild Pokemon (as created from
+    the pokedex), with HP at the middle of each bucket, for PolicyCache.preload.
+    """
+    species = list(pokedex) if species is None else species
+    table = []
+    for enemy_name in species:
+        enemy = PokemonFactory.create_pokemon(enemy_name)
+        for player_name in species:
+            player = PokemonFactory.create_pokemon(player_name)
+            for enemy_bucket in range(HP_BUCKETS):
+                enemy.current_health = max(1, int((enemy_bucket + 0.5) * enemy.max_health / HP_BUCKETS))
+                for player_bucket in range(HP_BUCKETS):
+                    player.current_health = max(1, int((player_bucket + 0.5) * player.max_health / HP_BUCKETS))
+                    table.append((policy_key(difficulty, enemy, player, config=ai.config),
+                                  ai.action_distribution(enemy, player)))
+    return table
+
+
+# ---- Module-level cache ----
+# Off by default: a cached decision draws differently from rng than choose_action does, so
+# battles recorded without the cache only replay with it off (and the other way round).
+
+POLICY_CACHE: Optional[PolicyCache] = None
+
+def enable_policy_cache(capacity: int = DEFAULT_POLICY_CACHE_SIZE, table_path: Optional[str] = None) -> PolicyCache:
+    """Start caching enemy decisions, preloading a saved table if given."""
+    global POLICY_CACHE
+    POLICY_CACHE = PolicyCache(capacity)
+    if table_path:
+        POLICY_CACHE.load(table_path)
+    return POLICY_CACHE
+
+def disable_policy_cache() -> None:
+    global POLICY_CACHE
+    POLICY_CACHE = None
+
+def choose_enemy_action(ai: EnemyAI, difficulty: str, enemy_pokemon, player_pokemon, rng=random,
+                        player_dodging: bool = False) -> str:
+    """The AI's action, through the policy cache when it is enabled and the AI is POLICY_CACHEABLE."""
+    if POLICY_CACHE is None or not ai.POLICY_CACHEABLE:
+        return ai.decide(enemy_pokemon, player_pokemon, rng, player_dodging)
+    return POLICY_CACHE.choose_action(ai, difficulty, enemy_pokemon, player_pokemon, rng, player_dodging)
+
+def choose_enemy_actions(ai: EnemyAI, difficulty: str, enemies: list, players: list, rngs: list,
+                         players_dodging: list[bool]) -> list[str]:
+    """The actions of many battles with the same AI, through the policy cache like choose_enemy_action."""
+    if POLICY_CACHE is None or not ai.POLICY_CACHEABLE:
+        return ai.choose_actions(enemies, players, rngs, players_dodging)
+    return [POLICY_CACHE.choose_action(ai, difficulty, enemy, player, rng, dodging)
+            for enemy, player, rng, dodging in zip(enemies, players, rngs, players_dodging)]
@@ -0,0 +1,237 @@
+"""
+Game balance values as versioned, immutable snapshots that can be swapped while the server runs.
+CONFIG.snapshot is the snapshot new battles start with. A battle keeps the snapshot it started
+with until it ends and passes it to attacks, level-ups, potions and Pokeballs; code outside a
+battle reads CONFIG.snapshot. Replacing the snapshot is a single attribute assignment, so a
+reader sees either the old snapshot or the new one, never a mix.
+
+A ConfigWatcher polls a JSON file of overrides, e.g.
+    {"player_chance_to_run": 0.6, "potion_heal": {"Small Potion": 15}, "type_advantages": {"FIRE": ["GRASS"]}}
+and swaps in a new snapshot whenever the file changes. Values missing from the file keep their defaults.
+"""
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Optional
+from .pokedex import PokemonType, type_advantages
+
+# Values used when nothing is overridden
+DEFAULTS: dict[str, Any] = {
+    # Level-ups and evolution
+    "base_xp_threshold": 30,
+    "second_xp_threshold": 60,
+    "base_health_increase": 10,
+    "second_health_increase": 15,
+    "base_attack_increase": 5,
+    "second_attack_increase": 4,
+    "evolution_level_threshold": 4,
+    # Multiplier applied when the attacker has a type advantage, by evolution level
+    "advantage_multipliers": (1.4, 1.65, 2.0),
+    # Types each type has an advantage against, by PokemonType name (any pairing not listed is neutral)
+    "type_advantages": {attacker.name: tuple(defender.name for defender in defenders)
+                        for attacker, defenders in type_advantages.items()},
+    # Items
+    "potion_heal": {"Small Potion": 10, "Medium Potion": 20, "Large Potion": 1000},
+    "catch_rates": {"Pokeball": 0.5, "Great Ball": 0.7, "Ultra Ball": 0.85, "Master Ball": 1.0},
+    # Battles
+    "player_chance_to_dodge": 0.5,
+    "opponent_chance_to_dodge": 0.5,
+    "enemy_response_time": 3,
+    "player_chance_to_run": 0.7,
+}
+
+
+# Values given in seconds, which may be fractional even though the default is whole
+_SECONDS = frozenset({"enemy_response_time"})
+# Amounts added to saved health, which record_validation requires to be whole
+_WHOLE_AMOUNTS = frozenset({"potion_heal"})
+
+
+def _is_number(value) -> bool:
+    return type(value) in (int, float)  # bool is an int subclass but never a valid amount
+
+def check_values(values: dict[str, Any]) -> None:
+    """Raise ValueError if an override has the wrong type, so a bad config file is rejected on load."""
+    problems = []
+    for key, value in values.items():
+        default = DEFAULTS[key]
+        if key == "advantage_multipliers":
+            if type(value) not in (list, tuple) or len(value) != len(default) or not all(map(_is_number, value)):
+                problems.append(f"{key} must be {len(default)} numbers, one per evolution stage")
+        elif key == "type_advantages":
+            if type(value) is not dict or not all(type(defenders) in (list, tuple) and all(type(d) is str for d in defenders)
+                                                  for defenders in value.values()):
+                problems.append(f"{key} must map type names to lists of type names")
+        elif type(default) is dict:
+            is_amount = (lambda amount: type(amount) is int) if key in _WHOLE_AMOUNTS else _is_number
+            if type(value) is not dict or not all(type(name) is str and is_amount(amount) for name, amount in value.items()):
+                problems.append(f"{key} must map names to {'ints' if key in _WHOLE_AMOUNTS else 'numbers'}")
+        elif type(default) is int and key not in _SECONDS:
+            if type(value) is not int:
+                problems.append(f"{key} must be an int, got {value!r}")
+        elif not _is_number(value):
+            problems.append(f"{key} must be a number, got {value!r}")
+    if problems:
+        raise ValueError("Bad config values: " + "; ".join(problems))
+
+
+def compile_type_chart(advantages: dict[str, tuple], multipliers: tuple) -> tuple:
+    """
+    Build the type chart: chart[attacker][defender][evolution level - 1], indexed like TYPE_INDEX.
+    New PokemonType members get a row and column automatically and are neutral unless listed.
+    """
+    neutral = (1.0,) * len(multipliers)
+    return tuple(
+        tuple(multipliers if defender.name in advantages.get(attacker.name, ()) else neutral
+              for defender in PokemonType)
+        for attacker in PokemonType
+    )
+
+
+class GameConfig:
+    """
+    One immutable set of balance values, with the type chart compiled from them.
+    Dict values are read-only mappings and lists are tuples, so a battle's snapshot can't be changed through them.
+    """
+    __slots__ = ("version", "type_chart") + tuple(DEFAULTS)
+
+    def __init__(self, version: int = 0, **overrides):
+        unknown = set(overrides) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown config values: {', '.join(sorted(unknown))}")
+        check_values(overrides)
+        values = {**DEFAULTS, **overrides}
+        for key in ("potion_heal", "catch_rates"):
+            values[key] = MappingProxyType({**DEFAULTS[key], **overrides.get(key, {})})
+        values["advantage_multipliers"] = tuple(values["advantage_multipliers"])
+        values["type_advantages"] = MappingProxyType({attacker: tuple(defenders)
+                                                      for attacker, defenders in values["type_advantages"].items()})
+        for name in [*values["type_advantages"], *(d for ds in values["type_advantages"].values() for d in ds)]:
+            if name not in PokemonType.__members__:
+                raise ValueError(f"Unknown type in type_advantages: {name}")
+
+        object.__setattr__(self, "version", version)
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+        object.__setattr__(self, "type_chart", compile_type_chart(values["type_advantages"], values["advantage_multipliers"]))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("GameConfig is read-only, build a new snapshot instead")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Plain (JSON-ready) copy of the values."""
+        values = {}
+        for key in DEFAULTS:
+            value = getattr(self, key)
+            values[key] = dict(value) if isinstance(value, MappingProxyType) else value
+        return values
+
+    @staticmethod
+    def from_dict(data: dict, version: int = 0) -> 'GameConfig':
+        return GameConfig(version, **data)
+
+    def __repr__(self):
+        return f"GameConfig(version={self.version})"
+
+
+DEFAULT_CONFIG = GameConfig()
+
+
+class ConfigHolder:
+    """Holds the current snapshot. Readers use holder.snapshot; set() swaps it in one assignment."""
+    def __init__(self, snapshot: GameConfig):
+        self.snapshot = snapshot
+        self.__listeners: list[Callable[[GameConfig], None]] = []
+
+    def add_listener(self, callback: Callable[[GameConfig], None]) -> None:
+        self.__listeners.append(callback)
+
+    def set(self, snapshot: GameConfig) -> None:
+        self.snapshot = snapshot
+        for callback in self.__listeners:
+            callback(snapshot)
+
+    def reset(self) -> None:
+        self.set(DEFAULT_CONFIG)
+
+
+# The snapshot new battles start with
+CONFIG = ConfigHolder(DEFAULT_CONFIG)
+
+
+class ConfigWatcher:
+    """
+    Polls a JSON config file and swaps in a new snapshot when it changes.
+    A file that can't be read or has bad values leaves the current snapshot in place and is
+    reported in last_error.
+    """
+    def __init__(self, path: str, holder: ConfigHolder = CONFIG, interval: float = 2.0):
+        self.path = path
+        self.holder = holder
+        self.interval = interval
+        self.last_error: Optional[str] = None
+        self.__seen: Optional[tuple[int, int]] = None # (mtime_ns, size) of the file last loaded
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def poll(self) -> bool:
+        """Load the file if it changed since the last poll. Return True if a new snapshot was swapped in."""
+        try:
+            stat = os.stat(self.path)
+        except OSError as error:
+            self.last_error = str(error)
+            return False
+        seen = (stat.st_mtime_ns, stat.st_size)
+        if seen == self.__seen:
+            return False
+        self.__seen = seen
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                snapshot = GameConfig.from_dict(json.load(file), self.holder.snapshot.version + 1)
+        except (OSError, ValueError, TypeError) as error:
+            self.last_error = f"{self.path}: {error}"
+            return False
+        self.last_error = None
+        self.holder.set(snapshot)
+        return True
+
+    def start(self) -> None:
+        """Poll in a background thread every interval seconds."""
+        if self.__thread is not None:
+            return
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self.__thread.start()
+
+    def _run(self) -> None:
+        while not self.__stop.is_set():
+            self.poll()
+            self.__stop.wait(self.interval)
+
+    def stop(self) -> None:
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__thread.join()
+            self.__thread = None
+
+
+# ---- Module-level watcher ----
+# Off by default; the server starts it with watch_config(path).
+
+WATCHER: Optional[ConfigWatcher] = None
+
+def watch_config(path: str, interval: float = 2.0) -> ConfigWatcher:
+    """Load the config file now and keep watching it for changes."""
+    global WATCHER
+    stop_watching_config()
+    WATCHER = ConfigWatcher(path, CONFIG, interval)
+    WATCHER.poll()
+    WATCHER.start()
+    return WATCHER
+
+def stop_watching_config() -> None:
+    global WATCHER
+    if WATCHER is not None:
+        WATCHER.stop()
+        WATCHER = None
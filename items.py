@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from .game_config import CONFIG, DEFAULTS, GameConfig
 
-# Constants
+# Default values, potions are created with the heal values of the current game_config snapshot
 class PotionConstants:
-    SMALL_HEAL = 10
-    MEDIUM_HEAL = 20
-    LARGE_HEAL = 1000  
+    SMALL_HEAL = DEFAULTS["potion_heal"]["Small Potion"]
+    MEDIUM_HEAL = DEFAULTS["potion_heal"]["Medium Potion"]
+    LARGE_HEAL = DEFAULTS["potion_heal"]["Large Potion"]
 
 # ---- Base Item Class ----
 class Item(ABC):
@@ -49,12 +50,16 @@ class Potion(Item):
         """Return the healing value of the potion."""
         return self.heal_value
 
-    def use(self, pokemon) -> bool:
-        """Heal the Pokémon if it's not fainted or at full health."""
+    def use(self, pokemon, config: Optional[GameConfig] = None) -> bool:
+        """
+        Heal the Pokémon if it's not fainted or at full health.
+        In a battle, the heal value comes from the battle's config snapshot.
+        """
         if pokemon.is_fainted() or pokemon.current_health == pokemon.max_health:
             return False
 
-        pokemon.current_health = min(pokemon.max_health, pokemon.current_health + self.heal_value)
+        heal_value = config.potion_heal.get(self.name, self.heal_value) if config else self.heal_value
+        pokemon.current_health = min(pokemon.max_health, pokemon.current_health + heal_value)
         return True
 
     def to_list(self) -> list:
@@ -70,17 +75,17 @@ class Potion(Item):
 class SmallPotion(Potion):
     """Small healing potion."""
     def __init__(self):
-        super().__init__("Small Potion", PotionConstants.SMALL_HEAL)
+        super().__init__("Small Potion", CONFIG.snapshot.potion_heal["Small Potion"])
 
 class MediumPotion(Potion):
     """Medium healing potion."""
     def __init__(self):
-        super().__init__("Medium Potion", PotionConstants.MEDIUM_HEAL)
+        super().__init__("Medium Potion", CONFIG.snapshot.potion_heal["Medium Potion"])
 
 class LargePotion(Potion):
     """Large healing potion."""
     def __init__(self):
-        super().__init__("Large Potion", PotionConstants.LARGE_HEAL)
+        super().__init__("Large Potion", CONFIG.snapshot.potion_heal["Large Potion"])
 
 # ---- Abstract Decorator ----
 class PotionDecorator(Item):
@@ -99,9 +104,9 @@ class PotionDecorator(Item):
         """Return the healing value of the decorated potion."""
         return self.potion.get_value()
 
-    def use(self, pokemon) -> bool:
+    def use(self, pokemon, config: Optional[GameConfig] = None) -> bool:
         """Apply the decorated potion effect."""
-        return self.potion.use(pokemon)
+        return self.potion.use(pokemon, config)
 
     def to_list(self) -> list:
         """Serialize decorated potion for saving."""
@@ -121,11 +126,11 @@ class RevivePotion(PotionDecorator):
         """Indicate this is a revive potion."""
         return True
 
-    def use(self, pokemon) -> bool:
+    def use(self, pokemon, config: Optional[GameConfig] = None) -> bool:
         """Revive the Pokémon if fainted, then heal."""
         if pokemon.is_fainted():
             pokemon.current_health = 1
-        return self.potion.use(pokemon)
+        return self.potion.use(pokemon, config)
 
     def to_list(self) -> list:
         """Serialize revive potion for saving."""
@@ -146,27 +151,27 @@ class PotionFlyweightFactory:
     def get_potion(cls, potion_type: str) -> Item:
         """Return a shared potion instance based on type."""
         key = potion_type.lower()
-
-        if key not in cls._flyweights:
-            if key == "small potion":
-                cls._flyweights[key] = SmallPotion()
-            elif key == "medium potion":
-                cls._flyweights[key] = MediumPotion()
-            elif key == "large potion":
-                cls._flyweights[key] = LargePotion()
-            elif key == "revive small potion":
-                base = cls.get_potion("small potion")
-                cls._flyweights[key] = RevivePotion(base)
-            elif key == "revive medium potion":
-                base = cls.get_potion("medium potion")
-                cls._flyweights[key] = RevivePotion(base)
-            elif key == "revive large potion":
-                base = cls.get_potion("large potion")
-                cls._flyweights[key] = RevivePotion(base)
-            else:
-                raise ValueError(f"Unknown potion type: {potion_type}")
-
-        return cls._flyweights[key]
+        # Read into a local: a config reload clears the dict from the watcher thread at any time
+        potion = cls._flyweights.get(key)
+        if potion is not None:
+            return potion
+
+        if key == "small potion":
+            potion = SmallPotion()
+        elif key == "medium potion":
+            potion = MediumPotion()
+        elif key == "large potion":
+            potion = LargePotion()
+        elif key == "revive small potion":
+            potion = RevivePotion(cls.get_potion("small potion"))
+        elif key == "revive medium potion":
+            potion = RevivePotion(cls.get_potion("medium potion"))
+        elif key == "revive large potion":
+            potion = RevivePotion(cls.get_potion("large potion"))
+        else:
+            raise ValueError(f"Unknown potion type: {potion_type}")
+        cls._flyweights[key] = potion
+        return potion
 
     @classmethod
     def get_small_potion(cls) -> Item:
@@ -195,3 +200,7 @@ class PotionFlyweightFactory:
     @classmethod
     def get_max_revive(cls) -> Item:
         return cls.get_revive_large_potion()
+
+
+# Shared potions carry the heal values they were created with, so they are recreated after a config change
+CONFIG.add_listener(lambda snapshot: PotionFlyweightFactory._flyweights.clear())
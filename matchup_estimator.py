@@ -0,0 +1,219 @@
+"""
+Monte Carlo matchup estimator.
+Simulates many battles at once in NumPy arrays to estimate win probabilities and
+expected battle length for every species pairing in the pokedex at every AI difficulty.
+The rules mirror PokemonBattleManager for a single Pokemon on each side with an empty bag.
+NumPy is optional for the game and only needed to run this estimator.
+"""
+from __future__ import annotations
+import argparse
+import time
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .pokedex import pokedex
+from .pokemon import Pokemon, TypeAdvantageCalculator
+from .game_config import CONFIG, GameConfig
+from .enemyAI import EasyAI, MediumAI, HardAI
+
+DIFFICULTIES = ("easy", "medium", "hard")
+PLAYER_POLICIES = ("random", "strongest")
+
+DEFAULT_MAX_ROUNDS = 200
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("matchup_estimator needs NumPy: pip install numpy")
+
+
+def build_damage_table(species: list[str], config: Optional[GameConfig] = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return (damage, move_count) where damage[a, d, m] is the damage species a deals to
+    species d with move m, computed the same way Pokemon.attack does. Missing moves are 0.
+    """
+    pokemon = [Pokemon(name) for name in species]
+    max_moves = max(len(p.known_attacks) for p in pokemon)
+    damage = np.zeros((len(species), len(species), max_moves), dtype=np.int64)
+    move_count = np.array([len(p.known_attacks) for p in pokemon], dtype=np.int64)
+
+    for a, attacker in enumerate(pokemon):
+        for d, defender in enumerate(pokemon):
+            vector = TypeAdvantageCalculator.damage_vector(attacker, defender, config)
+            damage[a, d, :len(vector)] = vector
+
+    return damage, move_count
+
+
+def _cumulative(weights: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Normalize move weights per row into cumulative probabilities (invalid moves never chosen)."""
+    weights = np.where(valid, weights, 0.0)
+    cumulative = np.cumsum(weights, axis=1) / weights.sum(axis=1, keepdims=True)
+    return np.where(valid, cumulative, 1.0)
+
+
+def _sample(cumulative: np.ndarray, u: np.ndarray, move_count: np.ndarray) -> np.ndarray:
+    """Pick one move per row from cumulative probabilities using uniform draws u."""
+    index = (u[:, None] >= cumulative).sum(axis=1)
+    return np.minimum(index, move_count - 1)
+
+
+class MatchupTable:
+    """Estimated outcomes indexed by [player species, enemy species, difficulty]."""
+    def __init__(self, species: list[str], difficulties: tuple[str, ...], win_probability: np.ndarray,
+                 loss_probability: np.ndarray, expected_turns: np.ndarray, battles_per_matchup: int):
+        self.species = species
+        self.difficulties = difficulties
+        self.win_probability_table = win_probability
+        self.loss_probability_table = loss_probability
+        self.expected_turns_table = expected_turns
+        self.battles_per_matchup = battles_per_matchup
+        self.__species_index = {name: i for i, name in enumerate(species)}
+        self.__difficulty_index = {name: i for i, name in enumerate(difficulties)}
+
+    def _index(self, player: str, enemy: str, difficulty: str) -> tuple[int, int, int]:
+        return self.__species_index[player], self.__species_index[enemy], self.__difficulty_index[difficulty]
+
+    def win_probability(self, player: str, enemy: str, difficulty: str) -> float:
+        return float(self.win_probability_table[self._index(player, enemy, difficulty)])
+
+    def loss_probability(self, player: str, enemy: str, difficulty: str) -> float:
+        return float(self.loss_probability_table[self._index(player, enemy, difficulty)])
+
+    def expected_turns(self, player: str, enemy: str, difficulty: str) -> float:
+        return float(self.expected_turns_table[self._index(player, enemy, difficulty)])
+
+
+def estimate_matchups(battles_per_matchup: int = 1000, species: Optional[list[str]] = None,
+                      difficulties: tuple[str, ...] = DIFFICULTIES, player_policy: str = "random",
+                      seed: Optional[int] = None, max_rounds: int = DEFAULT_MAX_ROUNDS) -> MatchupTable:
+    """
+    Simulate `battles_per_matchup` battles for every (player species, enemy species, difficulty)
+    combination, stepping all of them one round at a time.
+    The player attacks every turn, either with a random move or always the strongest one.
+    """
+    _require_numpy()
+    if player_policy not in PLAYER_POLICIES:
+        raise ValueError(f"Unknown player policy: {player_policy}")
+    species = list(pokedex) if species is None else list(species)
+    rng = np.random.default_rng(seed)
+    config = CONFIG.snapshot # one snapshot for the whole run, like a battle
+
+    damage, move_count = build_damage_table(species, config)
+    n_species, max_moves = len(species), damage.shape[2]
+    base_damage = np.zeros((n_species, max_moves))
+    max_health = np.array([Pokemon(name).max_health for name in species], dtype=np.int64)
+    for s, name in enumerate(species):
+        for m, attack in enumerate(pokedex[name]["attacks"]):
+            base_damage[s, m] = attack["damage"]
+    valid = np.arange(max_moves)[None, :] < move_count[:, None]
+
+    # Per-species cumulative move probabilities for each kind of move choice
+    uniform_cum = _cumulative(np.ones_like(base_damage), valid)
+    weak_cum = _cumulative(1.0 / np.where(valid, base_damage, 1.0), valid)    # EasyAI favors weaker attacks
+    strong_cum = _cumulative(base_damage, valid)                               # HardAI favors stronger attacks
+    strongest_move = np.argmax(np.where(valid, base_damage, -1.0), axis=1)
+
+    # One row per simulated battle
+    grid = np.indices((n_species, n_species, len(difficulties))).reshape(3, -1)
+    player_s = np.repeat(grid[0], battles_per_matchup)
+    enemy_s = np.repeat(grid[1], battles_per_matchup)
+    difficulty = np.repeat(np.array([DIFFICULTIES.index(d) for d in difficulties])[grid[2]], battles_per_matchup)
+    n = player_s.size
+
+    player_hp = max_health[player_s].copy()
+    enemy_hp = max_health[enemy_s].copy()
+    enemy_max = max_health[enemy_s]
+    used_dodge = np.zeros(n, dtype=bool)   # shared dodge flag, like PokemonBattleManager
+    active = np.ones(n, dtype=bool)
+    won = np.zeros(n, dtype=bool)
+    lost = np.zeros(n, dtype=bool)
+    turns = np.zeros(n, dtype=np.int64)
+
+    is_easy = difficulty == DIFFICULTIES.index("easy")
+    is_medium = difficulty == DIFFICULTIES.index("medium")
+    is_hard = difficulty == DIFFICULTIES.index("hard")
+
+    for _ in range(max_rounds):
+        rows = np.flatnonzero(active)
+        if rows.size == 0:
+            break
+
+        # ---- Player turn ----
+        ps, es = player_s[rows], enemy_s[rows]
+        if player_policy == "strongest":
+            move = strongest_move[ps]
+        else:
+            move = _sample(uniform_cum[ps], rng.random(rows.size), move_count[ps])
+        enemy_dodged = used_dodge[rows] & (rng.random(rows.size) < config.opponent_chance_to_dodge)
+        hit = np.where(enemy_dodged, 0, damage[ps, es, move])
+        enemy_hp[rows] = np.maximum(0, enemy_hp[rows] - hit)
+        used_dodge[rows] = False
+        turns[rows] += 1
+
+        fainted = enemy_hp[rows] <= 0
+        won[rows[fainted]] = True
+        active[rows[fainted]] = False
+        rows = rows[~fainted]
+        if rows.size == 0:
+            break
+
+        # ---- Enemy turn ----
+        ps, es = player_s[rows], enemy_s[rows]
+        easy, medium, hard = is_easy[rows], is_medium[rows], is_hard[rows]
+        u_first, u_second, u_move = rng.random(rows.size), rng.random(rows.size), rng.random(rows.size)
+        low_hp = enemy_hp[rows] / enemy_max[rows] < HardAI.LOW_HP_RATIO
+        dodge = (
+            (easy & (u_first < EasyAI.DODGE_CHANCE)) |
+            (medium & (u_first < MediumAI.DODGE_CHANCE)) |
+            (hard & ((low_hp & (u_first < HardAI.LOW_HP_DODGE_CHANCE)) | (u_second < HardAI.DODGE_CHANCE)))
+        )
+        cumulative = np.where(easy[:, None], weak_cum[es], np.where(medium[:, None], uniform_cum[es], strong_cum[es]))
+        move = _sample(cumulative, u_move, move_count[es])
+
+        player_dodged = used_dodge[rows] & (rng.random(rows.size) < config.player_chance_to_dodge)
+        attacks = ~dodge
+        hit = np.where(attacks & ~player_dodged, damage[es, ps, move], 0)
+        player_hp[rows] = np.maximum(0, player_hp[rows] - hit)
+        used_dodge[rows] = np.where(attacks, False, True)
+
+        fainted = player_hp[rows] <= 0
+        lost[rows[fainted]] = True
+        active[rows[fainted]] = False
+
+    shape = (n_species, n_species, len(difficulties), battles_per_matchup)
+    return MatchupTable(
+        species, tuple(difficulties),
+        won.reshape(shape).mean(axis=3),
+        lost.reshape(shape).mean(axis=3),
+        turns.reshape(shape).mean(axis=3),
+        battles_per_matchup
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate win probabilities for every pokedex matchup.")
+    parser.add_argument("--battles", type=int, default=1000, help="battles per matchup and difficulty")
+    parser.add_argument("--policy", choices=PLAYER_POLICIES, default="random", help="player move choice")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = estimate_matchups(args.battles, player_policy=args.policy, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    total = len(table.species) ** 2 * len(table.difficulties) * args.battles
+
+    for difficulty in table.difficulties:
+        print(f"== {difficulty} ==")
+        for player in table.species:
+            cells = [f"{table.win_probability(player, enemy, difficulty):.2f}" for enemy in table.species]
+            print(f"{player:>10} " + " ".join(cells))
+    print(f"{total} battles in {elapsed:.2f}s ({total / elapsed:,.0f} battles/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import atexit
+from collections import OrderedDict
+from typing import Optional, Union
+from .pokemon import Pokemon
+from .bag import Bag, BagView, PotionCompartment, PokeballCompartment
+from .battle_journal import recover_player, discard_player
+
+# Number of players whose live objects are kept in memory before the least recently used is evicted
+DEFAULT_SESSION_CAPACITY = 256
+
+
+class PlayerSession:
+    """
+    Holds the live active Pokemon and Bag of one player.
+    Objects are deserialized from player state on first use and shared by every caller
+    (battles, keybinds, NPCs, pressure plates). Changes are only written back to player
+    state by flush(), and only for the parts that were marked as changed.
+    """
+    ACTIVE_POKEMON = "active_pokemon"
+    BAG = "bag"
+    # Bag sections add_item can change on their own
+    ITEM_COMPARTMENTS = {"potions": PotionCompartment, "pokeballs": PokeballCompartment}
+
+    def __init__(self, player):
+        self.__player = player
+        self.__active_pokemon: Optional[Pokemon] = None
+        self.__bag: Optional[Bag] = None
+        self.__dirty: set[str] = set()
+
+    def get_player(self):
+        return self.__player
+
+    def get_active_pokemon(self) -> Optional[Pokemon]:
+        """Return the live active Pokemon, or None if the player has not chosen one."""
+        if self.__active_pokemon is None:
+            data = self.__player.get_state(self.ACTIVE_POKEMON, None)
+            if not data:
+                return None
+            self.__active_pokemon = Pokemon.from_list(data)
+        return self.__active_pokemon
+
+    def set_active_pokemon(self, pokemon: Pokemon) -> None:
+        self.__active_pokemon = pokemon
+        self.__dirty.add(self.ACTIVE_POKEMON)
+
+    def get_bag(self) -> Optional[Bag]:
+        """Return the live bag, or None if the player does not have one yet."""
+        if self.__bag is None:
+            data = self.__player.get_state(self.BAG, None)
+            if not data:
+                return None
+            self.__bag = Bag.from_dict(data)
+        return self.__bag
+
+    def get_bag_view(self) -> Optional[Union[Bag, BagView]]:
+        """
+        Return the bag for reading only: the live bag if it is already loaded, otherwise a
+        BagView over player state, so looking at the bag never deserializes the roster.
+        """
+        if self.__bag is not None:
+            return self.__bag
+        data = self.__player.get_state(self.BAG, None)
+        return BagView(data) if data else None
+
+    def set_bag(self, bag: Bag) -> None:
+        if bag is not self.__bag:
+            bag.mark_dirty() # a different bag replaces the saved one, so every compartment is written
+        self.__bag = bag
+        self.__dirty.add(self.BAG)
+
+    def add_item(self, section: str, item) -> None:
+        """
+        Add a potion or Pokeball to the "potions" or "pokeballs" section of the bag and write that
+        section to player state right away. A loaded bag takes it in memory too; otherwise only that
+        section of the saved bag is read, so the roster is never deserialized for a pickup.
+        """
+        stored = self.__player.get_state(self.BAG, None)
+        if self.__bag is not None:
+            compartment = getattr(self.__bag, section)
+            compartment.add(item)
+            stored = stored or self.__bag.to_dict()
+        else:
+            stored = stored or Bag().to_dict()
+            compartment = self.ITEM_COMPARTMENTS[section]()
+            compartment.from_dict(stored.get(section, {}))
+            compartment.add(item)
+        self.__player.set_state(self.BAG, {**stored, section: compartment.to_dict()})
+        compartment.clear_dirty()
+
+    def mark_dirty(self, key: str) -> None:
+        """
+        Record that a live object was changed in place and needs to be written back.
+        Bag compartments track their own changes; marking the bag here writes all of it.
+        """
+        if key == self.BAG and self.__bag is not None:
+            self.__bag.mark_dirty()
+        self.__dirty.add(key)
+
+    def is_dirty(self) -> bool:
+        return bool(self.__dirty) or (self.__bag is not None and self.__bag.is_dirty())
+
+    def flush(self) -> None:
+        """Write changed objects back to player state. Only the changed compartments of the bag are rebuilt."""
+        if self.ACTIVE_POKEMON in self.__dirty and self.__active_pokemon is not None:
+            self.__player.set_state(self.ACTIVE_POKEMON, self.__active_pokemon.to_list())
+        if self.__bag is not None and self.__bag.is_dirty():
+            stored = self.__player.get_state(self.BAG, None)
+            self.__player.set_state(self.BAG, self.__bag.merge_into(stored))
+            self.__bag.clear_dirty()
+        self.__dirty.clear()
+
+
+class SessionCache:
+    """
+    LRU cache of player sessions by player name. Sessions are flushed before they are dropped:
+    when evicted, when the player comes back with a new player object, on close() and at exit.
+    """
+    def __init__(self, capacity: int = DEFAULT_SESSION_CAPACITY):
+        self.capacity = capacity
+        self.__sessions: OrderedDict[str, PlayerSession] = OrderedDict()
+
+    def get(self, player) -> PlayerSession:
+        """Return the session of a player, creating it if needed."""
+        key = player.get_name()
+        session = self.__sessions.get(key)
+        if session is not None:
+            if session.get_player() is player:
+                self.__sessions.move_to_end(key)
+                return session
+            # The player reconnected as a new object: save the old session before loading theirs again
+            del self.__sessions[key]
+            session.flush()
+
+        recover_player(player) # battles cut off by a restart are written into player state before it is loaded
+        session = PlayerSession(player)
+        self.__sessions[key] = session
+        while len(self.__sessions) > self.capacity:
+            _, evicted = self.__sessions.popitem(last=False)
+            evicted.flush()
+        return session
+
+    def close(self, player) -> None:
+        """Flush and drop a player's session, when they log out."""
+        session = self.__sessions.pop(player.get_name(), None)
+        if session is not None:
+            session.flush()
+
+    def invalidate(self, player) -> None:
+        """
+        Drop a session without flushing it, used when player state was replaced directly.
+        Battles the journal kept for the player are dropped too, so they aren't recovered into the new state.
+        """
+        self.__sessions.pop(player.get_name(), None)
+        discard_player(player)
+
+    def flush_all(self) -> None:
+        for session in self.__sessions.values():
+            session.flush()
+
+    def __len__(self) -> int:
+        return len(self.__sessions)
+
+    def __contains__(self, player) -> bool:
+        session = self.__sessions.get(player.get_name())
+        return session is not None and session.get_player() is player
+
+
+# Sessions shared by battle_manager, custom_keybinds, custom_NPCs and custom_pressure_plates
+SESSIONS = SessionCache()
+# Whatever the sessions still hold is written back when the server shuts down
+atexit.register(SESSIONS.flush_all)
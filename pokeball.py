@@ -2,6 +2,7 @@ import random
 from typing import Optional, Dict, Any
 from .pokemon import Pokemon
 from .items import Item
+from .game_config import CONFIG, GameConfig
 
 class Pokeball(Item):
     
@@ -20,12 +21,14 @@ class Pokeball(Item):
         """Get the catch rate of the Pokéball"""
         return int(self.catch_rate * 100)
     
-    def use(self, pokemon) -> bool:
-        """Using pokeball to catch a wild pokemon
+    def use(self, pokemon, rng=random, config: Optional[GameConfig] = None) -> bool:
+        """Using pokeball to catch a wild pokemon, rolling with rng (the battle's random stream)
+        In a battle, the catch rate comes from the battle's config snapshot.
         Returns: true if the pokemon is caught, false otherwise
         """
+        catch_rate = config.catch_rates.get(self.name, self.catch_rate) if config else self.catch_rate
         health_factor = pokemon.current_health / pokemon.max_health
-        success = random.random() < self.catch_rate * (1 - health_factor)
+        success = rng.random() < catch_rate * (1 - health_factor)
         if success:
             self.captured_pokemon = pokemon
             return True
@@ -90,22 +93,22 @@ class Pokeball(Item):
 class RegularPokeball(Pokeball):
     """Standard Pokeball with basic catch rate"""
     def __init__(self):
-        super().__init__("Pokeball", 0.5)
+        super().__init__("Pokeball", CONFIG.snapshot.catch_rates["Pokeball"])
 
 
 class GreatBall(Pokeball):
     """Great Ball with improved catch rate"""
     def __init__(self):
-        super().__init__("Great Ball", 0.7)
+        super().__init__("Great Ball", CONFIG.snapshot.catch_rates["Great Ball"])
 
 
 class UltraBall(Pokeball):
     """Ultra Ball with high catch rate"""
     def __init__(self):
-        super().__init__("Ultra Ball", 0.85)
+        super().__init__("Ultra Ball", CONFIG.snapshot.catch_rates["Ultra Ball"])
 
 
 class MasterBall(Pokeball):
     """Master Ball with 100% catch rate"""
     def __init__(self):
-        super().__init__("Master Ball", 1.0)
+        super().__init__("Master Ball", CONFIG.snapshot.catch_rates["Master Ball"])
@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 from enum import Enum
 """A dictionary containing all information of individual Pokemons"""
 class PokemonType(Enum):
@@ -5,6 +6,13 @@ class PokemonType(Enum):
     WATER = "Water"
     GRASS = "Grass"
 
+# Types each type has an advantage against (any pairing not listed is neutral)
+type_advantages = {
+    PokemonType.FIRE: [PokemonType.GRASS],
+    PokemonType.WATER: [PokemonType.FIRE],
+    PokemonType.GRASS: [PokemonType.WATER]
+}
+
 first_evolution_map = {
     "Charmander": "Charmeleon",
     "Squirtle": "Wartortle",
@@ -23,7 +31,8 @@ second_evolution_map = {
     "Grotle": "Torterra"
 }
 
-pokedex = {
+# Species shipped with the game, used unless a data file is loaded (see pokedex_file.py)
+BUILTIN_POKEDEX = {
     "Charmander": {
         "name": "Charmander",
         "max_health": 50,
@@ -241,3 +250,52 @@ pokedex = {
         ]
     }
 }
+
+# Evolution maps of the built-in species, restored by Pokedex.use_builtin()
+BUILTIN_EVOLUTIONS = (dict(first_evolution_map), dict(second_evolution_map))
+
+
+class Pokedex(Mapping):
+    """
+    Species data by name, read like the dict it used to be.
+    Backed by BUILTIN_POKEDEX unless use() switches it to other entries, such as a lazily
+    loaded data file. Switching also refills first_evolution_map and second_evolution_map
+    in place, so code holding those dicts sees the new species.
+    """
+    def __init__(self, entries: Mapping):
+        self.__entries = entries
+        self.__listeners = [] # called after the entries are replaced, to drop anything built from the old ones
+
+    def __getitem__(self, name: str) -> dict:
+        return self.__entries[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self.__entries
+
+    def __iter__(self):
+        return iter(self.__entries)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get_entries(self) -> Mapping:
+        return self.__entries
+
+    def add_listener(self, callback) -> None:
+        self.__listeners.append(callback)
+
+    def use(self, entries: Mapping, first_evolutions: dict[str, str], second_evolutions: dict[str, str]) -> None:
+        """Replace the species data and evolution maps."""
+        self.__entries = entries
+        first_evolution_map.clear()
+        first_evolution_map.update(first_evolutions)
+        second_evolution_map.clear()
+        second_evolution_map.update(second_evolutions)
+        for callback in self.__listeners:
+            callback()
+
+    def use_builtin(self) -> None:
+        self.use(BUILTIN_POKEDEX, *BUILTIN_EVOLUTIONS)
+
+
+pokedex = Pokedex(BUILTIN_POKEDEX)
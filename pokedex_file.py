@@ -0,0 +1,137 @@
+"""
+Species data loaded from a JSON-lines file instead of the table in pokedex.py.
+Each line of the file is one species:
+    {"name": "Charmander", "type": "FIRE", "max_health": 50, "level": 1, "xp": 0,
+     "attacks": [{"name": "Scratch", "damage": 10}, ...], "evolves_to": "Charmeleon"}
+An index file next to it holds the byte offset of every species and the evolution links,
+so opening the file reads only the index and a species is parsed the first time it is used.
+Parsed species are kept in a bounded LRU cache.
+Load with load_pokedex_file(path); Pokemon, PokemonFactory and the evolution maps then use it.
+"""
+import json
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Iterable, Optional
+from .pokedex import PokemonType, pokedex
+
+INDEX_SUFFIX = ".index"
+INDEX_VERSION = 1
+
+# Parsed species kept in memory at once
+DEFAULT_CACHE_SIZE = 512
+
+
+def write_pokedex_file(path: str, entries: Iterable[dict], evolutions: Optional[dict[str, str]] = None) -> None:
+    """Write pokedex-style entries (with PokemonType or type names) and their index."""
+    evolutions = evolutions or {}
+    with open(path, "w", encoding="utf-8") as file:
+        for data in entries:
+            line = dict(data)
+            if isinstance(line["type"], PokemonType):
+                line["type"] = line["type"].name
+            if data["name"] in evolutions:
+                line["evolves_to"] = evolutions[data["name"]]
+            file.write(json.dumps(line, separators=(",", ":")) + "\n")
+    build_index(path)
+
+
+def build_index(path: str) -> dict:
+    """Scan the data file once and write its index, returning it."""
+    offsets: dict[str, int] = {}
+    evolutions: dict[str, str] = {}
+    with open(path, "rb") as file:
+        offset = 0
+        for line in file:
+            if line.strip():
+                data = json.loads(line)
+                offsets[data["name"]] = offset
+                if data.get("evolves_to"):
+                    evolutions[data["name"]] = data["evolves_to"]
+            offset += len(line)
+    stat = os.stat(path)
+    index = {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+             "offsets": offsets, "evolutions": evolutions}
+    with open(path + INDEX_SUFFIX, "w", encoding="utf-8") as file:
+        json.dump(index, file, separators=(",", ":"))
+    return index
+
+
+def read_index(path: str) -> dict:
+    """Return the index of a data file, rebuilding it if it is missing or older than the file."""
+    stat = os.stat(path)
+    try:
+        with open(path + INDEX_SUFFIX, encoding="utf-8") as file:
+            index = json.load(file)
+        if (index.get("version"), index.get("size"), index.get("mtime_ns")) == (INDEX_VERSION, stat.st_size, stat.st_mtime_ns):
+            return index
+    except (OSError, ValueError):
+        pass
+    return build_index(path)
+
+
+class LazyPokedex(Mapping):
+    """Read-only mapping of species name to pokedex entry, parsed from the data file on first access."""
+    def __init__(self, path: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        index = read_index(path)
+        self.__offsets: dict[str, int] = index["offsets"]
+        self.__evolutions: dict[str, str] = index["evolutions"]
+        self.__cache: OrderedDict[str, dict] = OrderedDict()
+        self.__file = open(path, "rb")
+
+    def __getitem__(self, name: str) -> dict:
+        data = self.__cache.get(name)
+        if data is not None:
+            self.__cache.move_to_end(name)
+            return data
+        offset = self.__offsets[name] # KeyError for unknown species, like a dict
+        self.__file.seek(offset)
+        data = json.loads(self.__file.readline())
+        data["type"] = PokemonType[data["type"]]
+        data.pop("evolves_to", None)
+        self.__cache[name] = data
+        if len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+        return data
+
+    def __contains__(self, name) -> bool:
+        return name in self.__offsets
+
+    def __iter__(self):
+        return iter(self.__offsets)
+
+    def __len__(self) -> int:
+        return len(self.__offsets)
+
+    def evolution_maps(self) -> tuple[dict[str, str], dict[str, str]]:
+        """
+        Split the evolution links into the first and second evolution maps of pokedex.py:
+        species that evolve from another species are in the second map.
+        """
+        evolved = set(self.__evolutions.values())
+        first = {name: to for name, to in self.__evolutions.items() if name not in evolved}
+        second = {name: to for name, to in self.__evolutions.items() if name in evolved}
+        return first, second
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+def load_pokedex_file(path: str, cache_size: int = DEFAULT_CACHE_SIZE) -> LazyPokedex:
+    """Switch the game's pokedex to the species in a data file."""
+    entries = LazyPokedex(path, cache_size)
+    previous = pokedex.get_entries()
+    pokedex.use(entries, *entries.evolution_maps())
+    if isinstance(previous, LazyPokedex):
+        previous.close()
+    return entries
+
+
+def unload_pokedex_file() -> None:
+    """Switch back to the species built into pokedex.py."""
+    previous = pokedex.get_entries()
+    pokedex.use_builtin()
+    if isinstance(previous, LazyPokedex):
+        previous.close()
@@ -1,40 +1,49 @@
 from typing import Dict, List, Optional, Any
 from .pokedex import *
+from .species_registry import SPECIES_REGISTRY, BASE_STAGE, SECOND_STAGE, FINAL_STAGE
+from .game_config import CONFIG, DEFAULTS, GameConfig
+from .record_validation import check_pokemon
 from .observers import HealthObserver
 
-# Constants
+# Default values, the values in use come from game_config snapshots
 class GameConstants:
-    BASE_XP_THRESHOLDD = 30
-    SECOND_XP_THRESHOLD = 60
+    BASE_XP_THRESHOLDD = DEFAULTS["base_xp_threshold"]
+    SECOND_XP_THRESHOLD = DEFAULTS["second_xp_threshold"]
     
-    BASE_HEALTH_INCREASE = 10
-    SECOND_HEALTH_INCREASE = 15
+    BASE_HEALTH_INCREASE = DEFAULTS["base_health_increase"]
+    SECOND_HEALTH_INCREASE = DEFAULTS["second_health_increase"]
     
-    BASE_ATTACK_INCREASE = 5
-    SECOND_ATTACK_INCREASE = 4
+    BASE_ATTACK_INCREASE = DEFAULTS["base_attack_increase"]
+    SECOND_ATTACK_INCREASE = DEFAULTS["second_attack_increase"]
     
-    EVOLUTION_LEVEL_THRESHOLD = 4
+    EVOLUTION_LEVEL_THRESHOLD = DEFAULTS["evolution_level_threshold"]
+    
+    # Multiplier applied when the attacker has a type advantage, by evolution level
+    ADVANTAGE_MULTIPLIERS = DEFAULTS["advantage_multipliers"]
+
+
+# Position of each type in the type chart of a GameConfig
+TYPE_INDEX = {p_type: i for i, p_type in enumerate(PokemonType)}
 
 class TypeAdvantageCalculator:
     @staticmethod
-    def calculate_multiplier(attacker_type, defender_type, evolution_level: int = 1):
+    def calculate_multiplier(attacker_type, defender_type, evolution_level: int = 1, config: Optional[GameConfig] = None):
         """
         Returns the type effectiveness multiplier based on attacker and defender types.
         Multiplier increases with evolution level if the attacker has a type advantage.
+        Uses the battle's config snapshot if given, otherwise the current one.
         """
-        if evolution_level == 1:  
-            advantage = 1.4
-        elif evolution_level == 2: 
-            advantage = 1.65
-        elif evolution_level == 3: 
-            advantage = 2.0
-            
-        if ((attacker_type == PokemonType.FIRE and defender_type == PokemonType.GRASS) or
-            (attacker_type == PokemonType.WATER and defender_type == PokemonType.FIRE) or
-            (attacker_type == PokemonType.GRASS and defender_type == PokemonType.WATER)):
-            return advantage
-        
-        return 1.0
+        config = config or CONFIG.snapshot
+        if not 1 <= evolution_level <= len(config.advantage_multipliers):
+            raise ValueError(f"Unknown evolution level: {evolution_level}")
+        return config.type_chart[TYPE_INDEX[attacker_type]][TYPE_INDEX[defender_type]][evolution_level - 1]
+
+    @staticmethod
+    def damage_vector(attacker, defender, config: Optional[GameConfig] = None) -> list[int]:
+        """Returns the damage each of the attacker's moves would deal to the defender."""
+        multiplier = TypeAdvantageCalculator.calculate_multiplier(
+            attacker.p_type, defender.p_type, attacker.evolution_state.get_evo_level(), config)
+        return [int(attack["damage"] * multiplier) for attack in attacker.known_attacks]
 
 #Using state pattern for handing evolution  
 class EvolutionState:
@@ -45,18 +54,19 @@ class EvolutionState:
     def get_evo_level(self):
         return self.evolution_level
     
-    def get_xp_threshold(self) -> int:
-        return GameConstants.BASE_XP_THRESHOLDD
+    # Values come from the given config snapshot (a battle's), or the current one
+    def get_xp_threshold(self, config: Optional[GameConfig] = None) -> int:
+        return (config or CONFIG.snapshot).base_xp_threshold
     
-    def get_type_multiplier(self, attacker_type, defender_type):
+    def get_type_multiplier(self, attacker_type, defender_type, config: Optional[GameConfig] = None):
         return TypeAdvantageCalculator.calculate_multiplier(
-            attacker_type, defender_type, self.evolution_level)
+            attacker_type, defender_type, self.evolution_level, config)
     
-    def hp_increase(self):
-        return GameConstants.BASE_HEALTH_INCREASE
+    def hp_increase(self, config: Optional[GameConfig] = None):
+        return (config or CONFIG.snapshot).base_health_increase
     
-    def attack_increase(self):
-        return GameConstants.BASE_ATTACK_INCREASE
+    def attack_increase(self, config: Optional[GameConfig] = None):
+        return (config or CONFIG.snapshot).base_attack_increase
     
     def get_next_evolution(self, pokemon_name: str) -> Optional[str]:
         return None 
@@ -74,14 +84,14 @@ class SecondEvolutionState(EvolutionState):
     def __init__(self):
         super().__init__(level=2)
     
-    def hp_increase(self):
-        return GameConstants.SECOND_HEALTH_INCREASE
+    def hp_increase(self, config: Optional[GameConfig] = None):
+        return (config or CONFIG.snapshot).second_health_increase
     
-    def attack_increase(self):
-        return GameConstants.SECOND_ATTACK_INCREASE
+    def attack_increase(self, config: Optional[GameConfig] = None):
+        return (config or CONFIG.snapshot).second_attack_increase
     
-    def get_xp_threshold(self):
-        return GameConstants.SECOND_XP_THRESHOLD
+    def get_xp_threshold(self, config: Optional[GameConfig] = None):
+        return (config or CONFIG.snapshot).second_xp_threshold
     
     def get_next_evolution(self, pokemon_name: str) -> Optional[str]:
         return second_evolution_map.get(pokemon_name)
@@ -91,38 +101,56 @@ class FinalEvolutionState(EvolutionState):
     def __init__(self):
         super().__init__(level=3)
     
-    def hp_increase(self) -> int:
-        return GameConstants.SECOND_HEALTH_INCREASE
+    def hp_increase(self, config: Optional[GameConfig] = None) -> int:
+        return (config or CONFIG.snapshot).second_health_increase
     
-    def attack_increase(self) -> int:
-        return GameConstants.SECOND_ATTACK_INCREASE
+    def attack_increase(self, config: Optional[GameConfig] = None) -> int:
+        return (config or CONFIG.snapshot).second_attack_increase
     
     def get_next_evolution(self, pokemon_name: str) -> Optional[str]:
         # Final evolution, so no next evolution
         return None
 
+# Saved evolution state names, as written by Pokemon.to_list
+EVOLUTION_STATE_CLASSES = {
+    "BaseEvolutionState": BaseEvolutionState,
+    "SecondEvolutionState": SecondEvolutionState,
+    "FinalEvolutionState": FinalEvolutionState
+}
+
+# Evolution state of each species_registry stage
+STAGE_EVOLUTION_CLASSES = {
+    BASE_STAGE: BaseEvolutionState,
+    SECOND_STAGE: SecondEvolutionState,
+    FINAL_STAGE: FinalEvolutionState
+}
+
+def saved_type(name: str, p_type: str) -> PokemonType:
+    """Type of a saved Pokemon: the saved type name, or its species' type if the name is unknown."""
+    if p_type in PokemonType.__members__:
+        return PokemonType[p_type]
+    species = SPECIES_REGISTRY.get(name)
+    if species is None:
+        raise ValueError(f"{name} not found in the Pokedex.")
+    return species.p_type
+
 class Pokemon:
     def __init__(self, name: str):
-        """Initialize a Pokémon with its data from the Pokedex."""
-        data = pokedex.get(name)
-        if not data:
+        """Initialize a Pokémon with its species data from the registry."""
+        species = SPECIES_REGISTRY.get(name)
+        if species is None:
             raise ValueError(f"{name} not found in the Pokedex.")
 
-        self.name = data['name']
-        self.max_health = int(data['max_health'])
+        self.name = species.name
+        self.max_health = species.max_health
         self.current_health = self.max_health
-        self.p_type = data['type']
-        self.level = int(data['level'])
-        self.xp = int(data['xp'])
-        self.known_attacks = data['attacks'][:]
+        self.p_type = species.p_type
+        self.level = species.level
+        self.xp = species.xp
+        self.known_attacks = SPECIES_REGISTRY.new_attacks(species) # own dicts, so level-ups don't change the species
+        self._move_damages: Optional[tuple[int, ...]] = None # cached by get_move_damages until a level-up
         self._observers: list[HealthObserver] = []  # Health observer list
-
-        if name in ["Charmander", "Squirtle", "Bulbasaur", "Chimchar", "Piplup", "Turtwig"]:
-            self.evolution_state = BaseEvolutionState()
-        elif name in ["Charmeleon", "Wartortle", "Ivysaur", "Monferno", "Prinplup", "Grotle"]:
-            self.evolution_state = SecondEvolutionState()
-        elif name in ["Charizard", "Blastoise", "Venusaur", "Infernape", "Empoleon", "Torterra"]:
-            self.evolution_state = FinalEvolutionState()
+        self.evolution_state = STAGE_EVOLUTION_CLASSES[species.stage]()
 
 
     def __getstate__(self):
@@ -140,6 +168,11 @@ class Pokemon:
         """Register a new observer that will be notified on health changes."""
         self._observers.append(observer)
 
+    def remove_observer(self, observer: HealthObserver):
+        """Unregister an observer so it no longer receives health changes."""
+        if observer in self._observers:
+            self._observers.remove(observer)
+
     def notify_observers(self, old_hp: int, new_hp: int):
         """Notify all registered observers of a health change."""
         for observer in self._observers:
@@ -155,8 +188,11 @@ class Pokemon:
         self.current_health = max(0, self.current_health - damage)
         self.notify_observers(old_hp, self.current_health)
 
-    def attack(self, attack_index, target):
-        """Attack another Pokémon using a selected move and calculate results."""
+    def attack(self, attack_index, target, config: Optional[GameConfig] = None):
+        """
+        Attack another Pokémon using a selected move and calculate results.
+        config is the battle's snapshot of game values (the current one if not given).
+        """
         if self.is_fainted():
             return {"success": False, "message": f"{self.name} is fainted and cannot attack!"}
 
@@ -164,7 +200,7 @@ class Pokemon:
         base_damage = attack["damage"]
 
         # Calculate damage multiplier based on evolution state
-        multiplier = self.evolution_state.get_type_multiplier(self.p_type, target.p_type)
+        multiplier = self.evolution_state.get_type_multiplier(self.p_type, target.p_type, config)
         final_damage = int(base_damage * multiplier)
 
         target.take_damage(final_damage)
@@ -179,31 +215,39 @@ class Pokemon:
 
         if target.is_fainted():
             self.xp += 10 * target.evolution_state.get_evo_level() # XP gained from beating pokemon scale based on evolution level
-            evolved_pokemon = self.level_up_check()
+            evolved_pokemon = self.level_up_check(config)
             if evolved_pokemon:
                 result["evolved"] = evolved_pokemon
 
         return result
 
-    def level_up_check(self):
+    def get_move_damages(self) -> tuple[int, ...]:
+        """Base damage of each known attack. The enemy AIs key their move tables on it."""
+        if self._move_damages is None:
+            self._move_damages = tuple(attack["damage"] for attack in self.known_attacks)
+        return self._move_damages
+
+    def level_up_check(self, config: Optional[GameConfig] = None):
         """Check if the Pokémon should level up and evolve."""
         if isinstance(self.evolution_state, FinalEvolutionState):
             # Final form — no more level-ups
             return None
 
-        if self.xp >= self.evolution_state.get_xp_threshold():
+        config = config or CONFIG.snapshot
+        if self.xp >= self.evolution_state.get_xp_threshold(config):
             self.xp = 0
             self.level += 1
 
-            hp_increase = self.evolution_state.hp_increase()
-            attack_increase = self.evolution_state.attack_increase()
+            hp_increase = self.evolution_state.hp_increase(config)
+            attack_increase = self.evolution_state.attack_increase(config)
 
             self.max_health += hp_increase
             self.current_health = self.max_health
             for attack in self.known_attacks:
                 attack["damage"] += attack_increase
+            self._move_damages = None
 
-            if self.level == GameConstants.EVOLUTION_LEVEL_THRESHOLD:
+            if self.level == config.evolution_level_threshold:
                 next_evolution = self.evolution_state.get_next_evolution(self.name)
                 if next_evolution:
                     return self.evolve(next_evolution)
@@ -223,9 +267,7 @@ class Pokemon:
         return evolved_pokemon
     
     def to_list(self) -> list:
-        """ For testing purposes"""
-        print(self.p_type.name)
-        print(type(self.p_type.name))
+        """Serialize to a list of primitive values for player state."""
         return [
             self.name,
             self.max_health,
@@ -238,29 +280,33 @@ class Pokemon:
         ]
 
     @staticmethod
-    def from_list(data: list) -> 'Pokemon':
-        """Deserialize a Pokémon from a saved list."""
+    def from_list(data: list, validate: bool = True) -> 'Pokemon':
+        """
+        Deserialize a Pokémon from a saved list.
+        The object is built straight from the saved fields instead of being created from
+        the pokedex and then overwritten. The record is checked first and a malformed one
+        raises record_validation.RecordError (a ValueError) naming the bad fields.
+        """
+        if validate:
+            check_pokemon(data, "pokemon")
         name, max_health, current_health, p_type, level, xp, known_attacks, evo_class = data
-        poke = Pokemon(name)
+        species = SPECIES_REGISTRY.get(name)
+        if species is None:
+            raise ValueError(f"{name} not found in the Pokedex.")
+
+        poke = Pokemon.__new__(Pokemon)
+        poke.name = name
         poke.max_health = max_health
         poke.current_health = current_health
-        # Manually assign enum based on string
-        if p_type == "FIRE":
-            poke.p_type = PokemonType.FIRE
-        elif p_type == "WATER":
-            poke.p_type = PokemonType.WATER
-        elif p_type == "GRASS":
-            poke.p_type = PokemonType.GRASS
+        poke.p_type = saved_type(name, p_type)
         poke.level = level
         poke.xp = xp
         poke.known_attacks = known_attacks
-        if evo_class == "BaseEvolutionState":
-            poke.evolution_state = BaseEvolutionState()
-        elif evo_class == "SecondEvolutionState":
-            poke.evolution_state = SecondEvolutionState()
-        elif evo_class == "FinalEvolutionState":
-            poke.evolution_state = FinalEvolutionState()
-            
+        poke._move_damages = None
+        poke._observers = []
+
+        state_class = EVOLUTION_STATE_CLASSES.get(evo_class) or STAGE_EVOLUTION_CLASSES[species.stage]
+        poke.evolution_state = state_class()
         return poke
 
 
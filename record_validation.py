@@ -0,0 +1,218 @@
+"""
+Validation of stored player-state records (the active Pokemon and the bag).
+The checks are built once into plain functions over lookup tables (species, compartment
+keys, roster capacity), so a record is checked in a single pass
+and cheaply enough to do on every load. A malformed record is then reported when it is
+loaded, with the path of each bad field, instead of failing inside a battle.
+
+Run over an exported state dump (JSON lines of {"player": name, "state": {...}}) with:
+    python -m pengumon.record_validation dump.jsonl
+"""
+import argparse
+import json
+from typing import Any, Callable, Iterator, Optional
+from .species_registry import SPECIES_REGISTRY
+
+# Number of fields in a saved Pokemon, see Pokemon.to_list
+POKEMON_FIELDS = 8
+
+
+class RecordError(ValueError):
+    """A stored record failed validation. problems holds one message per bad field."""
+    def __init__(self, path: str, problems: list[str]):
+        super().__init__(f"Invalid {path}: " + "; ".join(problems))
+        self.path = path
+        self.problems = problems
+
+
+def _is_int(value) -> bool:
+    return type(value) is int  # bool is an int subclass but never a valid count
+
+
+def compile_pokemon_validator() -> Callable[[Any, str, list], None]:
+    """Build the check for one saved Pokemon list, appending problems to the given list."""
+    get_species = SPECIES_REGISTRY.get
+
+    def check(data, path: str, problems: list) -> None:
+        if type(data) is not list or len(data) != POKEMON_FIELDS:
+            problems.append(f"{path}: expected a list of {POKEMON_FIELDS} fields")
+            return
+        name, max_health, current_health, p_type, level, xp, attacks, evo_class = data
+
+        species = get_species(name) if type(name) is str else None
+        if species is None:
+            problems.append(f"{path}[0]: unknown species {name!r}")
+        if not _is_int(max_health) or max_health <= 0:
+            problems.append(f"{path}[1]: max health must be a positive int, got {max_health!r}")
+        elif not _is_int(current_health) or not 0 <= current_health <= max_health:
+            problems.append(f"{path}[2]: current health must be an int from 0 to {max_health}, got {current_health!r}")
+        # Unknown type and evolution state names are allowed, from_list falls back to the species defaults
+        if type(p_type) is not str:
+            problems.append(f"{path}[3]: type must be a name, got {p_type!r}")
+        if not _is_int(level) or level < 1:
+            problems.append(f"{path}[4]: level must be an int of at least 1, got {level!r}")
+        if not _is_int(xp) or xp < 0:
+            problems.append(f"{path}[5]: xp must be a non-negative int, got {xp!r}")
+        if type(evo_class) is not str:
+            problems.append(f"{path}[7]: evolution state must be a name, got {evo_class!r}")
+
+        if type(attacks) is not list:
+            problems.append(f"{path}[6]: attacks must be a list")
+            return
+        for i, attack in enumerate(attacks):
+            if (type(attack) is not dict or type(attack.get("name")) is not str
+                    or not _is_int(attack.get("damage")) or attack["damage"] < 0):
+                problems.append(f"{path}[6][{i}]: expected {{'name': str, 'damage': int >= 0}}, got {attack!r}")
+
+    return check
+
+
+def compile_bag_validator(check_pokemon: Optional[Callable[[Any, str, list], None]]) -> Callable[[Any, str, list], None]:
+    """
+    Build the check for a saved bag dict, appending problems to the given list.
+    Without check_pokemon only the roster's length is checked, not the Pokemon in it.
+    """
+    from .bag import Bag, PokemonRoster # bag.py loads Pokemon, which validates with this module
+    empty = Bag()
+    compartment_keys = {"potions": frozenset(empty.potions.to_dict()), "pokeballs": frozenset(empty.pokeballs.to_dict())}
+    sections = frozenset(empty.to_dict())
+    capacity = PokemonRoster.MAX_CAPACITY
+
+    def check(data, path: str, problems: list) -> None:
+        if type(data) is not dict:
+            problems.append(f"{path}: expected a dict")
+            return
+        for section in data.keys() - sections:
+            problems.append(f"{path}.{section}: unknown section")
+
+        for section, keys in compartment_keys.items():
+            counts = data.get(section, {})
+            if type(counts) is not dict:
+                problems.append(f"{path}.{section}: expected a dict of counts")
+                continue
+            for key, count in counts.items():
+                if key not in keys:
+                    problems.append(f"{path}.{section}.{key}: unknown item")
+                elif not _is_int(count) or count < 0:
+                    problems.append(f"{path}.{section}.{key}: count must be a non-negative int, got {count!r}")
+
+        roster = data.get("pokemon", [])
+        if type(roster) is not list:
+            problems.append(f"{path}.pokemon: expected a list")
+            return
+        if len(roster) > capacity:
+            problems.append(f"{path}.pokemon: holds {len(roster)} Pokemon, at most {capacity} fit")
+        if check_pokemon is None:
+            return
+        for i, pokemon in enumerate(roster):
+            check_pokemon(pokemon, f"{path}.pokemon[{i}]", problems)
+
+    return check
+
+
+_check_pokemon = compile_pokemon_validator()
+_bag_validators: dict[bool, Callable[[Any, str, list], None]] = {} # by whether the roster's Pokemon are checked
+
+def _check_bag(data, path: str, problems: list, roster: bool = True) -> None:
+    validator = _bag_validators.get(roster)
+    if validator is None:
+        validator = _bag_validators[roster] = compile_bag_validator(_check_pokemon if roster else None)
+    validator(data, path, problems)
+
+
+def validate_pokemon(data, path: str = "active_pokemon") -> list[str]:
+    """Return the problems of a saved Pokemon list (empty if it is valid)."""
+    problems = []
+    _check_pokemon(data, path, problems)
+    return problems
+
+def validate_bag(data, path: str = "bag") -> list[str]:
+    """Return the problems of a saved bag dict (empty if it is valid)."""
+    problems = []
+    _check_bag(data, path, problems)
+    return problems
+
+def validate_player_state(state: dict) -> list[str]:
+    """Return the problems of the Pokemon and bag records in a player's state."""
+    problems = []
+    if state.get("active_pokemon"):
+        _check_pokemon(state["active_pokemon"], "active_pokemon", problems)
+    if state.get("bag"):
+        _check_bag(state["bag"], "bag", problems)
+    return problems
+
+def check_pokemon(data, path: str = "active_pokemon") -> None:
+    """Raise RecordError if a saved Pokemon list is malformed."""
+    problems = []
+    _check_pokemon(data, path, problems)
+    if problems:
+        raise RecordError(path, problems)
+
+def check_bag(data, path: str = "bag", roster: bool = True) -> None:
+    """
+    Raise RecordError if a saved bag dict is malformed.
+    With roster=False the stored Pokemon are left to Pokemon.from_list, which checks each one.
+    """
+    problems = []
+    _check_bag(data, path, problems, roster)
+    if problems:
+        raise RecordError(path, problems)
+
+
+# ---- Bulk scan ----
+
+class ScanReport:
+    """Result of scanning a state dump."""
+    def __init__(self):
+        self.records = 0
+        self.bad: list[tuple[int, Optional[str], list[str]]] = [] # (line number, player, problems)
+
+    def is_clean(self) -> bool:
+        return not self.bad
+
+
+def iter_dump(path: str) -> Iterator[tuple[int, Optional[str], Any]]:
+    """Yield (line number, player, state) for every line of a state dump."""
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield line_number, None, error
+                continue
+            yield line_number, entry.get("player"), entry.get("state")
+
+
+def scan_dump(path: str) -> ScanReport:
+    """Validate every player state in a dump and collect the bad records."""
+    report = ScanReport()
+    for line_number, player, state in iter_dump(path):
+        report.records += 1
+        if isinstance(state, json.JSONDecodeError):
+            report.bad.append((line_number, player, [f"not JSON: {state}"]))
+        elif type(state) is not dict:
+            report.bad.append((line_number, player, ["state: expected a dict"]))
+        else:
+            problems = validate_player_state(state)
+            if problems:
+                report.bad.append((line_number, player, problems))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the Pokemon and bag records of a player state dump.")
+    parser.add_argument("dump", help="JSON lines of {\"player\": name, \"state\": {...}}")
+    args = parser.parse_args()
+
+    report = scan_dump(args.dump)
+    for line_number, player, problems in report.bad:
+        for problem in problems:
+            print(f"{args.dump}:{line_number} ({player}): {problem}")
+    print(f"{report.records} records, {len(report.bad)} bad")
+    raise SystemExit(0 if report.is_clean() else 1)
+
+
+if __name__ == "__main__":
+    main()
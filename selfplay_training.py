@@ -0,0 +1,297 @@
+"""
+Offline self-play training of an enemy AI policy.
+Pokedex species are played against each other with the rules of PokemonBattleManager for a
+single Pokemon on each side (type-adjusted damage, the shared dodge flag and the config's dodge
+chances), and tabular Q-learning learns the value of each enemy action by
+(enemy species, player species, enemy HP bucket, player HP bucket).
+
+Games are spread over a multiprocessing pool: each round every worker plays a batch of games
+against a snapshot of the table, and the main process applies the updates in a fixed order,
+so a run with a given seed learns the same table with any number of workers. The trainer is
+checkpointed to JSON and picks up where it stopped.
+
+    python -m pengumon.selfplay_training --episodes 200000 --checkpoint training.json --export policy.json
+
+The exported table is loaded by enemyAI.LearnedPolicyAI, e.g.
+    register_ai("learned", lambda: LearnedPolicyAI.load("policy.json"), label="Learned")
+"""
+import argparse
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Optional
+
+from .pokedex import pokedex
+from .pokemon import Pokemon, TypeAdvantageCalculator
+from .game_config import CONFIG, GameConfig
+from .enemyAI import HP_BUCKETS, PLAYER_DODGE_RATE, DODGE_CODE, UNKNOWN_CODE, POLICY_TABLE_VERSION, hp_bucket
+
+CHECKPOINT_VERSION = 1
+
+DEFAULT_ALPHA = 0.1     # learning rate
+DEFAULT_GAMMA = 0.95    # value of the next decision relative to this one
+DEFAULT_EPSILON = 0.1   # chance of a random action while playing
+DEFAULT_GAMES_PER_TASK = 250
+# Tasks played against the same snapshot of the table before it is updated
+DEFAULT_TASKS_PER_ROUND = 8
+DEFAULT_MAX_ROUNDS = 200
+
+# Action index 0 is a dodge, 1 + i is attack i
+DODGE = 0
+
+
+def build_rules(species: list[str], config: Optional[GameConfig] = None) -> dict:
+    """Everything a worker needs to play games, as plain data: damage tables, health and dodge chances."""
+    config = config or CONFIG.snapshot
+    pokemon = [Pokemon(name) for name in species]
+    return {
+        "damage": [[TypeAdvantageCalculator.damage_vector(attacker, defender, config) for defender in pokemon]
+                   for attacker in pokemon],
+        "max_health": [p.max_health for p in pokemon],
+        "player_chance_to_dodge": config.player_chance_to_dodge,
+        "opponent_chance_to_dodge": config.opponent_chance_to_dodge,
+    }
+
+
+# ---- Games (run in the workers) ----
+
+def _greedy(values: list[float], rng: random.Random) -> int:
+    best = max(values)
+    return rng.choice([a for a, value in enumerate(values) if value == best])
+
+
+def play_game(rules: dict, q: dict, enemy: int, player: int, epsilon: float, rng: random.Random,
+              max_rounds: int = DEFAULT_MAX_ROUNDS) -> list[tuple]:
+    """
+    Play one battle, the player moving first as in PokemonBattleManager, and return the enemy's
+    transitions (state, action, reward, next state or None when the battle ended).
+    The player dodges PLAYER_DODGE_RATE of the time and otherwise attacks with a random move or
+    their strongest one, like the players ExpertAI expects.
+    """
+    enemy_damage, player_damage = rules["damage"][enemy][player], rules["damage"][player][enemy]
+    enemy_max, player_max = rules["max_health"][enemy], rules["max_health"][player]
+    enemy_hp, player_hp = enemy_max, player_max
+    actions = 1 + len(enemy_damage)
+    strongest_first = rng.random() < 0.5
+    used_dodge = False # shared by both sides, like the battle manager's flag
+    transitions = []
+    state = action = None
+
+    for _ in range(max_rounds):
+        # Player turn
+        if rng.random() < PLAYER_DODGE_RATE:
+            used_dodge = True
+        else:
+            move = max(range(len(player_damage)), key=player_damage.__getitem__) if strongest_first \
+                else rng.randrange(len(player_damage))
+            if not (used_dodge and rng.random() < rules["opponent_chance_to_dodge"]):
+                enemy_hp -= player_damage[move]
+            used_dodge = False
+            if enemy_hp <= 0:
+                if state is not None:
+                    transitions.append((state, action, -1.0, None))
+                return transitions
+
+        # Enemy turn
+        next_state = (enemy, player, hp_bucket(enemy_hp, enemy_max), hp_bucket(player_hp, player_max))
+        if state is not None:
+            transitions.append((state, action, 0.0, next_state))
+        state = next_state
+        values = q.get(state)
+        action = rng.randrange(actions) if values is None or rng.random() < epsilon else _greedy(values, rng)
+        if action == DODGE:
+            used_dodge = True
+        else:
+            if not (used_dodge and rng.random() < rules["player_chance_to_dodge"]):
+                player_hp -= enemy_damage[action - 1]
+            used_dodge = False
+            if player_hp <= 0:
+                transitions.append((state, action, 1.0, None))
+                return transitions
+
+    if state is not None:
+        transitions.append((state, action, 0.0, None)) # ran out of rounds: a draw
+    return transitions
+
+
+def play_games(task: tuple) -> list[list[tuple]]:
+    """Worker entry point: play count games of random matchups with one seed."""
+    rules, q, epsilon, seed, count, max_rounds = task
+    rng = random.Random(seed)
+    n = len(rules["max_health"])
+    return [play_game(rules, q, rng.randrange(n), rng.randrange(n), epsilon, rng, max_rounds) for _ in range(count)]
+
+
+# ---- Trainer ----
+
+class SelfPlayTrainer:
+    """Q-learning over self-play games, with JSON checkpoints."""
+    def __init__(self, species: Optional[list[str]] = None, alpha: float = DEFAULT_ALPHA, gamma: float = DEFAULT_GAMMA,
+                 epsilon: float = DEFAULT_EPSILON, seed: int = 0, games_per_task: int = DEFAULT_GAMES_PER_TASK,
+                 tasks_per_round: int = DEFAULT_TASKS_PER_ROUND, max_rounds: int = DEFAULT_MAX_ROUNDS,
+                 config: Optional[GameConfig] = None):
+        self.species = list(pokedex) if species is None else list(species)
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.games_per_task = games_per_task
+        self.tasks_per_round = tasks_per_round
+        self.max_rounds = max_rounds
+        self.rules = build_rules(self.species, config)
+        self.q: dict[tuple[int, int, int, int], list[float]] = {}
+        self.episodes = 0
+        self.rng = random.Random(seed) # draws the seed of every task, so it is part of the checkpoint
+
+    def _values(self, state: tuple) -> list[float]:
+        values = self.q.get(state)
+        if values is None:
+            values = self.q[state] = [0.0] * (1 + len(self.rules["damage"][state[0]][state[1]]))
+        return values
+
+    def learn(self, transitions: list[tuple]) -> None:
+        for state, action, reward, next_state in transitions:
+            target = reward
+            if next_state is not None:
+                target += self.gamma * max(self._values(next_state))
+            values = self._values(state)
+            values[action] += self.alpha * (target - values[action])
+
+    def train(self, episodes: int, workers: Optional[int] = None, checkpoint_path: Optional[str] = None,
+              checkpoint_every: int = 50_000, progress=None) -> None:
+        """
+        Play and learn from episodes more games. workers=None uses every core, 1 plays in this process.
+        The trainer is checkpointed every checkpoint_every games and at the end.
+        progress, if given, is called with the trainer after every round.
+        """
+        workers = workers or os.cpu_count() or 1
+        pool = Pool(workers) if workers > 1 else None
+        target = self.episodes + episodes
+        next_checkpoint = self.episodes + checkpoint_every
+        try:
+            while self.episodes < target:
+                counts = []
+                left = target - self.episodes
+                while left > 0 and len(counts) < self.tasks_per_round: # the same rounds whatever the number of workers
+                    counts.append(min(self.games_per_task, left))
+                    left -= counts[-1]
+                snapshot = dict(self.q)
+                tasks = [(self.rules, snapshot, self.epsilon, self.rng.getrandbits(64), count, self.max_rounds)
+                         for count in counts]
+                results = pool.map(play_games, tasks) if pool else [play_games(task) for task in tasks] # every task sees the same table
+                for games in results:
+                    for transitions in games:
+                        self.learn(transitions)
+                self.episodes += sum(counts)
+                if progress is not None:
+                    progress(self)
+                if checkpoint_path and self.episodes >= next_checkpoint:
+                    self.save_checkpoint(checkpoint_path)
+                    next_checkpoint = self.episodes + checkpoint_every
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        if checkpoint_path:
+            self.save_checkpoint(checkpoint_path)
+
+    # ---- Checkpoints ----
+
+    def to_dict(self) -> dict:
+        version, internal, gauss = self.rng.getstate()
+        return {
+            "version": CHECKPOINT_VERSION,
+            "species": self.species,
+            "alpha": self.alpha, "gamma": self.gamma, "epsilon": self.epsilon,
+            "games_per_task": self.games_per_task, "tasks_per_round": self.tasks_per_round,
+            "max_rounds": self.max_rounds,
+            "episodes": self.episodes,
+            "rng_state": [version, list(internal), gauss],
+            "q": [[*state, values] for state, values in self.q.items()],
+        }
+
+    def save_checkpoint(self, path: str) -> None:
+        """Write the trainer to path through a temporary file, so a crash never leaves half a checkpoint."""
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def from_dict(data: dict, config: Optional[GameConfig] = None) -> 'SelfPlayTrainer':
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {data.get('version')}")
+        trainer = SelfPlayTrainer(data["species"], data["alpha"], data["gamma"], data["epsilon"],
+                                  games_per_task=data["games_per_task"], tasks_per_round=data["tasks_per_round"],
+                                  max_rounds=data["max_rounds"], config=config)
+        trainer.episodes = data["episodes"]
+        version, internal, gauss = data["rng_state"]
+        trainer.rng.setstate((version, tuple(internal), gauss))
+        trainer.q = {tuple(row[:4]): row[4] for row in data["q"]}
+        return trainer
+
+    @staticmethod
+    def load_checkpoint(path: str, config: Optional[GameConfig] = None) -> 'SelfPlayTrainer':
+        with open(path, encoding="utf-8") as file:
+            return SelfPlayTrainer.from_dict(json.load(file), config)
+
+    # ---- Policy export ----
+
+    def policy_table(self) -> dict:
+        """
+        The greedy policy as the compact table LearnedPolicyAI loads: one string per
+        "enemy|player" matchup with a code per (enemy bucket, player bucket) cell,
+        DODGE_CODE, an attack index, or UNKNOWN_CODE for positions never played.
+        """
+        policy = {}
+        for e, enemy in enumerate(self.species):
+            for p, player in enumerate(self.species):
+                codes = []
+                for cell in range(HP_BUCKETS * HP_BUCKETS):
+                    values = self.q.get((e, p, cell // HP_BUCKETS, cell % HP_BUCKETS))
+                    if values is None:
+                        codes.append(UNKNOWN_CODE)
+                    else:
+                        action = max(range(len(values)), key=values.__getitem__)
+                        codes.append(DODGE_CODE if action == DODGE else str(action - 1))
+                if any(code != UNKNOWN_CODE for code in codes):
+                    policy[f"{enemy}|{player}"] = "".join(codes)
+        return {"version": POLICY_TABLE_VERSION, "hp_buckets": HP_BUCKETS, "episodes": self.episodes, "policy": policy}
+
+    def export_policy(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.policy_table(), file, separators=(",", ":"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn an enemy AI policy table by self-play.")
+    parser.add_argument("--episodes", type=int, default=100_000, help="games to play in this run")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    parser.add_argument("--checkpoint", help="checkpoint file, resumed from if it exists")
+    parser.add_argument("--checkpoint-every", type=int, default=50_000)
+    parser.add_argument("--export", help="where to write the learned policy table")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        trainer = SelfPlayTrainer.load_checkpoint(args.checkpoint)
+        print(f"Resuming from {args.checkpoint} after {trainer.episodes} games")
+    else:
+        trainer = SelfPlayTrainer(seed=args.seed)
+
+    start, first = time.perf_counter(), trainer.episodes
+    def progress(t: SelfPlayTrainer):
+        elapsed = time.perf_counter() - start
+        print(f"{t.episodes} games, {len(t.q)} states, {(t.episodes - first) / elapsed:,.0f} games/s", end="\r")
+    trainer.train(args.episodes, args.workers, args.checkpoint, args.checkpoint_every, progress)
+    print()
+    if args.export:
+        trainer.export_policy(args.export)
+        print(f"Policy written to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Immutable species and move registry compiled from the pokedex.
+Species and moves get integer ids, every move name is stored once (several species know
+Tackle, Bite, Hydro Pump ...) and each species knows its evolution stage, next evolution and
+chain, so none of that needs a scan of the pokedex or the evolution maps at runtime.
+Records are tuples, so changing a Pokemon can never change the species it was created from.
+"""
+from collections import OrderedDict
+from typing import Mapping, NamedTuple, Optional
+from .pokedex import PokemonType, pokedex, first_evolution_map, second_evolution_map
+
+# Evolution stages, the same numbers as EvolutionState.get_evo_level
+BASE_STAGE = 1
+SECOND_STAGE = 2
+FINAL_STAGE = 3
+
+# Compiled species records kept at once
+DEFAULT_CACHE_SIZE = 1024
+
+
+class MoveRecord(NamedTuple):
+    move_id: int
+    name: str
+
+
+class SpeciesRecord(NamedTuple):
+    species_id: int
+    name: str
+    p_type: PokemonType
+    max_health: int
+    level: int
+    xp: int
+    move_ids: tuple[int, ...]
+    move_damage: tuple[int, ...]  # base damage of each move; the same move can hit harder for an evolved species
+    stage: int
+    next_evolution: Optional[int]  # species id, None for the final stage
+    chain: tuple[int, ...]  # species ids of the whole evolution line, first stage first
+
+
+class SpeciesRegistry:
+    """
+    Read-only lookup of species and moves by name or id.
+    Records are compiled from the species entries on first lookup and kept in a bounded cache,
+    so a large lazily loaded pokedex is never compiled as a whole. Move ids are given out as
+    the species that know them are compiled.
+    """
+    def __init__(self, entries: Mapping[str, dict], first_evolutions: dict[str, str],
+                 second_evolutions: dict[str, str], cache_size: int = DEFAULT_CACHE_SIZE):
+        self.__entries = entries
+        self.__first_evolutions = first_evolutions
+        self.__second_evolutions = second_evolutions
+        self.cache_size = cache_size
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every compiled record, after the entries or evolution maps were replaced."""
+        self.__records: OrderedDict[str, SpeciesRecord] = OrderedDict()
+        self.__names: Optional[list[str]] = None # species names in id order, listed on first use
+        self.__species_ids: Optional[dict[str, int]] = None
+        self.__moves: list[MoveRecord] = []
+        self.__move_ids: dict[str, int] = {}
+        self.__evolutions: Optional[tuple[dict[str, str], dict[str, str]]] = None # (next, previous) species by name
+        if len(self.__entries) <= self.cache_size:
+            # Small tables are compiled whole, so move ids follow the order of the entries
+            for name in self.__entries:
+                self.get(name)
+
+    @property
+    def moves(self) -> tuple[MoveRecord, ...]:
+        """Moves of every species compiled so far."""
+        return tuple(self.__moves)
+
+    def _species_ids(self) -> dict[str, int]:
+        if self.__species_ids is None:
+            self.__names = list(self.__entries)
+            self.__species_ids = {name: i for i, name in enumerate(self.__names)}
+        return self.__species_ids
+
+    def _move_id(self, move_name: str) -> int:
+        move_id = self.__move_ids.get(move_name)
+        if move_id is None:
+            move_id = self.__move_ids[move_name] = len(self.__moves)
+            self.__moves.append(MoveRecord(move_id, move_name))
+        return move_id
+
+    def _compile(self, name: str, data: dict) -> SpeciesRecord:
+        species_ids = self._species_ids()
+        if name in self.__first_evolutions:
+            stage, evolves_to = BASE_STAGE, self.__first_evolutions[name]
+        elif name in self.__second_evolutions:
+            stage, evolves_to = SECOND_STAGE, self.__second_evolutions[name]
+        else:
+            stage, evolves_to = FINAL_STAGE, None  # also species outside any evolution line
+        return SpeciesRecord(
+            species_id=species_ids[name],
+            name=data["name"],
+            p_type=data["type"],
+            max_health=int(data["max_health"]),
+            level=int(data["level"]),
+            xp=int(data["xp"]),
+            move_ids=tuple(self._move_id(attack["name"]) for attack in data["attacks"]),
+            move_damage=tuple(attack["damage"] for attack in data["attacks"]),
+            stage=stage,
+            next_evolution=species_ids.get(evolves_to),
+            chain=tuple(species_ids[member] for member in self._chain_names(name) if member in species_ids),
+        )
+
+    def _chain_names(self, name: str) -> list[str]:
+        if self.__evolutions is None:
+            evolutions = {**self.__second_evolutions, **self.__first_evolutions}
+            self.__evolutions = (evolutions, {evolved: base for base, evolved in evolutions.items()})
+        evolutions, previous = self.__evolutions
+        while name in previous:
+            name = previous[name]
+        line = [name]
+        while line[-1] in evolutions:
+            line.append(evolutions[line[-1]])
+        return line
+
+    def get(self, name: str) -> Optional[SpeciesRecord]:
+        record = self.__records.get(name)
+        if record is not None:
+            self.__records.move_to_end(name)
+            return record
+        data = self.__entries.get(name)
+        if data is None:
+            return None
+        record = self.__records[name] = self._compile(name, data)
+        if len(self.__records) > self.cache_size:
+            self.__records.popitem(last=False)
+        return record
+
+    def get_by_id(self, species_id: int) -> SpeciesRecord:
+        self._species_ids()
+        return self.get(self.__names[species_id])
+
+    def move_id(self, move_name: str) -> Optional[int]:
+        return self.__move_ids.get(move_name)
+
+    def move_names(self, record: SpeciesRecord) -> tuple[str, ...]:
+        return tuple(self.__moves[move_id].name for move_id in record.move_ids)
+
+    def new_attacks(self, record: SpeciesRecord) -> list[dict]:
+        """Fresh known_attacks for a new Pokemon of this species, safe to change."""
+        return [{"name": self.__moves[move_id].name, "damage": damage}
+                for move_id, damage in zip(record.move_ids, record.move_damage)]
+
+    def stage(self, name: str) -> Optional[int]:
+        record = self.get(name)
+        return record.stage if record else None
+
+    def next_evolution(self, name: str) -> Optional[str]:
+        record = self.get(name)
+        if record is None or record.next_evolution is None:
+            return None
+        return self.__names[record.next_evolution]
+
+    def chain(self, name: str) -> tuple[str, ...]:
+        """Names of the whole evolution line the species belongs to."""
+        record = self.get(name)
+        return tuple(self.__names[species_id] for species_id in record.chain) if record else ()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __iter__(self):
+        return iter(self.__entries)
+
+
+def compile_registry(entries: Mapping[str, dict], first_evolutions: dict[str, str], second_evolutions: dict[str, str],
+                     cache_size: int = DEFAULT_CACHE_SIZE) -> SpeciesRegistry:
+    """
+    Build a registry from pokedex-style entries and evolution maps. Species ids follow the
+    order of the entries.
+    """
+    return SpeciesRegistry(entries, first_evolutions, second_evolutions, cache_size)
+
+
+# Follows pokedex: the evolution maps are the same dicts, and the cache is dropped when the pokedex switches data
+SPECIES_REGISTRY = compile_registry(pokedex, first_evolution_map, second_evolution_map)
+pokedex.add_listener(SPECIES_REGISTRY.reset)
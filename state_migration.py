@@ -0,0 +1,239 @@
+"""
+Offline migration of saved player state, for when the format of Pokemon.to_list,
+Bag.to_dict or PokemonRoster.to_list changes.
+A state dump (JSON lines of {"player": name, "state": {...}}, as checked by record_validation)
+is streamed in batches through a process pool, each record is upgraded by the migrations newer
+than its "state_version", and the result is written in the same order to a new dump. Only a few
+batches are in memory at once, whatever the size of the dump.
+
+    python -m pengumon.state_migration dump.jsonl migrated.jsonl --workers 4
+
+New migrations are registered with @migration(version) and must leave a record that is
+already in the new format unchanged, because records saved by the game carry no version.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Callable, Iterator, Optional, TextIO
+from .pokedex import PokemonType
+from .species_registry import SPECIES_REGISTRY
+from .pokemon import EVOLUTION_STATE_CLASSES, STAGE_EVOLUTION_CLASSES
+from .record_validation import validate_player_state
+
+# Key of the format version in a migrated state; records without it are version 0
+STATE_VERSION = "state_version"
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Batches handed to the pool per worker in each round, so memory stays bounded
+BATCHES_PER_WORKER = 2
+
+# Seconds between throughput reports
+DEFAULT_REPORT_INTERVAL = 1.0
+
+
+# ---- Migrations ----
+
+# Upgrade to each version, by version number. Each takes a state dict and changes it in place.
+MIGRATIONS: dict[int, Callable[[dict], None]] = {}
+
+def migration(version: int):
+    """Register the upgrade of a state from version - 1 to version."""
+    def register(upgrade):
+        MIGRATIONS[version] = upgrade
+        return upgrade
+    return register
+
+def current_version() -> int:
+    return max(MIGRATIONS, default=0)
+
+
+# Saved evolution state name of each species_registry stage, as written by Pokemon.to_list
+_STAGE_STATE_NAMES = {stage: state_class.__name__ for stage, state_class in STAGE_EVOLUTION_CLASSES.items()}
+
+def _canonical_pokemon(data) -> None:
+    """Replace type and evolution state names the game no longer knows with the species defaults."""
+    if type(data) is not list or len(data) != 8:
+        return  # left for validation to report
+    species = SPECIES_REGISTRY.get(data[0])
+    if species is None:
+        return
+    if data[3] not in PokemonType.__members__:
+        data[3] = species.p_type.name
+    if data[7] not in EVOLUTION_STATE_CLASSES:
+        data[7] = _STAGE_STATE_NAMES[species.stage]
+
+@migration(1)
+def _resolve_old_names(state: dict) -> None:
+    """Version 1: store the type and evolution state from_list falls back to instead of unknown names."""
+    if state.get("active_pokemon"):
+        _canonical_pokemon(state["active_pokemon"])
+    bag = state.get("bag")
+    if type(bag) is dict and type(bag.get("pokemon")) is list:
+        for pokemon in bag["pokemon"]:
+            _canonical_pokemon(pokemon)
+
+
+def migrate_state(state: dict) -> bool:
+    """Upgrade one state in place to the current version. Return True if it was not already current."""
+    version = state.get(STATE_VERSION, 0)
+    target = current_version()
+    if version >= target:
+        return False
+    for upgrade_to in range(version + 1, target + 1):
+        if upgrade_to in MIGRATIONS:
+            MIGRATIONS[upgrade_to](state)
+    state[STATE_VERSION] = target
+    return True
+
+
+# ---- Batches ----
+
+class MigrationStats:
+    """Counts of a migration run, added up over batches."""
+    def __init__(self):
+        self.records = 0
+        self.migrated = 0
+        self.failed: list[tuple[int, str]] = [] # (line number, problem)
+
+    def add(self, other: 'MigrationStats') -> None:
+        self.records += other.records
+        self.migrated += other.migrated
+        self.failed.extend(other.failed)
+
+
+def migrate_batch(batch: tuple[int, list[str]], validate: bool = True) -> tuple[list[str], MigrationStats]:
+    """
+    Migrate one batch of dump lines, given with the line number of its first line.
+    A line that can't be migrated, or fails validation afterwards, is written back unchanged
+    and reported in the stats.
+    """
+    first_line, lines = batch
+    stats = MigrationStats()
+    output = []
+    for line_number, line in enumerate(lines, start=first_line):
+        if not line.strip():
+            continue
+        stats.records += 1
+        try:
+            entry = json.loads(line)
+            state = entry["state"]
+            changed = migrate_state(state)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            stats.failed.append((line_number, f"can't migrate: {error!r}"))
+            output.append(line.rstrip("\n"))
+            continue
+        if validate:
+            problems = validate_player_state(state)
+            if problems:
+                stats.failed.append((line_number, "; ".join(problems)))
+                output.append(line.rstrip("\n"))
+                continue
+        stats.migrated += changed
+        output.append(json.dumps(entry, separators=(",", ":")))
+    return output, stats
+
+def _migrate_batch_validated(batch):
+    return migrate_batch(batch, True)
+
+def _migrate_batch_unvalidated(batch):
+    return migrate_batch(batch, False)
+
+
+def read_batches(file: TextIO, batch_size: int) -> Iterator[tuple[int, list[str]]]:
+    """Yield (first line number, lines) batches of a dump file."""
+    lines: list[str] = []
+    first_line = 1
+    for line_number, line in enumerate(file, start=1):
+        lines.append(line)
+        if len(lines) == batch_size:
+            yield first_line, lines
+            lines, first_line = [], line_number + 1
+    if lines:
+        yield first_line, lines
+
+
+# ---- Runner ----
+
+class ThroughputReporter:
+    """Prints records per second at most once every interval seconds, and once more at the end."""
+    def __init__(self, out: Optional[TextIO] = None, interval: float = DEFAULT_REPORT_INTERVAL, clock=time.perf_counter):
+        self.out = out # None prints to stderr
+        self.interval = interval
+        self.clock = clock
+        self.__start = clock()
+        self.__last_report = self.__start
+
+    def update(self, stats: MigrationStats, final: bool = False) -> None:
+        now = self.clock()
+        if not final and now - self.__last_report < self.interval:
+            return
+        self.__last_report = now
+        elapsed = max(now - self.__start, 1e-9)
+        label = "done" if final else "progress"
+        print(f"{label}: {stats.records} records ({stats.migrated} migrated, {len(stats.failed)} failed)"
+              f" in {elapsed:.1f}s, {stats.records / elapsed:.0f} records/s", file=self.out or sys.stderr)
+
+
+def migrate_dump(source: str, destination: str, workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 validate: bool = True, reporter: Optional[ThroughputReporter] = None) -> MigrationStats:
+    """
+    Migrate every record of a dump into a new dump, in the same order.
+    workers=None uses every core; workers=1 migrates in this process. The destination is written
+    to a temporary file and moved into place once complete, so it is never left half written.
+    """
+    workers = workers or os.cpu_count() or 1
+    migrate = _migrate_batch_validated if validate else _migrate_batch_unvalidated
+    stats = MigrationStats()
+    temp_path = destination + ".tmp"
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        with open(source, encoding="utf-8") as src, open(temp_path, "w", encoding="utf-8") as dst:
+            batches = read_batches(src, batch_size)
+            while True:
+                # One round of batches at a time, so memory is bounded by workers * BATCHES_PER_WORKER batches
+                round_batches = [batch for _, batch in zip(range(workers * BATCHES_PER_WORKER), batches)]
+                if not round_batches:
+                    break
+                results = pool.map(migrate, round_batches) if pool else map(migrate, round_batches)
+                for lines, batch_stats in results:
+                    for line in lines:
+                        dst.write(line + "\n")
+                    stats.add(batch_stats)
+                if reporter is not None:
+                    reporter.update(stats)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(temp_path, destination)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if reporter is not None:
+        reporter.update(stats, final=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade every player state in a dump to the current format.")
+    parser.add_argument("source", help="JSON lines of {\"player\": name, \"state\": {...}}")
+    parser.add_argument("destination", help="where to write the migrated dump")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-validate", action="store_true", help="don't validate records after migrating them")
+    args = parser.parse_args()
+
+    stats = migrate_dump(args.source, args.destination, args.workers, args.batch_size,
+                         validate=not args.no_validate, reporter=ThroughputReporter())
+    for line_number, problem in stats.failed:
+        print(f"{args.source}:{line_number}: {problem}", file=sys.stderr)
+    raise SystemExit(0 if not stats.failed else 1)
+
+
+if __name__ == "__main__":
+    main()
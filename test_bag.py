@@ -186,3 +186,76 @@ def test_get_item_key_invalid_raises():
         def to_list(self): return []
     with pytest.raises(ValueError):
         PotionCompartment().get_item_key(DummyItem())
+
+def test_compartments_track_changes(dummy_pokemon):
+    """Adding, removing and switching mark only the compartment that changed."""
+    bag = Bag()
+    assert not bag.is_dirty()
+
+    bag.potions.add(SmallPotion())
+    assert bag.potions.is_dirty()
+    assert not bag.pokeballs.is_dirty() and not bag.pokemon.is_dirty()
+
+    bag.clear_dirty()
+    assert bag.pokeballs.remove("pokeball") is None
+    assert not bag.is_dirty()  # nothing was removed
+
+    ball = RegularPokeball()
+    ball.add(dummy_pokemon)
+    bag.pokemon.add(ball)
+    bag.clear_dirty()
+    bag.pokemon.switch_pokemon(DummyPokemon(name="Other"), 0)
+    assert bag.pokemon.is_dirty()
+
+def test_merge_into_reuses_unchanged_sections(dummy_pokemon):
+    """Only changed compartments are rebuilt; the rest is taken from the saved dict."""
+    bag = Bag()
+    ball = RegularPokeball()
+    ball.add(dummy_pokemon)
+    bag.pokemon.add(ball)
+    stored = bag.to_dict()
+    bag.clear_dirty()
+
+    bag.potions.add(SmallPotion())
+    merged = bag.merge_into(stored)
+    assert merged["potions"]["small"] == 1
+    assert merged["pokemon"] is stored["pokemon"]
+    assert merged["pokeballs"] is stored["pokeballs"]
+    assert bag.merge_into(None) == bag.to_dict()
+
+def test_bag_view_answers_like_bag(monkeypatch):
+    """The read-only view lists the same things as the full bag without building Pokemon."""
+    bag = Bag()
+    bag.potions.add(SmallPotion())
+    bag.pokeballs.add(GreatBall())
+    for name, hp in [("Squirtle", 0), ("Charmander", 12)]:
+        ball = RegularPokeball()
+        pokemon = Pokemon(name)
+        pokemon.current_health = hp
+        ball.add(pokemon)
+        bag.pokemon.add(ball)
+    data = bag.to_dict()
+
+    monkeypatch.setattr("pengumon.bag.Pokemon.from_list", lambda data: pytest.fail("Pokemon built"))
+    view = BagView(data)
+    assert view.potions.list_items() == bag.potions.list_items()
+    assert view.pokeballs.to_dict() == bag.pokeballs.to_dict()
+    assert view.pokemon.list_pokemon() == bag.pokemon.list_pokemon()
+    [(index, entry)] = view.pokemon.get_available_pokemon()
+    assert (index, entry.get_name(), entry.get_health()) == (1, "Charmander", "12/50")
+
+def test_bag_view_builds_bag_on_request():
+    bag = Bag()
+    bag.potions.add(MediumPotion())
+    restored = BagView(bag.to_dict()).to_bag()
+    assert isinstance(restored, Bag)
+    assert restored.potions.to_dict() == bag.potions.to_dict()
+
+def test_bag_view_falls_back_to_species_type():
+    """An unknown saved type name reads as the species' type, as Pokemon.from_list loads it."""
+    data = Pokemon("Squirtle").to_list()
+    data[3] = "NOT_A_TYPE"
+    bag = Bag()
+    bag.pokemon.from_list([data])
+    view = BagView({**Bag().to_dict(), "pokemon": [data]})
+    assert view.pokemon.list_pokemon() == bag.pokemon.list_pokemon()
@@ -0,0 +1,152 @@
+import pytest
+from .battle_journal import *
+from .battle_simulator import run_battle, SimulatedPlayer
+from .player_session import SessionCache
+from .pokemon import PokemonFactory
+from .pokeball import RegularPokeball
+from .items import SmallPotion
+
+# ---------- Helpers ----------
+
+def make_player(name="Ash"):
+    """Player whose saved state is a Squirtle and a bag with one potion and one ball."""
+    player = SimulatedPlayer(name)
+    bag = Bag()
+    bag.potions.add(SmallPotion())
+    bag.pokeballs.add(RegularPokeball())
+    player.set_state("active_pokemon", PokemonFactory.create_pokemon("Squirtle").to_list())
+    player.set_state("bag", bag.to_dict())
+    return player
+
+def play_battle(journal, player, seed=3):
+    """Battle on the player's live objects, without saving the result (as if the server stopped)."""
+    pokemon = Pokemon.from_list(player.get_state("active_pokemon"))
+    bag = Bag.from_dict(player.get_state("bag"))
+    entry = journal.open_battle(player, pokemon, bag)
+    result = run_battle(pokemon, "Charmander", bag=bag, seed=seed, journal=entry)
+    return entry, result, bag
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "battles.journal")
+
+# ---------- Tests ----------
+
+def test_unsaved_battle_is_recovered(path):
+    """A battle cut off before it was saved is written into player state after a restart."""
+    player = make_player()
+    journal = BattleJournal(path)
+    _, result, bag = play_battle(journal, player)
+    journal.close()
+
+    assert player.get_state("active_pokemon") != result.player_pokemon.to_list()
+    restarted = BattleJournal(path)
+    assert restarted.has_pending(player)
+    assert restarted.recover(player)
+    assert player.get_state("active_pokemon") == result.player_pokemon.to_list()
+    assert player.get_state("bag") == bag.to_dict()
+    assert not restarted.recover(player)
+    restarted.close()
+
+def test_catch_and_items_are_journaled(path):
+    player = make_player()
+    journal = BattleJournal(path)
+    pokemon = Pokemon.from_list(player.get_state("active_pokemon"))
+    bag = Bag.from_dict(player.get_state("bag"))
+    entry = journal.open_battle(player, pokemon, bag)
+
+    entry.capture(pokemon, bag)  # nothing changed yet
+    bag.potions.remove("small")
+    ball = RegularPokeball()
+    ball.add(PokemonFactory.create_pokemon("Charmander"))
+    bag.pokemon.add(ball)
+    entry.capture(pokemon, bag)
+    journal.close()
+
+    ops = [e["op"] for e in read_entries(path)]
+    assert ops == [ITEMS, ROSTER]
+    BattleJournal(path).recover(player)
+    assert Bag.from_dict(player.get_state("bag")).to_dict() == bag.to_dict()
+
+def test_committed_battle_is_not_replayed(path):
+    """Once committed, a battle is dropped from the journal when it is reopened."""
+    player = make_player()
+    journal = BattleJournal(path)
+    entry, _, _ = play_battle(journal, player)
+    entry.commit()
+    journal.close()
+    saved = dict(player.state)
+
+    restarted = BattleJournal(path)
+    assert not restarted.recover(player)
+    assert player.state == saved
+    assert read_entries(path) == []
+    restarted.close()
+
+def test_replay_is_idempotent(path):
+    """Entries hold new values, so recovering a battle that was in fact saved changes nothing."""
+    player = make_player()
+    journal = BattleJournal(path)
+    _, result, bag = play_battle(journal, player)
+    journal.close()
+    player.set_state("active_pokemon", result.player_pokemon.to_list())
+    player.set_state("bag", bag.to_dict())
+    saved = dict(player.state)
+
+    BattleJournal(path).recover(player)
+    assert player.state == saved
+
+def test_cut_off_line_is_ignored(path):
+    player = make_player()
+    journal = BattleJournal(path)
+    play_battle(journal, player)
+    journal.close()
+    with open(path, "a") as file:
+        file.write('{"battle": "x", "pla')
+    assert BattleJournal(path).recover(player)
+
+def test_lines_are_synced_in_batches(path, monkeypatch):
+    synced = []
+    monkeypatch.setattr("pengumon.battle_journal.os.fsync", lambda fd: synced.append(fd))
+    journal = BattleJournal(path, sync_every=10, sync_interval=float("inf"))
+    synced.clear()
+    for i in range(25):
+        journal.append({"battle": "b", "player": "Ash", "op": ITEMS, "compartment": "potions", "counts": {}})
+    assert len(synced) == 2
+    journal.append({"battle": "b", "player": "Ash", "op": COMMIT}, sync=True)
+    assert len(synced) == 3
+    journal.close()
+
+def test_session_creation_recovers_player(path):
+    """With the journal enabled, a player's pending battle is recovered when their session is created."""
+    player = make_player()
+    journal = BattleJournal(path)
+    _, result, _ = play_battle(journal, player)
+    journal.close()
+
+    enable_battle_journal(path)
+    try:
+        session = SessionCache().get(player)
+        assert session.get_active_pokemon().to_list() == result.player_pokemon.to_list()
+    finally:
+        disable_battle_journal()
+    assert open_journal(player, result.player_pokemon, None) is None
+
+def test_invalidated_player_is_not_recovered(path):
+    """A reset drops the battle the journal kept, so the next session doesn't bring it back."""
+    player = make_player()
+    journal = BattleJournal(path)
+    play_battle(journal, player)
+    journal.close()
+
+    enable_battle_journal(path)
+    try:
+        cache = SessionCache()
+        player.set_state("active_pokemon", None)
+        cache.invalidate(player)
+        assert cache.get(player).get_active_pokemon() is None
+    finally:
+        disable_battle_journal()
+    reopened = BattleJournal(path)
+    assert not reopened.has_pending(player)
+    reopened.close()
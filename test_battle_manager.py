@@ -19,7 +19,7 @@ class DummyPokemon:
         self._observers = []
         self.p_type = SimpleNamespace(name="WATER")
         
-    def attack(self, index, target):
+    def attack(self, index, target, config=None):
         old_hp = target.current_health
         damage = self.known_attacks[index]["damage"]
         target.current_health = max(0, old_hp - damage)
@@ -57,6 +57,9 @@ class DummyPokemon:
     def add_observer(self, observer):
         self._observers.append(observer)
 
+    def remove_observer(self, observer):
+        self._observers.remove(observer)
+
 class DummyPlayer:
     def __init__(self):
         self.state = {}
@@ -295,10 +298,10 @@ def test_player_dodge_successfully_avoids_enemy_attack(monkeypatch, dummy_player
 
     monkeypatch.setattr("pengumon.battle_manager.PokemonFactory.create_pokemon", lambda name: dummy_pokemon)
     monkeypatch.setattr("pengumon.battle_manager.Pokemon", DummyPokemon)
-    monkeypatch.setattr("pengumon.battle_manager.MediumAI.choose_action", lambda self, e, p: "0")
-    monkeypatch.setattr("random.random", lambda: 0.1)  # ensure dodge succeeds
+    monkeypatch.setattr("pengumon.battle_manager.MediumAI.choose_action", lambda self, e, p, rng=None: "0")
 
     manager = PokemonBattleManager(dummy_player, "Charmander")
+    monkeypatch.setattr(manager.get_rng(), "random", lambda: 0.1)  # ensure dodge succeeds
     manager.update()  # intro
     manager.update()  # player turn
 
@@ -319,10 +322,10 @@ def test_player_dodge_fails_and_takes_damage(monkeypatch, dummy_player, dummy_po
 
     monkeypatch.setattr("pengumon.battle_manager.PokemonFactory.create_pokemon", lambda name: dummy_pokemon)
     monkeypatch.setattr("pengumon.battle_manager.Pokemon", DummyPokemon)
-    monkeypatch.setattr("pengumon.battle_manager.MediumAI.choose_action", lambda self, e, p: "0")  # enemy attacks
-    monkeypatch.setattr("random.random", lambda: 0.9)  # dodge fails (> 0.5)
+    monkeypatch.setattr("pengumon.battle_manager.MediumAI.choose_action", lambda self, e, p, rng=None: "0")  # enemy attacks
 
     manager = PokemonBattleManager(dummy_player, "Charmander")
+    monkeypatch.setattr(manager.get_rng(), "random", lambda: 0.9)  # dodge fails (> 0.5)
     manager.update()  # into
     manager.update()  # player turn
 
@@ -343,9 +346,9 @@ def test_successful_run_ends_battle(monkeypatch, dummy_player, dummy_pokemon):
 
     monkeypatch.setattr("pengumon.battle_manager.PokemonFactory.create_pokemon", lambda name: dummy_pokemon)
     monkeypatch.setattr("pengumon.battle_manager.Pokemon", DummyPokemon)
-    monkeypatch.setattr("random.random", lambda: 0.5)  # success when < 0.7
 
     manager = PokemonBattleManager(dummy_player, "Charmander")
+    monkeypatch.setattr(manager.get_rng(), "random", lambda: 0.5)  # success when < 0.7
     manager.update()  # intro
     manager.update()  # player turn
 
@@ -362,9 +365,9 @@ def test_failed_run_triggers_enemy_turn(monkeypatch, dummy_player, dummy_pokemon
 
     monkeypatch.setattr("pengumon.battle_manager.PokemonFactory.create_pokemon", lambda name: dummy_pokemon)
     monkeypatch.setattr("pengumon.battle_manager.Pokemon", DummyPokemon)
-    monkeypatch.setattr("random.random", lambda: 0.9)  # fail when > 0.7
 
     manager = PokemonBattleManager(dummy_player, "Charmander")
+    monkeypatch.setattr(manager.get_rng(), "random", lambda: 0.9)  # fail when > 0.7
     manager.update()  # into
     manager.update()  # player turn
 
@@ -550,7 +553,7 @@ def test_enemy_pokemon_faints(monkeypatch, dummy_player, dummy_pokemon):
     # Simulate attack that knocks out the enemy
     manager.set_selected_option("0: DummyAttack (20)")
     manager._PokemonBattleManager__enemy_pokemon.current_health = 10
-    dummy_pokemon.attack = lambda idx, target: {"message": "used DummyAttack!", "damage": 10}
+    dummy_pokemon.attack = lambda idx, target, config=None: {"message": "used DummyAttack!", "damage": 10}
     manager._PokemonBattleManager__enemy_pokemon.is_fainted = lambda: True
 
     messages = manager.update()
@@ -594,3 +597,73 @@ def test_observer_sends_battle_message(monkeypatch, dummy_player, dummy_pokemon)
         for m in messages
     )
 
+
+def test_observers_detached_when_battle_ends(monkeypatch, dummy_player, dummy_pokemon):
+    """Test that the battle removes its observers so live Pokemon do not keep reporting to it."""
+    dummy_pokemon.current_health = 0
+    dummy_player.set_state("bag", Bag().to_dict())
+    enemy_pokemon = DummyPokemon(name="Enemy")
+
+    monkeypatch.setattr("pengumon.battle_manager.PokemonFactory.create_pokemon", lambda name: enemy_pokemon)
+
+    manager = PokemonBattleManager(dummy_player, "Charmander", player_pokemon=dummy_pokemon)
+    assert len(dummy_pokemon._observers) == 1
+    manager._PokemonBattleManager__turn_stage = TurnStage.END
+    manager.update()
+
+    assert manager.is_over()
+    assert dummy_pokemon._observers == []
+    assert enemy_pokemon._observers == []
+
+
+# --- Output Coalescing ---
+
+def test_tick_text_merged_into_one_message(dummy_player):
+    """Attack text and observer health messages of one tick are sent as a single ServerMessage."""
+    manager = PokemonBattleManager(dummy_player, "Charmander",
+                                   player_pokemon=PokemonFactory.create_pokemon("Squirtle"), bag=Bag())
+    manager.update()  # intro
+    manager.update()  # player turn
+    manager.set_selected_option(manager.get_options()[0])
+    messages = manager.update()  # process attack
+
+    texts = [m for m in messages if isinstance(m, ServerMessage)]
+    assert len(texts) == 1
+    assert "used" in texts[0]._get_data()["text"]
+    assert "took damage" in texts[0]._get_data()["text"]
+    assert messages[0] is texts[0]
+
+def test_unchanged_battle_window_is_dropped(dummy_player):
+    """A battle window update is only sent when the HP or level it shows changed."""
+    manager = PokemonBattleManager(dummy_player, "Charmander",
+                                   player_pokemon=PokemonFactory.create_pokemon("Squirtle"), bag=Bag())
+    first = manager._make_battle_message()
+    second = manager._make_battle_message()
+    assert manager._coalesce([first, second]) == [second]
+    assert manager._coalesce([manager._make_battle_message()]) == []
+
+    manager.get_enemy_pokemon().take_damage(5)
+    changed = manager._make_battle_message()
+    assert manager._coalesce([changed]) == [changed]
+
+    destroy = PokemonBattleMessage(dummy_player, dummy_player, {}, {}, destroy=True)
+    assert manager._coalesce([destroy]) == [destroy]
+
+def test_seeded_battles_send_identical_messages(dummy_player):
+    """The same seed and the same inputs reproduce every message of a battle."""
+    def play(seed):
+        manager = PokemonBattleManager(dummy_player, "Bulbasaur", seed=seed,
+                                       player_pokemon=PokemonFactory.create_pokemon("Charmander"), bag=Bag())
+        texts = []
+        for choice in ["Dodge", "0: Scratch (10)", "Run", "1: Ember (15)"] * 5:
+            while manager.get_turn_stage() not in (TurnStage.AWAIT_INPUT, TurnStage.CLEANUP):
+                manager._PokemonBattleManager__last_action_time -= ENEMY_RESPONSE_TIME
+                texts += [m._get_data().get("text") for m in manager.update()]
+            if manager.is_over():
+                break
+            manager.set_selected_option(choice)
+            texts += [m._get_data().get("text") for m in manager.update()]
+        return manager.get_seed(), texts
+
+    assert play(7) == play(7)
+    assert play(7)[0] == 7
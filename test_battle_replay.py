@@ -0,0 +1,150 @@
+import pytest
+from .battle_replay import *
+from .battle_replay import _put_varint, _Cursor, _zigzag, _unzigzag
+from .battle_simulator import run_battle, random_attack_policy
+from .pokemon import PokemonFactory
+from .pokeball import RegularPokeball
+from .items import SmallPotion
+from .game_config import CONFIG, GameConfig
+
+# ---------- Helpers ----------
+
+def make_bag():
+    """Bag with potions, balls and a stored Pokemon so the snapshot covers every section."""
+    bag = Bag()
+    bag.potions.add(SmallPotion())
+    bag.pokeballs.add(RegularPokeball())
+    ball = RegularPokeball()
+    ball.add(PokemonFactory.create_pokemon("Piplup"))
+    bag.pokemon.add(ball)
+    return bag
+
+def record_battles(writer, count, seed=0):
+    for i in range(count):
+        run_battle(PokemonFactory.create_pokemon("Squirtle"), "Charmander", policy=random_attack_policy,
+                   bag=make_bag(), enemy_ai="hard", seed=seed + i, recorder=writer.recorder())
+    writer.flush()
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = ReplayWriter(str(tmp_path / "battles.log"))
+    yield writer
+    writer.close()
+
+# ---------- Tests ----------
+
+def test_varint_and_zigzag_round_trip():
+    for value in [0, 1, 127, 128, 300, 2 ** 32 - 1, 2 ** 70]:
+        out = bytearray()
+        _put_varint(out, value)
+        assert _Cursor(bytes(out)).varint() == value
+    assert [_unzigzag(_zigzag(v)) for v in (-3, -1, 0, 1, 5)] == [-3, -1, 0, 1, 5]
+
+def test_battle_is_recorded_and_read_back(writer):
+    """The log holds the starting snapshot, the events and the result of every battle."""
+    record_battles(writer, 1, seed=5)
+    logs = list(iter_battles(read_records(writer.path)))
+
+    assert len(logs) == 1
+    log = logs[0]
+    assert (log.seed, log.enemy_ai, log.wild_pokemon_name) == (5, "hard", "Charmander")
+    assert log.player_pokemon == PokemonFactory.create_pokemon("Squirtle").to_list()
+    assert log.bag == make_bag().to_dict()
+    assert log.result[0] in ("player", "enemy")
+    assert (STAGE, TurnStage.CLEANUP) == log.events[-1]
+    assert any(event[0] == HEALTH for event in log.events)
+    assert any(event[0] == AI_ACTION for event in log.events)
+
+def test_replay_reproduces_recorded_battles(writer):
+    """Re-driving the battle manager from the log gives the same events and result."""
+    record_battles(writer, 10)
+    logs = list(iter_battles(read_records(writer.path)))
+    assert len(logs) == 10
+    assert all(replay_matches(log) for log in logs)
+
+def test_changed_log_is_detected(writer):
+    record_battles(writer, 1)
+    log = next(iter_battles(read_records(writer.path)))
+    log.seed += 1
+    assert not replay_matches(log)
+
+def test_log_rotates_and_is_read_oldest_first(tmp_path):
+    """Files are rotated once they grow too large and read back in order."""
+    path = str(tmp_path / "battles.log")
+    writer = ReplayWriter(path, max_bytes=600, backup_count=50)
+    for i in range(20):
+        record_battles(writer, 1, seed=i)
+    writer.close()
+
+    files = log_files(path, backup_count=50)
+    assert len(files) > 1
+    assert files[-1] == path
+    seeds = [log.seed for log in iter_battles(r for f in files for r in read_records(f))]
+    assert seeds == sorted(seeds)
+    assert len(seeds) >= 15  # battles split across a rotation lose their start and are skipped
+
+def test_restarted_writer_continues_battle_ids(tmp_path):
+    """A writer appending to an existing log numbers its battles after the ones already there."""
+    path = str(tmp_path / "battles.log")
+    for _ in range(2):
+        writer = ReplayWriter(path)
+        record_battles(writer, 2)
+        writer.close()
+    with open(path, "ab") as stream:
+        stream.write(b"\x20\x02") # a record cut off at the end is skipped
+    assert [log.battle_id for log in iter_battles(read_records(path))] == [1, 2, 3, 4]
+    assert last_battle_id(path) == 4
+
+def test_replay_uses_the_recorded_config(writer):
+    """Battles fought after a config reload replay with that config, not the one loaded now."""
+    CONFIG.set(GameConfig(3, opponent_chance_to_dodge=0.9, potion_heal={"Small Potion": 15}))
+    try:
+        record_battles(writer, 5)
+    finally:
+        CONFIG.reset()
+    logs = list(iter_battles(read_records(writer.path)))
+    assert {(log.config_version, log.config_values["opponent_chance_to_dodge"]) for log in logs} == {(3, 0.9)}
+    assert logs[0].config_values["potion_heal"]["Small Potion"] == 15
+    assert "player_chance_to_run" not in logs[0].config_values  # defaults are left out
+    assert all(replay_matches(log) for log in logs)
+
+def test_battle_of_other_ai_rules_is_not_replayed(writer):
+    """A battle recorded before the AIs changed how they draw is reported, not replayed as a mismatch."""
+    record_battles(writer, 1)
+    log = next(iter_battles(read_records(writer.path)))
+    assert log.ai_rules_version == AI_RULES_VERSION
+    log.ai_rules_version -= 1
+    with pytest.raises(ValueError, match="AI rules version"):
+        replay_matches(log)
+
+def test_log_of_other_format_version_is_rejected(tmp_path):
+    """An old log gets a clear error when read, and a writer moves it aside instead of appending."""
+    path = str(tmp_path / "battles.log")
+    with open(path, "wb") as stream:
+        stream.write(MAGIC[:-1] + b"\x01" + b"\x00\x01")
+    with pytest.raises(ValueError, match="version 1 replay log"):
+        list(read_records(path))
+
+    writer = ReplayWriter(path)
+    record_battles(writer, 1)
+    writer.close()
+    assert len(list(iter_battles(read_records(path)))) == 1
+    with open(path + ".1", "rb") as stream:
+        assert stream.read(len(MAGIC)) == MAGIC[:-1] + b"\x01"
+
+def test_cut_off_record_ends_stream(writer):
+    """A record half written before a crash is ignored."""
+    record_battles(writer, 1)
+    writer.close()
+    with open(writer.path, "ab") as stream:
+        stream.write(b"\x20\x02")
+    assert len(list(iter_battles(read_records(writer.path)))) == 1
+
+def test_recording_is_off_by_default(tmp_path):
+    assert open_recorder() is None
+    enable_replay_log(str(tmp_path / "battles.log"))
+    try:
+        assert isinstance(open_recorder(), BattleRecorder)
+    finally:
+        disable_replay_log()
+    assert open_recorder() is None
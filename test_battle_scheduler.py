@@ -0,0 +1,145 @@
+import pytest
+from .battle_scheduler import BattleScheduler, TICK_INTERVAL
+from .battle_manager import PokemonBattleManager, TurnStage, ENEMY_RESPONSE_TIME
+from .battle_simulator import VirtualClock, SimulatedPlayer
+from .bag import Bag
+from .pokemon import PokemonFactory
+
+# ---------- Helpers ----------
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+def make_battle(clock):
+    """Real battle running on the virtual clock."""
+    return PokemonBattleManager(SimulatedPlayer(), "Charmander",
+                                player_pokemon=PokemonFactory.create_pokemon("Squirtle"),
+                                bag=Bag(), clock=clock)
+
+def run_until_input(scheduler, battle):
+    """Tick until the battle waits for player input."""
+    while battle.get_turn_stage() != TurnStage.AWAIT_INPUT:
+        scheduler.tick()
+
+# ---------- Tests ----------
+
+def test_battle_waiting_for_input_is_not_updated(clock):
+    """A battle in AWAIT_INPUT should be left alone until an option arrives."""
+    scheduler = BattleScheduler(clock)
+    battle = make_battle(clock)
+    scheduler.add(battle)
+    run_until_input(scheduler, battle)
+
+    assert scheduler.tick() == 0
+    assert scheduler.ready_battles() == 0
+
+    battle.set_selected_option("Dodge")
+    assert scheduler.tick() == 1
+    assert battle.get_turn_stage() == TurnStage.ENEMY_WAIT
+
+def test_enemy_wait_wakes_only_after_delay(clock):
+    """A battle in ENEMY_WAIT should only be updated once its response time passed."""
+    scheduler = BattleScheduler(clock)
+    battle = make_battle(clock)
+    scheduler.add(battle)
+    run_until_input(scheduler, battle)
+    battle.set_selected_option("Dodge")
+    scheduler.tick()
+
+    clock.advance(ENEMY_RESPONSE_TIME - 1)
+    assert scheduler.tick() == 0
+
+    clock.advance(1)
+    assert scheduler.tick() == 1
+    assert battle.get_turn_stage() == TurnStage.ENEMY_TURN
+
+def test_tick_cost_scales_with_ready_battles(clock):
+    """Only battles that have work to do are updated."""
+    scheduler = BattleScheduler(clock)
+    battles = [make_battle(clock) for _ in range(50)]
+    for battle in battles:
+        scheduler.add(battle)
+    assert scheduler.tick() == 50  # intro
+    assert scheduler.tick() == 50  # options presented
+
+    battles[7].set_selected_option("Dodge")
+    assert scheduler.open_battles() == 50
+    assert scheduler.tick() == 1
+
+def test_collect_returns_output_once(clock):
+    """Messages are delivered to the battle owner once and ticks are throttled."""
+    scheduler = BattleScheduler(clock)
+    battle = make_battle(clock)
+    scheduler.add(battle)
+
+    messages = scheduler.collect(battle)
+    assert any("You encountered a wild" in m._get_data()["text"] for m in messages)
+    assert scheduler.collect(battle) == []  # no new tick yet
+
+    clock.advance(TICK_INTERVAL)
+    assert scheduler.collect(battle) != []  # options presented
+
+def test_removed_battle_is_not_updated(clock):
+    """A removed battle should never be updated again."""
+    scheduler = BattleScheduler(clock)
+    battle = make_battle(clock)
+    scheduler.add(battle)
+    scheduler.remove(battle)
+    assert scheduler.tick() == 0
+    assert battle.get_turn_stage() == TurnStage.INTRO
+
+def test_enemy_turns_are_decided_in_one_batch(clock, monkeypatch):
+    """Every battle reaching its enemy turn in a tick is decided by a single batched call for their AI."""
+    from . import battle_manager
+    calls = []
+    def choose(ai, difficulty, enemies, players, rngs, players_dodging):
+        calls.append(len(enemies))
+        return ["Dodge"] * len(enemies)
+    monkeypatch.setattr(battle_manager, "choose_enemy_actions", choose)
+
+    scheduler = BattleScheduler(clock)
+    battles = [make_battle(clock) for _ in range(10)]
+    for battle in battles:
+        scheduler.add(battle)
+        run_until_input(scheduler, battle)
+    for battle in battles:
+        battle.set_selected_option("Dodge")
+    scheduler.tick()
+    clock.advance(ENEMY_RESPONSE_TIME)
+    scheduler.tick()  # ENEMY_WAIT -> ENEMY_TURN
+    assert calls == []
+    scheduler.tick()
+    assert calls == [10]
+
+def test_batched_battles_play_out_like_lone_battles(clock):
+    """A battle decided in a batch plays the same as with the same seed run on its own."""
+    def play(battles, advance):
+        while not all(battle.is_over() for battle in battles):
+            advance()
+            for battle in battles:
+                if battle.get_turn_stage() == TurnStage.AWAIT_INPUT and battle.get_options():
+                    battle.set_selected_option(battle.get_options()[0])
+        return [(battle.get_player_pokemon().current_health, battle.get_enemy_pokemon().current_health,
+                 battle.get_rng().random()) for battle in battles]
+
+    def battles(player_ai):
+        return [PokemonBattleManager(SimulatedPlayer(enemy_ai=player_ai), "Charmander",
+                                     player_pokemon=PokemonFactory.create_pokemon("Squirtle"),
+                                     bag=Bag(), clock=clock, seed=seed) for seed in range(40)]
+
+    scheduler = BattleScheduler(clock)
+    together = battles("hard")
+    for battle in together:
+        scheduler.add(battle)
+    def tick():
+        clock.advance(ENEMY_RESPONSE_TIME)
+        scheduler.tick()
+    batched = play(together, tick)
+
+    alone = battles("hard")
+    def update_each():
+        clock.advance(ENEMY_RESPONSE_TIME)
+        for battle in alone:
+            battle.update()
+    assert play(alone, update_each) == batched
@@ -0,0 +1,77 @@
+import pytest
+import random
+from .battle_simulator import *
+from .pokemon import PokemonFactory
+
+
+@pytest.fixture
+def charizard():
+    return PokemonFactory.create_pokemon("Charizard")
+
+def test_virtual_clock_only_moves_when_advanced():
+    """Ensure the virtual clock stays put until advanced."""
+    clock = VirtualClock()
+    assert clock() == 0.0
+    clock.advance(3)
+    assert clock() == 3
+
+def test_battle_runs_to_completion_in_one_call(charizard):
+    """A strong Pokemon should beat a weak wild Pokemon without any real waiting."""
+    random.seed(0)
+    result = run_battle(charizard, "Charmander")
+    assert result.winner == "player"
+    assert result.turns >= 1
+    assert result.wall_time < 1.0
+    assert result.enemy_pokemon.is_fainted()
+
+def test_enemy_wins_when_player_only_dodges():
+    """A policy that never attacks should eventually lose."""
+    random.seed(1)
+    result = run_battle(PokemonFactory.create_pokemon("Charmander"), "Charizard",
+                        policy=lambda battle, options: "Dodge", enemy_ai="hard")
+    assert result.winner == "enemy"
+    assert result.player_pokemon.is_fainted()
+
+def test_run_away_has_no_winner(monkeypatch):
+    """Escaping from battle should not count as a win for either side."""
+    monkeypatch.setattr(random.Random, "random", lambda self: 0.1)  # running always succeeds
+    result = run_battle(PokemonFactory.create_pokemon("Squirtle"), "Bulbasaur",
+                        policy=lambda battle, options: "Run")
+    assert result.winner is None
+    assert result.turns == 1
+
+def test_decision_cap_stops_endless_policies():
+    """A policy that never uses up a turn should be stopped by the decision cap."""
+    result = run_battle(PokemonFactory.create_pokemon("Squirtle"), "Bulbasaur",
+                        policy=lambda battle, options: "Unknown", max_decisions=5)
+    assert result.winner is None
+    assert result.turns == 0
+
+def test_run_battles_reports_every_battle():
+    """Batch helper should return one result per battle."""
+    random.seed(2)
+    results = run_battles("Blastoise", "Charmander", 10, enemy_ai="easy")
+    assert len(results) == 10
+    assert all(r.winner == "player" for r in results)
+
+def test_same_seed_replays_battle_exactly():
+    """Battles with the same seed and player choices end the same way, regardless of the global random state."""
+    random.seed(100)
+    first = run_battles("Squirtle", "Charmander", 20, seed=42, enemy_ai="hard")
+    random.seed(200)
+    second = run_battles("Squirtle", "Charmander", 20, seed=42, enemy_ai="hard")
+    assert [r.seed for r in first] == list(range(42, 62))
+    for a, b in zip(first, second):
+        assert (a.winner, a.turns) == (b.winner, b.turns)
+        assert a.player_pokemon.current_health == b.player_pokemon.current_health
+        assert a.enemy_pokemon.current_health == b.enemy_pokemon.current_health
+
+def test_same_seed_replays_random_policy_battle():
+    """Random player choices come from a stream seeded by the battle, so they replay too."""
+    def outcomes():
+        return [(r.winner, r.turns, r.player_pokemon.current_health, r.enemy_pokemon.current_health)
+                for r in run_battles("Squirtle", "Charmander", 20, seed=42, policy=random_attack_policy)]
+    random.seed(100)
+    first = outcomes()
+    random.seed(200)
+    assert outcomes() == first
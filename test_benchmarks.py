@@ -0,0 +1,25 @@
+import json
+from .benchmarks import *
+from .benchmarks import BENCHMARKS
+from . import battle_manager
+
+def test_every_benchmark_runs_with_stand_ins():
+    """Each benchmark operation runs once against the stand-in messages."""
+    original = battle_manager.ServerMessage
+    with stand_in_messages():
+        assert battle_manager.ServerMessage is StandInServerMessage
+        for setup in BENCHMARKS.values():
+            setup()()
+    assert battle_manager.ServerMessage is original
+
+def test_results_are_json_and_comparable():
+    results = run_benchmarks(["potion_flyweight_get_potion"], repeat=1, memory_count=100, species_count=300)
+    loaded = json.loads(json.dumps(results))
+    assert loaded["benchmarks"]["potion_flyweight_get_potion"]["ns_per_call_median"] > 0
+    assert loaded["memory"]["count"] == 100
+    assert compare(loaded, loaded) == {"potion_flyweight_get_potion": 1.0}
+
+def test_full_bag_has_full_roster():
+    bag = full_bag()
+    assert bag.pokemon.is_full()
+    assert all(count == 3 for count in bag.potions.to_dict().values())
@@ -0,0 +1,91 @@
+import pickle
+import pytest
+from .compact_pokemon import CompactPokemon, SPECIES, BASE_EVOLUTION, FINAL_EVOLUTION
+from .pokemon import Pokemon, PokemonFactory
+from .benchmarks import benchmark_pokemon_memory
+
+def test_same_battle_results_as_pokemon():
+    """Attacks deal the same damage and give the same XP as the regular class."""
+    for attacker_name, defender_name in [("Ivysaur", "Squirtle"), ("Charmander", "Bulbasaur"), ("Piplup", "Turtwig")]:
+        regular = PokemonFactory.create_pokemon(attacker_name)
+        compact = CompactPokemon(attacker_name)
+        for i in range(len(regular.known_attacks)):
+            regular_result = regular.attack(i, PokemonFactory.create_pokemon(defender_name))
+            compact_result = compact.attack(i, CompactPokemon(defender_name))
+            assert compact_result["damage"] == regular_result["damage"]
+            assert compact_result["message"] == regular_result["message"]
+            assert compact.xp == regular.xp
+
+def test_templates_are_shared_and_read_only():
+    """Pokemon of a species share one template, and templates can't be changed."""
+    first, second = CompactPokemon("Squirtle"), CompactPokemon("Squirtle")
+    assert first.species is second.species
+    assert first.evolution_state is BASE_EVOLUTION
+    assert CompactPokemon("Blastoise").evolution_state is FINAL_EVOLUTION
+    with pytest.raises(AttributeError):
+        SPECIES["Squirtle"].max_health = 1
+    with pytest.raises(AttributeError):
+        first.nickname = "Shelly"
+
+def test_level_up_only_changes_own_moves():
+    """A level-up raises this Pokemon's damage without touching the species or other Pokemon."""
+    poke, other = CompactPokemon("Charmander"), CompactPokemon("Charmander")
+    poke.xp = 30
+    assert poke.level_up_check() is None
+    assert poke.level == 2
+    assert poke.max_health == 60
+    assert poke.known_attacks[0]["damage"] == SPECIES["Charmander"].attack_damage[0] + 5
+    assert other.known_attacks[0]["damage"] == SPECIES["Charmander"].attack_damage[0]
+
+def test_evolves_at_threshold():
+    poke = CompactPokemon("Bulbasaur")
+    poke.level = 3
+    poke.xp = 30
+    evolved = poke.level_up_check()
+    assert isinstance(evolved, CompactPokemon)
+    assert evolved.name == "Ivysaur"
+
+def test_round_trip_with_pokemon_format():
+    """Saved lists are interchangeable with Pokemon.to_list."""
+    poke = CompactPokemon("Wartortle")
+    poke.xp = 60
+    poke.level_up_check()
+    poke.take_damage(12)
+    data = poke.to_list()
+    assert CompactPokemon.from_list(data).to_list() == data
+    assert Pokemon.from_list(data).known_attacks == data[6]
+
+    regular = Pokemon("Turtwig")
+    regular.current_health = 7
+    assert CompactPokemon.from_pokemon(regular).to_list() == regular.to_list()
+
+def test_observers_not_pickled():
+    """Pickling drops observers like Pokemon.__getstate__ does."""
+    poke = CompactPokemon("Piplup")
+    poke.add_observer(object())
+    poke.current_health = 9
+    copy = pickle.loads(pickle.dumps(poke))
+    assert copy.current_health == 9
+    assert copy._observers is None
+
+def test_compact_pokemon_uses_less_memory():
+    result = benchmark_pokemon_memory(2000)
+    assert result["compact_bytes"] < result["pokemon_bytes"]
+
+def test_saved_evolution_state_survives_round_trip():
+    """A saved evolution state is kept like Pokemon.from_list keeps it, unknown names fall back."""
+    data = Pokemon("Charmander").to_list()
+    data[7] = "FinalEvolutionState"
+    poke = CompactPokemon.from_list(data)
+    assert poke.evolution_state is FINAL_EVOLUTION
+    assert poke.to_list() == Pokemon.from_list(data).to_list()
+    data[7] = "RetiredEvolutionState"
+    assert CompactPokemon.from_list(data).evolution_state is BASE_EVOLUTION
+
+def test_templates_follow_species_registry():
+    from .species_registry import SPECIES_REGISTRY
+    record = SPECIES_REGISTRY.get("Ivysaur")
+    template = SPECIES["Ivysaur"]
+    assert (template.max_health, template.attack_damage, template.next_evolution) == \
+           (record.max_health, record.move_damage, SPECIES_REGISTRY.next_evolution("Ivysaur"))
+    assert template.attack_names == SPECIES_REGISTRY.move_names(record)
@@ -23,6 +23,9 @@ class DummyPlayer:
         self.state = {}
         self.menu = None
 
+    def get_name(self):
+        return "Dummy"
+
     def get_state(self, key, default=None):
         return self.state.get(key, default)
 
@@ -97,7 +100,7 @@ def test_nurse_heals_pokemon(monkeypatch, dummy_player, dummy_pokemon):
     """Nurse should fully heal Pokemon if HP is not max."""
     from pengumon import custom_NPCs
     monkeypatch.setattr(custom_NPCs, "ServerMessage", DummyServerMessage)
-    monkeypatch.setattr(custom_NPCs, "Pokemon", DummyPokemon)
+    monkeypatch.setattr("pengumon.player_session.Pokemon", DummyPokemon)
 
     dummy_player.set_state("active_pokemon", dummy_pokemon.to_list())
     nurse = custom_NPCs.Nurse("Hello")
@@ -121,7 +124,7 @@ def test_nurse_heals_bag_pokemon(monkeypatch, dummy_player):
     """Nurse should also heal dameged Pokemon in bag."""
     from pengumon import custom_NPCs
     monkeypatch.setattr(custom_NPCs, "ServerMessage", DummyServerMessage)
-    monkeypatch.setattr(custom_NPCs, "Pokemon", DummyPokemon)
+    monkeypatch.setattr("pengumon.player_session.Pokemon", DummyPokemon)
 
     damaged = DummyPokemon(current_hp=10, max_hp=50)
     dummy_player.set_state("active_pokemon", damaged.to_list())
@@ -29,6 +29,9 @@ class DummyPlayer:
         self.menu = None
         self.room = SimpleNamespace(remove_from_grid=lambda map_obj, start_pos: None)
 
+    def get_name(self):
+        return "Dummy"
+
     def get_state(self, key, default=None):
         return self.state.get(key, default)
 
@@ -65,7 +68,7 @@ def test_battle_plate_fainted_pokemon(monkeypatch, dummy_player):
     dummy_player.set_state("active_pokemon", fainted.to_list())
 
     # Patch Pokemon.from_list to return   dummy
-    monkeypatch.setattr("pengumon.custom_pressure_plates.Pokemon", DummyPokemon)
+    monkeypatch.setattr("pengumon.player_session.Pokemon", DummyPokemon)
     plate = PokemonBattlePressurePlate("Charmander")
     result = plate.player_entered(dummy_player)
     assert "fainted" in result[0]._get_data()["text"]
@@ -83,8 +86,9 @@ def test_battle_plate_sets_up_battle_manager(monkeypatch, dummy_player):
     )
 
     # Patch battle manager class constructor
-    monkeypatch.setattr("pengumon.custom_pressure_plates.PokemonBattleManager", lambda player, name: dummy_battle)
-    monkeypatch.setattr("pengumon.custom_pressure_plates.Pokemon.from_list", lambda data: DummyPokemon(current_hp=30))
+    monkeypatch.setattr("pengumon.custom_pressure_plates.PokemonBattleManager", lambda player, name, **kwargs: dummy_battle)
+    monkeypatch.setattr("pengumon.custom_pressure_plates.BATTLE_SCHEDULER.add", lambda battle: None)
+    monkeypatch.setattr("pengumon.player_session.Pokemon.from_list", lambda data: DummyPokemon(current_hp=30))
 
     plate = PokemonBattlePressurePlate("Charmander")
     result = plate.player_entered(dummy_player)
@@ -101,8 +105,9 @@ def test_battle_plate_select_and_clear_option(monkeypatch, dummy_player):
     )
 
     dummy_player.set_state("active_pokemon", DummyPokemon(current_hp=30).to_list())
-    monkeypatch.setattr("pengumon.custom_pressure_plates.PokemonBattleManager", lambda player, name: dummy_battle)
-    monkeypatch.setattr("pengumon.custom_pressure_plates.Pokemon.from_list", lambda data: DummyPokemon(current_hp=30))
+    monkeypatch.setattr("pengumon.custom_pressure_plates.PokemonBattleManager", lambda player, name, **kwargs: dummy_battle)
+    monkeypatch.setattr("pengumon.custom_pressure_plates.BATTLE_SCHEDULER.add", lambda battle: None)
+    monkeypatch.setattr("pengumon.player_session.Pokemon.from_list", lambda data: DummyPokemon(current_hp=30))
 
     plate = PokemonBattlePressurePlate("Charmander")
     plate.player_entered(dummy_player)
@@ -142,6 +147,18 @@ def test_difficulty_plate_invalid_selection(dummy_player):
     result = plate.select_option(dummy_player, "Impossible")
     assert "Invalid" in result[0]._get_data()["text"]
 
+def test_difficulty_plate_lists_registered_strategies(dummy_player):
+    """Difficulties added to the AI registry can be chosen on the plate."""
+    register_ai("nightmare", HardAI, label="Nightmare")
+    try:
+        plate = ChooseDifficultyPlate()
+        result = plate.select_option(dummy_player, "Nightmare")
+        assert "Difficulty set to Nightmare" in result[0]._get_data()["text"]
+        assert dummy_player.get_state("enemy_ai") == "nightmare"
+        assert "Nightmare" in plate.player_entered(dummy_player)[0]._get_data()["text"]
+    finally:
+        AI_REGISTRY.unregister("nightmare")
+
 # ---------------------- PotionPressurePlate ------------------------
 
 def test_potion_plate_adds_healing_potion(dummy_player):
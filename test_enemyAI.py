@@ -66,4 +66,265 @@ def test_all_ai_return_valid_action(dummy_pokemon):
     for ai_cls in [EasyAI, MediumAI, HardAI]:
         ai = ai_cls()
         action = ai.choose_action(dummy_pokemon, dummy_pokemon)
-        assert action == "Dodge" or (action.isdigit() and int(action) in range(len(dummy_pokemon.known_attacks)))
\ No newline at end of file
+        assert action == "Dodge" or (action.isdigit() and int(action) in range(len(dummy_pokemon.known_attacks)))
+
+
+def test_ai_uses_given_random_stream(dummy_pokemon):
+    """AIs draw from the stream they are given: the same seed repeats the choices, another seed changes them."""
+    def actions(ai, seed):
+        rng = random.Random(seed)
+        return [ai.choose_action(dummy_pokemon, dummy_pokemon, rng) for _ in range(20)]
+
+    for ai_cls in [EasyAI, MediumAI, HardAI]:
+        assert actions(ai_cls(), 9) == actions(ai_cls(), 9)
+        assert actions(ai_cls(), 9) != actions(ai_cls(), 10)
+
+
+# ---------- ExpertAI ----------
+
+from .enemyAI import ExpertAI
+from .pokemon import PokemonFactory
+
+def test_expert_ai_takes_reachable_knockout():
+    """With the player one hit from fainting, the expert attacks with a move that knocks them out."""
+    enemy = PokemonFactory.create_pokemon("Charmander")
+    player = PokemonFactory.create_pokemon("Bulbasaur")
+    player.current_health = 1
+    ai = ExpertAI(node_budget=10**6)
+    assert ai.choose_action(enemy, player, random.Random(0)) != "Dodge"
+    assert ai.best_actions(enemy, player)[1] == ai.max_depth
+
+def test_expert_ai_prefers_strongest_move_when_racing():
+    enemy = PokemonFactory.create_pokemon("Charmander")
+    player = PokemonFactory.create_pokemon("Squirtle")
+    ai = ExpertAI(node_budget=10**6, max_depth=3)
+    strongest = max(range(len(enemy.known_attacks)), key=lambda i: enemy.known_attacks[i]["damage"])
+    assert ai.choose_action(enemy, player, random.Random(0)) == str(strongest)
+
+def test_expert_ai_falls_back_when_out_of_budget(monkeypatch):
+    """A decision that can't finish one round of search uses HardAI instead of stalling."""
+    enemy = PokemonFactory.create_pokemon("Charmander")
+    player = PokemonFactory.create_pokemon("Squirtle")
+    ai = ExpertAI(node_budget=1)
+    monkeypatch.setattr(ai.fallback, "choose_action", lambda e, p, rng: "fallback")
+    assert ai.choose_action(enemy, player, random.Random(0)) == "fallback"
+    assert ai.best_actions(enemy, player) == (None, 0)
+
+def test_expert_ai_depth_depends_only_on_node_budget():
+    """The same position searches to the same depth however fast the machine is, so seeded battles replay."""
+    enemy = PokemonFactory.create_pokemon("Venusaur")
+    player = PokemonFactory.create_pokemon("Blastoise")
+    ai = ExpertAI(max_depth=50)
+    actions, depth = ai.best_actions(enemy, player)
+    assert 0 < depth < 50
+    assert ai.best_actions(enemy, player) == (actions, depth)
+
+def test_expert_ai_counts_on_player_dodge():
+    """When the player dodged, a finishing blow may miss, so the root values attacks with the dodge chance."""
+    from .enemyAI import _Search
+    search = _Search({10: 0}, [10], 100, 100, player_dodge=0.5, enemy_dodge=0.0, node_budget=10**6)
+    assert search.root(100, 10, False, 1)["0"] == 1.0
+    assert search.root(100, 10, True, 1)["0"] < 1.0
+
+# ---------- Policy cache ----------
+
+from .enemyAI import PolicyCache, build_policy_table, enable_policy_cache, disable_policy_cache, \
+    choose_enemy_action, policy_key
+
+def test_distributions_match_choose_action(dummy_pokemon):
+    """The tabulated policies give each action the probability choose_action picks it with."""
+    for ai_cls, samples in [(EasyAI, 4000), (MediumAI, 4000), (HardAI, 4000)]:
+        ai, rng = ai_cls(), random.Random(5)
+        counts = {}
+        for _ in range(samples):
+            action = ai.choose_action(dummy_pokemon, dummy_pokemon, rng)
+            counts[action] = counts.get(action, 0) + 1
+        distribution = ai.action_distribution(dummy_pokemon, dummy_pokemon)
+        assert sum(p for _, p in distribution) == pytest.approx(1.0)
+        for action, probability in distribution:
+            assert counts.get(action, 0) / samples == pytest.approx(probability, abs=0.03)
+
+def test_cache_hits_repeated_positions():
+    cache = PolicyCache()
+    enemy, player = PokemonFactory.create_pokemon("Charmander"), PokemonFactory.create_pokemon("Squirtle")
+    rng = random.Random(1)
+    actions = {cache.choose_action(HardAI(), "hard", enemy, player, rng) for _ in range(200)}
+    assert (cache.hits, cache.misses) == (199, 1)
+    assert actions == {"Dodge", "0", "1"}
+    player.current_health -= 1  # same HP bucket, same entry
+    cache.choose_action(HardAI(), "hard", enemy, player, rng)
+    assert cache.misses == 1
+
+def test_cache_key_tells_levels_apart():
+    """A level-up changes the move damages, so the leveled Pokemon gets its own entry."""
+    cache = PolicyCache()
+    enemy, player = PokemonFactory.create_pokemon("Charmander"), PokemonFactory.create_pokemon("Squirtle")
+    cache.choose_action(HardAI(), "hard", enemy, player, random.Random(1))
+    enemy.xp = 10**6
+    enemy.level_up_check()
+    cache.choose_action(HardAI(), "hard", enemy, player, random.Random(1))
+    assert cache.misses == 2
+
+def test_cache_key_tells_config_snapshots_apart():
+    """After a config reload the AI's entries are computed again with the new dodge chances."""
+    cache = PolicyCache()
+    enemy, player = PokemonFactory.create_pokemon("Charmander"), PokemonFactory.create_pokemon("Squirtle")
+    reloaded = ExpertAI(GameConfig(1, opponent_chance_to_dodge=0.0))
+    for ai in (ExpertAI(), reloaded, reloaded):
+        cache.choose_action(ai, "expert", enemy, player, random.Random(1))
+    assert (cache.hits, cache.misses) == (1, 2)
+    key = policy_key("expert", enemy, player, config=reloaded.config)
+    assert list(cache.get(key)[0]) == [action for action, _ in reloaded.action_distribution(enemy, player)]
+
+def test_cache_without_capacity_still_decides():
+    cache = PolicyCache(capacity=0)
+    enemy, player = PokemonFactory.create_pokemon("Charmander"), PokemonFactory.create_pokemon("Squirtle")
+    assert cache.choose_action(HardAI(), "hard", enemy, player, random.Random(1)) in {"Dodge", "0", "1"}
+    assert len(cache) == 0
+
+def test_cache_evicts_least_recently_used():
+    cache = PolicyCache(capacity=2)
+    for key in ("a", "b"):
+        cache.put((key,), [("Dodge", 1.0)])
+    cache.get(("a",))
+    cache.put(("c",), [("0", 1.0)])
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None and cache.get(("c",)) is not None
+
+def test_preloaded_table_round_trips(tmp_path):
+    table = build_policy_table(HardAI(), "hard", ["Charmander", "Squirtle"])
+    assert len(table) == 4 * 10 * 10
+    cache = PolicyCache(capacity=1)
+    cache.preload(table)
+    path = str(tmp_path / "policy.json")
+    cache.save(path)
+
+    loaded = PolicyCache(capacity=1)
+    loaded.load(path)
+    assert len(loaded) == len(table)
+    key, distribution = table[0]
+    actions, cumulative = loaded.get(key)
+    assert list(actions) == [action for action, _ in distribution]
+    assert cumulative[-1] == pytest.approx(1.0)
+
+def test_module_cache_is_opt_in():
+    enemy, player = PokemonFactory.create_pokemon("Charmander"), PokemonFactory.create_pokemon("Squirtle")
+    ai = ExpertAI()
+    plain = [choose_enemy_action(ai, "expert", enemy, player, random.Random(2)) for _ in range(3)]
+    assert plain == [ai.choose_action(enemy, player, random.Random(2))] * 3
+    cache = enable_policy_cache()
+    try:
+        choose_enemy_action(ai, "expert", enemy, player, random.Random(2))
+        assert cache.misses == 1 and len(cache) == 1
+        choose_enemy_action(ai, "expert", enemy, player, random.Random(2))
+        assert cache.hits == 1
+    finally:
+        disable_policy_cache()
+
+def test_table_ais_bypass_module_cache():
+    """Easy, medium and hard decide faster than a cache lookup, so they never go through it."""
+    enemy, player = PokemonFactory.create_pokemon("Charmander"), PokemonFactory.create_pokemon("Squirtle")
+    cache = enable_policy_cache()
+    try:
+        action = choose_enemy_action(HardAI(), "hard", enemy, player, random.Random(2))
+        assert action == HardAI().choose_action(enemy, player, random.Random(2))
+        assert len(cache) == 0
+    finally:
+        disable_policy_cache()
+
+# ---------- Strategy registry ----------
+
+from .enemyAI import AIRegistry, AI_REGISTRY, ExpertAI
+from .game_config import GameConfig
+
+def test_registry_shares_one_instance():
+    assert AI_REGISTRY.get("hard") is AI_REGISTRY.get("hard")
+    assert isinstance(AI_REGISTRY.get("easy"), EasyAI)
+    assert AI_REGISTRY.names()[:4] == ["easy", "medium", "hard", "expert"]
+
+def test_registry_resolves_unknown_names_to_default():
+    name, ai = AI_REGISTRY.resolve(None)
+    assert name == "medium" and isinstance(ai, MediumAI)
+    assert AI_REGISTRY.resolve("removed")[0] == "medium"
+    with pytest.raises(KeyError):
+        AI_REGISTRY.get("removed")
+
+def test_lazy_registration_imports_on_first_use():
+    registry = AIRegistry()
+    registry.register("copycat", "pengumon.enemyAI:HardAI", label="Copy Cat")
+    assert registry.label("copycat") == "Copy Cat"
+    assert isinstance(registry.get("copycat"), HardAI)
+
+def test_config_strategies_follow_the_battle_snapshot():
+    registry = AIRegistry()
+    registry.register("expert", ExpertAI, uses_config=True)
+    first, second = GameConfig(1), GameConfig(2)
+    ai = registry.get("expert", first)
+    assert ai.config is first
+    assert registry.get("expert", first) is ai
+    assert registry.get("expert", second).config is second
+
+# ---------- Move tables ----------
+
+from .enemyAI import MoveTable, move_table, FAVOR_STRONGER
+
+def test_move_table_matches_random_choices():
+    """A table picks the same attack from the same draw as random.choices did, so seeded battles don't change."""
+    damages = [10, 30, 60, 45]
+    weights = [d / sum(damages) for d in damages]
+    table = MoveTable(damages)
+    for seed in range(500):
+        expected = random.Random(seed).choices(range(4), weights=weights)[0]
+        assert table.sample(random.Random(seed)) == str(expected)
+
+def test_level_up_gets_new_move_table():
+    pokemon = PokemonFactory.create_pokemon("Charmander")
+    before = HardAI().move_table(pokemon)
+    assert HardAI().move_table(PokemonFactory.create_pokemon("Charmander")) is before
+    pokemon.xp = 10**6
+    pokemon.level_up_check()
+    after = HardAI().move_table(pokemon)
+    assert after is not before
+    assert after is move_table(tuple(a["damage"] for a in pokemon.known_attacks), FAVOR_STRONGER)
+
+# ---------- Batched decisions ----------
+
+from .enemyAI import choose_enemy_actions, choose_enemy_action
+
+def _batch_positions(count):
+    """Mixed species and HP (some below HardAI's low-HP threshold)."""
+    species = ["Charmander", "Squirtle", "Bulbasaur", "Charizard"]
+    enemies = []
+    for i in range(count):
+        enemy = PokemonFactory.create_pokemon(species[i % len(species)])
+        enemy.current_health = max(1, enemy.max_health * (i % 10) // 10)
+        enemies.append(enemy)
+    return enemies, [PokemonFactory.create_pokemon("Squirtle")] * count
+
+@pytest.mark.parametrize("ai", [EasyAI(), MediumAI(), HardAI(), ExpertAI(node_budget=200)])
+def test_batched_actions_match_each_battle_deciding_alone(ai):
+    """Same actions and the same rng streams afterwards, so batched battles still replay."""
+    count = 40
+    enemies, players = _batch_positions(count)
+    dodging = [i % 3 == 0 for i in range(count)]
+    for round_seed in range(5):
+        alone = [random.Random(round_seed * count + i) for i in range(count)]
+        batched = [random.Random(round_seed * count + i) for i in range(count)]
+        expected = [ai.decide(*battle) for battle in zip(enemies, players, alone, dodging)]
+        assert ai.choose_actions(enemies, players, batched, dodging) == expected
+        assert [rng.random() for rng in batched] == [rng.random() for rng in alone]
+
+def test_batch_goes_through_policy_cache_when_enabled():
+    count = 20
+    enemies, players = _batch_positions(count)
+    ai, dodging = ExpertAI(), [False] * count
+    cache = enable_policy_cache()
+    try:
+        alone = [random.Random(i) for i in range(count)]
+        expected = [choose_enemy_action(ai, "expert", *battle) for battle in zip(enemies, players, alone, dodging)]
+        misses = cache.misses
+        batched = [random.Random(i) for i in range(count)]
+        assert choose_enemy_actions(ai, "expert", enemies, players, batched, dodging) == expected
+        assert cache.misses == misses
+    finally:
+        disable_policy_cache()
@@ -0,0 +1,119 @@
+import json
+import os
+import pytest
+from .game_config import *
+from .pokemon import PokemonFactory, GameConstants, TypeAdvantageCalculator
+from .items import SmallPotion, PotionFlyweightFactory
+from .pokeball import RegularPokeball
+from .battle_manager import PokemonBattleManager
+from .battle_simulator import SimulatedPlayer
+from .bag import Bag
+
+@pytest.fixture(autouse=True)
+def restore_config():
+    yield
+    CONFIG.reset()
+
+def write_config(path, data):
+    with open(path, "w") as file:
+        json.dump(data, file)
+
+def test_defaults_match_constants():
+    assert DEFAULT_CONFIG.base_xp_threshold == GameConstants.BASE_XP_THRESHOLDD
+    assert DEFAULT_CONFIG.evolution_level_threshold == GameConstants.EVOLUTION_LEVEL_THRESHOLD
+    assert RegularPokeball().catch_rate == DEFAULT_CONFIG.catch_rates["Pokeball"]
+    assert TypeAdvantageCalculator.calculate_multiplier(PokemonType.FIRE, PokemonType.GRASS, 1) == 1.4
+
+def test_snapshot_is_read_only_and_validated():
+    with pytest.raises(AttributeError):
+        DEFAULT_CONFIG.player_chance_to_run = 1.0
+    with pytest.raises(ValueError):
+        GameConfig(player_luck=1.0)
+    with pytest.raises(ValueError):
+        GameConfig(type_advantages={"FIRE": ["ICE"]})
+
+def test_snapshot_values_cannot_be_changed_in_place():
+    config = GameConfig(catch_rates={"Pokeball": 0.9})
+    with pytest.raises(TypeError):
+        config.catch_rates["Pokeball"] = 1.0
+    with pytest.raises(TypeError):
+        config.type_advantages["FIRE"] = ("WATER",)
+    assert type(config.advantage_multipliers) is tuple
+    assert json.loads(json.dumps(config.to_dict()))["catch_rates"]["Pokeball"] == 0.9
+
+def test_values_of_the_wrong_type_are_rejected():
+    for bad in ({"player_chance_to_dodge": "0.5"}, {"base_xp_threshold": 30.5}, {"player_chance_to_run": True},
+                {"advantage_multipliers": [1.5, 2.0]}, {"potion_heal": {"Small Potion": "lots"}},
+                {"potion_heal": {"Small Potion": 12.5}}, {"type_advantages": {"FIRE": "GRASS"}}):
+        with pytest.raises(ValueError):
+            GameConfig(**bad)
+    assert GameConfig(enemy_response_time=1.5).enemy_response_time == 1.5
+    assert GameConfig(catch_rates={"Pokeball": 0.6}).catch_rates["Pokeball"] == 0.6
+
+def test_type_chart_is_part_of_the_snapshot():
+    config = GameConfig(type_advantages={"GRASS": ["FIRE"]}, advantage_multipliers=[3.0, 3.0, 3.0])
+    assert TypeAdvantageCalculator.calculate_multiplier(PokemonType.GRASS, PokemonType.FIRE, 1, config) == 3.0
+    assert TypeAdvantageCalculator.calculate_multiplier(PokemonType.FIRE, PokemonType.GRASS, 1, config) == 1.0
+    assert TypeAdvantageCalculator.calculate_multiplier(PokemonType.FIRE, PokemonType.GRASS, 1) == 1.4
+
+def test_battle_keeps_its_snapshot():
+    """A battle runs with the snapshot it started with; later battles get the new one."""
+    player = SimulatedPlayer()
+    running = PokemonBattleManager(player, "Squirtle", player_pokemon=PokemonFactory.create_pokemon("Charmander"), bag=Bag())
+    CONFIG.set(GameConfig(1, enemy_response_time=10))
+    started_after = PokemonBattleManager(player, "Squirtle", player_pokemon=PokemonFactory.create_pokemon("Charmander"), bag=Bag())
+    assert running.get_config() is DEFAULT_CONFIG
+    assert started_after.get_config().enemy_response_time == 10
+
+def test_level_up_uses_given_snapshot():
+    config = GameConfig(base_xp_threshold=5, base_health_increase=100)
+    poke = PokemonFactory.create_pokemon("Squirtle")
+    poke.xp = 5
+    poke.level_up_check()
+    assert poke.level == 1
+    poke.level_up_check(config)
+    assert poke.level == 2 and poke.max_health == 150
+
+def test_items_use_given_snapshot():
+    config = GameConfig(potion_heal={"Small Potion": 40}, catch_rates={"Pokeball": 0.0})
+    poke = PokemonFactory.create_pokemon("Squirtle")
+    poke.current_health = 1
+    SmallPotion().use(poke, config)
+    assert poke.current_health == 41
+    assert not RegularPokeball().use(PokemonFactory.create_pokemon("Piplup"), config=config)
+
+def test_new_items_pick_up_reloaded_values():
+    CONFIG.set(GameConfig(1, potion_heal={"Small Potion": 15}))
+    assert SmallPotion().get_value() == 15
+    assert PotionFlyweightFactory.get_small_potion().get_value() == 15
+
+def test_watcher_swaps_snapshot_when_file_changes(tmp_path):
+    path = str(tmp_path / "config.json")
+    write_config(path, {"player_chance_to_run": 0.2})
+    holder = ConfigHolder(DEFAULT_CONFIG)
+    watcher = ConfigWatcher(path, holder)
+
+    assert watcher.poll()
+    assert (holder.snapshot.version, holder.snapshot.player_chance_to_run) == (1, 0.2)
+    assert not watcher.poll()  # unchanged
+
+    write_config(path, {"player_chance_to_run": 0.3, "catch_rates": {"Great Ball": 0.9}})
+    os.utime(path, ns=(1, 1))
+    assert watcher.poll()
+    assert holder.snapshot.version == 2
+    assert holder.snapshot.catch_rates == {**DEFAULT_CONFIG.catch_rates, "Great Ball": 0.9}
+
+def test_bad_file_keeps_current_snapshot(tmp_path):
+    path = str(tmp_path / "config.json")
+    write_config(path, {"player_chance_to_run": 0.2, "typo": 1})
+    holder = ConfigHolder(DEFAULT_CONFIG)
+    watcher = ConfigWatcher(path, holder)
+    assert not watcher.poll()
+    assert holder.snapshot is DEFAULT_CONFIG
+    assert "typo" in watcher.last_error
+
+    write_config(path, {"player_chance_to_dodge": "high"})
+    os.utime(path, ns=(1, 1))
+    assert not watcher.poll()
+    assert holder.snapshot is DEFAULT_CONFIG
+    assert "player_chance_to_dodge" in watcher.last_error
@@ -82,4 +82,13 @@ def test_flyweight_revive_medium():
     """Flyweight factory should return revive potion instance correctly."""
     revive = PotionFlyweightFactory.get_revive_medium_potion()
     assert isinstance(revive, RevivePotion)
-    assert revive.get_name() == "Revive Medium Potion"
\ No newline at end of file
+    assert revive.get_name() == "Revive Medium Potion"
+def test_flyweight_survives_concurrent_clear(monkeypatch):
+    """A config reload clearing the cache between storing and returning still gives a potion."""
+    class ClearedAtOnce(dict):
+        def __setitem__(self, key, value):
+            super().__setitem__(key, value)
+            self.clear()
+    monkeypatch.setattr(PotionFlyweightFactory, "_flyweights", ClearedAtOnce())
+    assert isinstance(PotionFlyweightFactory.get_potion("small potion"), SmallPotion)
+    assert isinstance(PotionFlyweightFactory.get_potion("revive medium potion"), RevivePotion)
@@ -0,0 +1,49 @@
+import pytest
+import random
+np = pytest.importorskip("numpy")
+from .matchup_estimator import build_damage_table, estimate_matchups, DIFFICULTIES
+from .battle_simulator import run_battles, random_attack_policy
+from .pokedex import pokedex
+from .pokemon import Pokemon
+
+@pytest.fixture(scope="module")
+def table():
+    return estimate_matchups(400, seed=7)
+
+def test_damage_table_matches_scalar_attack():
+    """Every entry of the damage table should equal what Pokemon.attack deals."""
+    species = list(pokedex)
+    damage, move_count = build_damage_table(species)
+    for a, attacker_name in enumerate(species):
+        for d, defender_name in enumerate(species):
+            attacker = Pokemon(attacker_name)
+            assert move_count[a] == len(attacker.known_attacks)
+            for m in range(move_count[a]):
+                defender = Pokemon(defender_name)
+                defender.current_health = 10_000  # keep the defender alive so no XP is awarded
+                assert damage[a, d, m] == attacker.attack(m, defender)["damage"]
+
+def test_table_covers_every_matchup(table):
+    """Probabilities are defined for every pairing and difficulty."""
+    n = len(pokedex)
+    assert table.win_probability_table.shape == (n, n, len(DIFFICULTIES))
+    assert np.all(table.win_probability_table + table.loss_probability_table <= 1.0)
+    assert np.all(table.expected_turns_table >= 1)
+
+def test_stronger_species_wins(table):
+    """A final evolution should almost always beat a base form."""
+    assert table.win_probability("Charizard", "Bulbasaur", "hard") > 0.99
+    assert table.win_probability("Charmander", "Venusaur", "easy") < 0.05
+
+def test_seeded_runs_are_reproducible():
+    """The same seed gives the same estimates."""
+    first = estimate_matchups(50, species=["Squirtle", "Charmander"], seed=3)
+    second = estimate_matchups(50, species=["Squirtle", "Charmander"], seed=3)
+    assert np.array_equal(first.win_probability_table, second.win_probability_table)
+
+def test_estimate_agrees_with_battle_manager(table):
+    """Vectorized estimates should match battles driven through PokemonBattleManager."""
+    random.seed(11)
+    results = run_battles("Bulbasaur", "Charmander", 1000, policy=random_attack_policy, enemy_ai="hard")
+    simulated = sum(r.winner == "player" for r in results) / len(results)
+    assert abs(simulated - table.win_probability("Bulbasaur", "Charmander", "hard")) < 0.08
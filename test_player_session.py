@@ -0,0 +1,175 @@
+import itertools
+import pytest
+from .player_session import PlayerSession, SessionCache
+from .pokemon import PokemonFactory
+from .bag import Bag, BagView
+from .items import SmallPotion
+from .pokeball import RegularPokeball
+
+# ---------- Dummy Classes ----------
+
+class CountingPlayer:
+    """Player stand-in that counts state reads and writes."""
+    names = itertools.count(1)
+
+    def __init__(self, name=None):
+        self.name = name or f"Player{next(self.names)}"
+        self.state = {}
+        self.reads = 0
+        self.writes = []
+
+    def get_name(self):
+        return self.name
+
+    def get_state(self, key, default=None):
+        self.reads += 1
+        return self.state.get(key, default)
+
+    def set_state(self, key, value):
+        self.writes.append(key)
+        self.state[key] = value
+
+@pytest.fixture
+def player():
+    player = CountingPlayer()
+    player.state["active_pokemon"] = PokemonFactory.create_pokemon("Squirtle").to_list()
+    player.state["bag"] = Bag().to_dict()
+    return player
+
+# ---------- Tests ----------
+
+def test_objects_are_deserialized_once(player):
+    """Repeated access returns the same live objects without touching player state again."""
+    session = PlayerSession(player)
+    first = session.get_active_pokemon()
+    assert session.get_active_pokemon() is first
+    assert session.get_bag() is session.get_bag()
+    assert player.reads == 2
+
+def test_missing_state_returns_none():
+    """Players without a Pokemon or bag get None."""
+    session = PlayerSession(CountingPlayer())
+    assert session.get_active_pokemon() is None
+    assert session.get_bag() is None
+
+def test_flush_writes_only_changed_parts(player):
+    """Only parts marked as changed are written back."""
+    session = PlayerSession(player)
+    session.flush()
+    assert player.writes == []
+
+    session.get_bag().potions.add(SmallPotion())
+    session.mark_dirty(PlayerSession.BAG)
+    session.flush()
+    assert player.writes == ["bag"]
+    assert player.state["bag"]["potions"]["small"] == 1
+    assert not session.is_dirty()
+
+def test_lru_eviction_flushes_idle_sessions(player):
+    """The least recently used session is flushed and dropped when the cache is full."""
+    cache = SessionCache(capacity=2)
+    session = cache.get(player)
+    session.get_active_pokemon().current_health = 1
+    session.mark_dirty(PlayerSession.ACTIVE_POKEMON)
+
+    other_a, other_b = CountingPlayer(), CountingPlayer()
+    cache.get(other_a)
+    cache.get(other_b)
+
+    assert player not in cache
+    assert len(cache) == 2
+    assert player.state["active_pokemon"][2] == 1
+
+def test_recent_use_protects_from_eviction(player):
+    """Accessing a session moves it to the back of the eviction order."""
+    cache = SessionCache(capacity=2)
+    other = CountingPlayer()
+    cache.get(player)
+    cache.get(other)
+    cache.get(player)
+    cache.get(CountingPlayer())
+    assert player in cache
+    assert other not in cache
+
+def test_invalidate_drops_without_writing(player):
+    """Invalidated sessions are dropped without writing stale objects back."""
+    cache = SessionCache()
+    session = cache.get(player)
+    session.set_bag(Bag())
+    cache.invalidate(player)
+    assert player not in cache
+    assert player.writes == []
+    assert cache.get(player) is not session
+
+def test_reconnect_flushes_old_session(player):
+    """A new player object with the same name gets a new session, after the old one was saved."""
+    cache = SessionCache()
+    session = cache.get(player)
+    session.get_active_pokemon().current_health = 1
+    session.mark_dirty(PlayerSession.ACTIVE_POKEMON)
+
+    reconnected = CountingPlayer(player.get_name())
+    reconnected.state = player.state
+    new_session = cache.get(reconnected)
+    assert new_session is not session
+    assert new_session.get_active_pokemon().current_health == 1
+    assert player not in cache and reconnected in cache
+
+def test_close_flushes_and_drops(player):
+    cache = SessionCache()
+    cache.get(player).set_bag(Bag())
+    cache.close(player)
+    assert player not in cache
+    assert player.writes == ["bag"]
+
+def test_loot_pickup_does_not_rewrite_roster(player, monkeypatch):
+    """Adding an item only rebuilds that compartment of the saved bag."""
+    session = PlayerSession(player)
+    session.get_bag().potions.add(SmallPotion())
+    monkeypatch.setattr(Bag, "to_dict", lambda self: pytest.fail("whole bag serialized"))
+    monkeypatch.setattr("pengumon.bag.PokemonRoster.to_list", lambda self: pytest.fail("roster serialized"))
+    session.flush()
+    assert player.state["bag"]["potions"]["small"] == 1
+    assert not session.is_dirty()
+
+def test_pickup_without_loaded_bag_touches_one_section(player, monkeypatch):
+    """A pickup rewrites the saved section without building the bag or its roster."""
+    player.state["bag"]["pokemon"] = [PokemonFactory.create_pokemon("Charmander").to_list()]
+    session = PlayerSession(player)
+    monkeypatch.setattr(Bag, "from_dict", lambda data: pytest.fail("bag built"))
+    session.add_item("potions", SmallPotion())
+    session.add_item("pokeballs", RegularPokeball())
+    assert player.state["bag"]["potions"]["small"] == 1
+    assert player.state["bag"]["pokeballs"]["pokeball"] == 1
+    assert len(player.state["bag"]["pokemon"]) == 1
+
+def test_pickup_with_loaded_bag_is_written_at_once(player):
+    """A loaded bag takes the item in memory and its section is saved right away, nothing left for a flush."""
+    session = PlayerSession(player)
+    bag = session.get_bag()
+    for _ in range(3):
+        session.add_item("potions", SmallPotion())
+    assert bag.potions.to_dict()["small"] == 3
+    assert player.writes == ["bag"] * 3
+    assert player.state["bag"]["potions"]["small"] == 3
+    assert not session.is_dirty()
+
+def test_replaced_bag_is_written_in_full(player):
+    """A new bag object replaces every section of the saved one."""
+    player.state["bag"]["potions"]["small"] = 4
+    session = PlayerSession(player)
+    session.get_bag()
+    bag = Bag()
+    bag.pokeballs.add(RegularPokeball())
+    session.set_bag(bag)
+    session.flush()
+    assert player.state["bag"] == bag.to_dict()
+
+def test_bag_view_reads_without_loading(player, monkeypatch):
+    """Reading through the view does not build the bag; once loaded, the live bag is returned."""
+    session = PlayerSession(player)
+    monkeypatch.setattr(Bag, "from_dict", lambda data: pytest.fail("bag built"))
+    assert isinstance(session.get_bag_view(), BagView)
+    monkeypatch.undo()
+    bag = session.get_bag()
+    assert session.get_bag_view() is bag
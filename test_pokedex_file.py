@@ -0,0 +1,60 @@
+import pytest
+from .pokedex_file import *
+from .pokedex import BUILTIN_POKEDEX, first_evolution_map, second_evolution_map
+from .pokemon import Pokemon, PokemonFactory, SecondEvolutionState
+from .compact_pokemon import CompactPokemon
+from .benchmarks import generate_species
+
+@pytest.fixture
+def species_file(tmp_path):
+    path = str(tmp_path / "species.jsonl")
+    entries, evolutions = generate_species(30)
+    write_pokedex_file(path, entries, evolutions)
+    yield path
+    unload_pokedex_file()
+
+def test_builtin_pokedex_round_trips(tmp_path):
+    """The built-in species written to a file load back as the same entries and evolution maps."""
+    path = str(tmp_path / "builtin.jsonl")
+    write_pokedex_file(path, BUILTIN_POKEDEX.values(), {**first_evolution_map, **second_evolution_map})
+    entries = LazyPokedex(path)
+    assert dict(entries) == BUILTIN_POKEDEX
+    assert entries.evolution_maps() == (first_evolution_map, second_evolution_map)
+    entries.close()
+
+def test_species_are_parsed_on_demand_and_cached(species_file):
+    entries = LazyPokedex(species_file, cache_size=2)
+    assert len(entries) == 30 and "Species000007" in entries
+    first = entries["Species000001"]
+    assert entries["Species000001"] is first
+    entries["Species000002"], entries["Species000003"]
+    assert entries["Species000001"] is not first  # evicted, parsed again
+    with pytest.raises(KeyError):
+        entries["Missingno"]
+    entries.close()
+
+def test_pokemon_work_on_loaded_file(species_file):
+    load_pokedex_file(species_file)
+    poke = PokemonFactory.create_pokemon("Species000003")
+    assert poke.known_attacks == [{"name": "Water Gun", "damage": 10}, {"name": "Vine Whip", "damage": 15}]
+    assert first_evolution_map["Species000003"] == "Species000004"
+    poke.xp, poke.level = 30, 3
+    evolved = poke.level_up_check()
+    assert evolved.name == "Species000004"
+    assert isinstance(evolved.evolution_state, SecondEvolutionState)
+    assert CompactPokemon("Species000005").name == "Species000005"
+    with pytest.raises(ValueError):
+        Pokemon("Charmander")
+
+    unload_pokedex_file()
+    assert Pokemon("Charmander").name == "Charmander"
+    assert "Species000003" not in first_evolution_map
+
+def test_stale_index_is_rebuilt(species_file):
+    entries, evolutions = generate_species(5)
+    write_pokedex_file(species_file, entries, evolutions)
+    with open(species_file, "a") as file:
+        file.write('{"name":"Extra","type":"FIRE","max_health":10,"level":1,"xp":0,"attacks":[]}\n')
+    lazy = LazyPokedex(species_file)
+    assert "Extra" in lazy and len(lazy) == 6
+    lazy.close()
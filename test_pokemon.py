@@ -95,6 +95,36 @@ def test_to_list_and_from_list_roundtrip(starter):
     
     
     
+def test_serialization_is_silent(starter, capsys):
+    """Saving and loading should not write anything to stdout."""
+    Pokemon.from_list(starter.to_list())
+    assert capsys.readouterr().out == ""
+
+def test_from_list_does_not_rebuild_from_pokedex(starter, monkeypatch):
+    """from_list builds the Pokemon from the saved fields without calling the constructor."""
+    data = starter.to_list()
+    monkeypatch.setattr(Pokemon, "__init__", lambda self, name: pytest.fail("constructor called"))
+    poke = Pokemon.from_list(data)
+    assert poke.to_list() == data
+    assert poke._observers == []
+
+def test_from_list_accepts_old_saves():
+    """Unknown saved types and evolution states fall back to the species defaults, as before."""
+    poke = Pokemon.from_list(["Squirtle", 60, 12, "UNKNOWN", 2, 5, [{"name": "Tackle", "damage": 15}], "OldState"])
+    assert poke.p_type == PokemonType.WATER
+    assert isinstance(poke.evolution_state, BaseEvolutionState)
+    with pytest.raises(ValueError):
+        Pokemon.from_list(["Missingno", 1, 1, "FIRE", 1, 0, [], "BaseEvolutionState"])
+
+def test_level_up_does_not_change_species(starter):
+    """Moves are copied per Pokemon, so a level-up leaves the pokedex and later Pokemon alone."""
+    base_damage = [attack["damage"] for attack in pokedex["Charmander"]["attacks"]]
+    starter.xp = 30
+    starter.level_up_check()
+    assert starter.known_attacks[0]["damage"] == base_damage[0] + GameConstants.BASE_ATTACK_INCREASE
+    assert [attack["damage"] for attack in pokedex["Charmander"]["attacks"]] == base_damage
+    assert [attack["damage"] for attack in Pokemon("Charmander").known_attacks] == base_damage
+
 #====================Test Pokemon Factory========================
 
 def test_create_specific_pokemon():
@@ -125,6 +155,27 @@ def test_type_advantage():
     assert TypeAdvantageCalculator.calculate_multiplier(PokemonType.GRASS, PokemonType.FIRE, 2) == 1.0
     assert TypeAdvantageCalculator.calculate_multiplier(PokemonType.WATER, PokemonType.FIRE, 3) == 2.0
 
+def test_type_chart_covers_every_type():
+    """Type chart should have an entry for every pair of types."""
+    for attacker_type in PokemonType:
+        for defender_type in PokemonType:
+            assert TypeAdvantageCalculator.calculate_multiplier(attacker_type, defender_type, 1) >= 1.0
+
+def test_unknown_evolution_level_rejected():
+    """Evolution levels outside the chart should raise instead of failing later."""
+    with pytest.raises(ValueError):
+        TypeAdvantageCalculator.calculate_multiplier(PokemonType.FIRE, PokemonType.GRASS, 4)
+
+def test_damage_vector_matches_attacks():
+    """Damage vector should match the damage of each individual attack."""
+    attacker = PokemonFactory.create_pokemon("Ivysaur")
+    defender = PokemonFactory.create_pokemon("Squirtle")
+    defender.current_health = 1000  # keep the defender alive through every attack
+    vector = TypeAdvantageCalculator.damage_vector(attacker, defender)
+    assert len(vector) == len(attacker.known_attacks)
+    for i, expected in enumerate(vector):
+        assert attacker.attack(i, defender)["damage"] == expected
+
 
 
 
@@ -0,0 +1,113 @@
+import json
+import pytest
+from .record_validation import *
+from .pokemon import Pokemon, PokemonFactory
+from .bag import Bag, PokemonRoster
+from .pokeball import RegularPokeball
+from .items import SmallPotion
+
+# ---------- Helpers ----------
+
+def pokemon_record(name="Squirtle"):
+    return PokemonFactory.create_pokemon(name).to_list()
+
+def bag_record(roster=("Charmander",)):
+    bag = Bag()
+    bag.potions.add(SmallPotion())
+    bag.pokeballs.add(RegularPokeball())
+    for name in roster:
+        ball = RegularPokeball()
+        ball.add(PokemonFactory.create_pokemon(name))
+        bag.pokemon.add(ball)
+    return bag.to_dict()
+
+# ---------- Pokemon records ----------
+
+def test_valid_records_pass():
+    assert validate_pokemon(pokemon_record()) == []
+    assert validate_bag(bag_record()) == []
+    assert validate_player_state({"active_pokemon": pokemon_record(), "bag": bag_record()}) == []
+
+def test_old_save_names_are_accepted():
+    """Unknown type and evolution state names fall back to the species defaults in from_list."""
+    data = ["Squirtle", 44, 44, "UNKNOWN", 1, 0, [{"name": "Tackle", "damage": 5}], "OldState"]
+    assert validate_pokemon(data) == []
+
+@pytest.mark.parametrize("index, value, field", [
+    (0, "Missingno", "[0]"),
+    (1, 0, "[1]"),
+    (2, 999, "[2]"),
+    (2, -1, "[2]"),
+    (4, 0, "[4]"),
+    (5, True, "[5]"),
+    (6, "Tackle", "[6]"),
+    (6, [{"name": "Tackle", "damage": -1}], "[6][0]"),
+    (7, None, "[7]"),
+])
+def test_bad_pokemon_fields_are_reported(index, value, field):
+    data = pokemon_record()
+    data[index] = value
+    problems = validate_pokemon(data)
+    assert len(problems) == 1
+    assert problems[0].startswith("active_pokemon" + field)
+
+def test_wrong_shape_is_reported():
+    assert validate_pokemon(["Squirtle", 44]) == ["active_pokemon: expected a list of 8 fields"]
+    assert validate_pokemon({"name": "Squirtle"}) == ["active_pokemon: expected a list of 8 fields"]
+
+def test_from_list_raises_record_error():
+    data = pokemon_record()
+    data[2] = "full"
+    with pytest.raises(RecordError) as error:
+        Pokemon.from_list(data)
+    assert error.value.path == "pokemon"
+    assert "pokemon[2]" in error.value.problems[0]
+
+# ---------- Bag records ----------
+
+def test_bad_bag_fields_are_reported():
+    data = bag_record()
+    data["potions"]["small"] = -2
+    data["pokeballs"]["golden"] = 1
+    data["coins"] = 5
+    data["pokemon"][0][1] = 0
+    problems = validate_bag(data)
+    assert len(problems) == 4
+    assert any(p.startswith("bag.potions.small") for p in problems)
+    assert any(p.startswith("bag.pokeballs.golden: unknown item") for p in problems)
+    assert any(p.startswith("bag.coins: unknown section") for p in problems)
+    assert any(p.startswith("bag.pokemon[0][1]") for p in problems)
+
+def test_roster_over_capacity_is_reported():
+    data = bag_record()
+    data["pokemon"] = data["pokemon"] * (PokemonRoster.MAX_CAPACITY + 1)
+    assert any("at most" in p for p in validate_bag(data))
+
+def test_from_dict_raises_record_error():
+    data = bag_record()
+    data["potions"]["small"] = "lots"
+    with pytest.raises(RecordError):
+        Bag.from_dict(data)
+    # ValueError callers still catch it
+    with pytest.raises(ValueError):
+        Bag.from_dict(data)
+
+# ---------- Dump scan ----------
+
+def test_scan_dump_reports_bad_lines(tmp_path):
+    bad = pokemon_record()
+    bad[4] = -3
+    lines = [
+        json.dumps({"player": "Ash", "state": {"active_pokemon": pokemon_record(), "bag": bag_record()}}),
+        json.dumps({"player": "Misty", "state": {"active_pokemon": bad}}),
+        "",
+        '{"player": "Brock", "sta',
+        json.dumps({"player": "Gary", "state": {}}),
+    ]
+    path = tmp_path / "dump.jsonl"
+    path.write_text("\n".join(lines) + "\n")
+
+    report = scan_dump(str(path))
+    assert report.records == 4
+    assert [(line, player) for line, player, _ in report.bad] == [(2, "Misty"), (4, None)]
+    assert not report.is_clean()
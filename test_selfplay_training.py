@@ -0,0 +1,85 @@
+import random
+import pytest
+from .selfplay_training import *
+from .enemyAI import LearnedPolicyAI, PolicyCache, DODGE_CODE, UNKNOWN_CODE
+from .pokemon import PokemonFactory
+
+SPECIES = ["Charmander", "Squirtle", "Bulbasaur"]
+
+def make_trainer(**kwargs):
+    return SelfPlayTrainer(SPECIES, seed=7, games_per_task=50, tasks_per_round=4, **kwargs)
+
+# ---------- Tests ----------
+
+def test_games_follow_the_rules():
+    """Transitions chain from one enemy decision to the next and end with the result."""
+    trainer = make_trainer()
+    rng = random.Random(3)
+    for _ in range(50):
+        transitions = play_game(trainer.rules, {}, 0, 1, 1.0, rng)
+        for (_, _, reward, next_state), (state, _, _, _) in zip(transitions, transitions[1:]):
+            assert reward == 0.0 and next_state == state
+        if transitions:
+            assert transitions[-1][2] in (1.0, -1.0, 0.0) and transitions[-1][3] is None
+
+def win_rate(trainer, q, epsilon, games=3000):
+    rng = random.Random(11)
+    wins = 0
+    for _ in range(games):
+        transitions = play_game(trainer.rules, q, rng.randrange(3), rng.randrange(3), epsilon, rng)
+        wins += bool(transitions) and transitions[-1][2] == 1.0
+    return wins / games
+
+def test_learned_policy_beats_random_play():
+    trainer = make_trainer()
+    trainer.train(6000, workers=1)
+    assert win_rate(trainer, trainer.q, 0.0) > win_rate(trainer, {}, 1.0) + 0.05
+
+def test_same_table_with_any_number_of_workers():
+    one, two = make_trainer(), make_trainer()
+    one.train(400, workers=1)
+    two.train(400, workers=2)
+    assert one.q == two.q
+
+def test_resumed_training_matches_uninterrupted(tmp_path):
+    path = str(tmp_path / "training.json")
+    straight = make_trainer()
+    straight.train(800, workers=1)
+
+    first = make_trainer()
+    first.train(400, workers=1, checkpoint_path=path)
+    resumed = SelfPlayTrainer.load_checkpoint(path)
+    assert resumed.episodes == 400
+    resumed.train(400, workers=1)
+    assert resumed.q == pytest.approx(straight.q)
+    assert not (tmp_path / "training.json.tmp").exists()
+
+def test_exported_policy_is_played_by_learned_ai(tmp_path):
+    trainer = make_trainer()
+    trainer.train(2000, workers=1)
+    path = str(tmp_path / "policy.json")
+    trainer.export_policy(path)
+    ai = LearnedPolicyAI.load(path)
+
+    enemy, player = PokemonFactory.create_pokemon("Squirtle"), PokemonFactory.create_pokemon("Charmander")
+    row = ai.policy["Squirtle|Charmander"]
+    assert len(row) == HP_BUCKETS * HP_BUCKETS
+    code = row[(HP_BUCKETS - 1) * HP_BUCKETS + HP_BUCKETS - 1] # both at full health, where every game starts
+    assert code != UNKNOWN_CODE
+    assert ai.choose_action(enemy, player) == ("Dodge" if code == DODGE_CODE else code)
+
+def test_unknown_matchup_falls_back():
+    ai = LearnedPolicyAI({"version": 1, "hp_buckets": HP_BUCKETS, "policy": {}})
+    enemy, player = PokemonFactory.create_pokemon("Squirtle"), PokemonFactory.create_pokemon("Charmander")
+    action = ai.choose_action(enemy, player, random.Random(0))
+    assert action == ai.fallback.choose_action(enemy, player, random.Random(0))
+
+def test_learned_ai_through_policy_cache():
+    """The policy cache asks every AI for its distribution with the player's dodge."""
+    cells = UNKNOWN_CODE * (HP_BUCKETS * HP_BUCKETS - 1) + DODGE_CODE # dodge when both are at full health
+    ai = LearnedPolicyAI({"version": 1, "hp_buckets": HP_BUCKETS, "policy": {"Squirtle|Charmander": cells}})
+    cache = PolicyCache()
+    enemy, player = PokemonFactory.create_pokemon("Squirtle"), PokemonFactory.create_pokemon("Charmander")
+    assert cache.choose_action(ai, "learned", enemy, player, random.Random(0), player_dodging=True) == "Dodge"
+    enemy.current_health = 1 # a cell the table has no action for, played by the fallback
+    assert cache.choose_action(ai, "learned", enemy, player, random.Random(0)) in dict(ai.fallback.action_distribution(enemy, player))
@@ -0,0 +1,42 @@
+import pytest
+from .species_registry import *
+
+def test_every_pokedex_entry_is_registered():
+    assert len(SPECIES_REGISTRY) == len(pokedex)
+    for name, data in pokedex.items():
+        record = SPECIES_REGISTRY.get(name)
+        assert SPECIES_REGISTRY.get_by_id(record.species_id) is record
+        assert SPECIES_REGISTRY.new_attacks(record) == data["attacks"]
+        assert record.p_type == data["type"]
+
+def test_moves_are_stored_once():
+    """A move known by several species has one record, even when its damage differs between them."""
+    names = [move.name for move in SPECIES_REGISTRY.moves]
+    assert len(names) == len(set(names))
+    tackle = SPECIES_REGISTRY.move_id("Tackle")
+    assert tackle in SPECIES_REGISTRY.get("Squirtle").move_ids
+    assert tackle in SPECIES_REGISTRY.get("Bulbasaur").move_ids
+
+def test_stages_and_chains():
+    assert SPECIES_REGISTRY.stage("Piplup") == BASE_STAGE
+    assert SPECIES_REGISTRY.stage("Prinplup") == SECOND_STAGE
+    assert SPECIES_REGISTRY.stage("Empoleon") == FINAL_STAGE
+    assert SPECIES_REGISTRY.stage("Missingno") is None
+    assert SPECIES_REGISTRY.next_evolution("Piplup") == "Prinplup"
+    assert SPECIES_REGISTRY.next_evolution("Empoleon") is None
+    assert SPECIES_REGISTRY.chain("Prinplup") == ("Piplup", "Prinplup", "Empoleon")
+
+def test_registry_is_read_only():
+    record = SPECIES_REGISTRY.get("Squirtle")
+    with pytest.raises(AttributeError):
+        record.max_health = 1
+    attacks = SPECIES_REGISTRY.new_attacks(record)
+    attacks[0]["damage"] += 100
+    assert SPECIES_REGISTRY.new_attacks(record)[0]["damage"] == record.move_damage[0]
+
+def test_standalone_species_is_final_stage():
+    entries = {"Ditto": {"name": "Ditto", "type": PokemonType.WATER, "max_health": 40, "level": 1, "xp": 0,
+                         "attacks": [{"name": "Transform", "damage": 0}]}}
+    registry = compile_registry(entries, {}, {})
+    assert registry.stage("Ditto") == FINAL_STAGE
+    assert registry.chain("Ditto") == ("Ditto",)
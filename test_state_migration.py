@@ -0,0 +1,98 @@
+import io
+import json
+import pytest
+from .state_migration import *
+from .pokemon import Pokemon, PokemonFactory
+from .bag import Bag
+from .pokeball import RegularPokeball
+
+# ---------- Helpers ----------
+
+def old_state(name="Squirtle"):
+    """State saved before version 1, with type and evolution state names the game no longer knows."""
+    pokemon = PokemonFactory.create_pokemon(name).to_list()
+    pokemon[3], pokemon[7] = "UNKNOWN", "OldState"
+    bag = Bag()
+    ball = RegularPokeball()
+    ball.add(PokemonFactory.create_pokemon("Charmander"))
+    bag.pokemon.add(ball)
+    data = bag.to_dict()
+    data["pokemon"][0][7] = "OldState"
+    return {"active_pokemon": pokemon, "bag": data}
+
+def write_dump(path, states):
+    with open(path, "w") as file:
+        for i, state in enumerate(states):
+            file.write(json.dumps({"player": f"player{i}", "state": state}) + "\n")
+
+def read_dump(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+# ---------- Tests ----------
+
+def test_migrate_state_resolves_old_names():
+    state = old_state()
+    assert migrate_state(state)
+    assert state[STATE_VERSION] == current_version()
+    assert state["active_pokemon"][3] == "WATER"
+    assert state["active_pokemon"][7] == "BaseEvolutionState"
+    assert state["bag"]["pokemon"][0][7] == "BaseEvolutionState"
+    assert Pokemon.from_list(state["active_pokemon"]).to_list() == state["active_pokemon"]
+
+def test_current_state_is_left_alone():
+    state = old_state()
+    migrate_state(state)
+    migrated = json.loads(json.dumps(state))
+    assert not migrate_state(state)
+    assert state == migrated
+
+def test_migrations_run_in_order(monkeypatch):
+    monkeypatch.setattr("pengumon.state_migration.MIGRATIONS", dict(MIGRATIONS))
+    applied = []
+    migration(current_version() + 1)(lambda state: applied.append(state[STATE_VERSION]))
+    state = {STATE_VERSION: current_version() - 1}
+    assert migrate_state(state)
+    assert applied == [current_version() - 1]
+    assert state[STATE_VERSION] == current_version()
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_migrate_dump_keeps_order(tmp_path, workers):
+    source, destination = str(tmp_path / "dump.jsonl"), str(tmp_path / "out.jsonl")
+    names = ["Squirtle", "Bulbasaur", "Charmander"] * 5
+    write_dump(source, [old_state(name) for name in names])
+
+    stats = migrate_dump(source, destination, workers=workers, batch_size=2)
+    assert (stats.records, stats.migrated, stats.failed) == (15, 15, [])
+    entries = read_dump(destination)
+    assert [e["player"] for e in entries] == [f"player{i}" for i in range(15)]
+    assert [e["state"]["active_pokemon"][0] for e in entries] == names
+    assert all(e["state"][STATE_VERSION] == current_version() for e in entries)
+    assert not (tmp_path / "out.jsonl.tmp").exists()
+
+def test_bad_records_are_kept_and_reported(tmp_path):
+    source, destination = str(tmp_path / "dump.jsonl"), str(tmp_path / "out.jsonl")
+    bad = old_state()
+    bad["active_pokemon"][0] = "Missingno"
+    write_dump(source, [old_state(), bad])
+    with open(source, "a") as file:
+        file.write('{"player": "cut off", "sta\n')
+
+    stats = migrate_dump(source, destination, workers=1)
+    assert stats.records == 3 and stats.migrated == 1
+    assert [line for line, _ in stats.failed] == [2, 3]
+    with open(source) as src, open(destination) as dst:
+        original, migrated = src.readlines(), dst.readlines()
+    assert migrated[1:] == original[1:]
+
+def test_throughput_is_reported(tmp_path):
+    source, destination = str(tmp_path / "dump.jsonl"), str(tmp_path / "out.jsonl")
+    write_dump(source, [old_state()] * 4)
+    out = io.StringIO()
+    ticks = iter(range(100))
+    reporter = ThroughputReporter(out, interval=1.0, clock=lambda: next(ticks))
+    migrate_dump(source, destination, workers=1, batch_size=1, reporter=reporter)
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith(f"progress: {BATCHES_PER_WORKER} records")
+    assert lines[-1].startswith("done: 4 records (4 migrated, 0 failed)")
+    assert lines[-1].endswith("records/s")